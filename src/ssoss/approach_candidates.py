@@ -0,0 +1,113 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from typing import Optional
+
+import numpy as np
+
+from ssoss.distance import distance_ft, distance_ft_array, get_backend, local_error_ft
+from ssoss.kinematics import classify_approach_leg
+from ssoss.projection import track_distance_ft
+from ssoss.spatial_index import StaticObjectIndex
+from ssoss.track_cache import CANDIDATE_DTYPE
+
+# default cap on scratch memory used per block of (point, object) pairs
+DEFAULT_MAX_BLOCK_BYTES = 64 * 1024 * 1024
+# rough scratch bytes per (point, object) pair: ~10 float64/int64 temporaries
+_PAIR_BYTES = 80
+
+
+def _block_pairs(index: StaticObjectIndex, lo: int, hi: int, lat, lon, use_index: bool):
+    if use_index:
+        point_idx, obj_idx = index.query_pairs(lat[lo:hi], lon[lo:hi])
+        return point_idx + lo, obj_idx
+    m = len(index)
+    point_idx = np.repeat(np.arange(lo, hi, dtype=np.int64), m)
+    obj_idx = np.tile(np.arange(m, dtype=np.int64), hi - lo)
+    return point_idx, obj_idx
+
+
+def find_approach_candidates(track, index: StaticObjectIndex, so_type: str,
+                             use_index: bool = True,
+                             max_block_bytes: int = DEFAULT_MAX_BLOCK_BYTES,
+                             block_size: Optional[int] = None) -> np.ndarray:
+    """ batched GPXPoint.backflow over every point of a track
+
+    Points are processed in blocks; each block is broadcast against its candidate objects
+    (grid neighbours when ``use_index``, otherwise every object) so peak scratch memory
+    stays under ``max_block_bytes``.  Only approaching candidates are kept, ordered per
+    point by distance, exactly as in ``intersection_approach_list``/``generic_so_approach_list``.
+
+    :param track: TrackArray with bearing column
+    :param index: StaticObjectIndex over the objects, with ``objects`` (sequence or registry) and ``ids`` set
+    :param so_type: "intersection" or "generic_so"
+    :param block_size: points per block, derived from ``max_block_bytes`` when None
+    :return: candidate table with ``CANDIDATE_DTYPE``
+    """
+    n = len(track)
+    m = len(index)
+    if n == 0 or m == 0:
+        return np.array([], dtype=CANDIDATE_DTYPE)
+
+    if block_size is None:
+        if use_index:
+            # a point sees at most the 9 busiest cells around it
+            per_point = 9 * int(np.max(index.cell_end - index.cell_start))
+        else:
+            per_point = m
+        block_size = max(1, max_block_bytes // (_PAIR_BYTES * max(per_point, 1)))
+
+    ids = index.ids if index.ids is not None else np.array([o.get_id_num() for o in index.objects])
+    if so_type == "intersection":
+        if hasattr(index.objects, "rows"):
+            obj_bearings = index.objects.bearing  # StaticObjectRegistry column
+        else:
+            obj_bearings = np.array([o.get_bearingT() for o in index.objects], dtype=np.float64).reshape(m, 4)
+
+    lat, lon = track.lat, track.lon
+    tables = []
+    for lo in range(0, n, block_size):
+        hi = min(lo + block_size, n)
+        point_idx, obj_idx = _block_pairs(index, lo, hi, lat, lon, use_index)
+        if len(point_idx) == 0:
+            continue
+
+        # same search-radius distance as GPXPoint.backflow
+        dist = distance_ft_array(index.lat[obj_idx], index.lon[obj_idx], lat[point_idx], lon[point_idx],
+                                 default="haversine")
+        keep = dist <= index.radius_ft[obj_idx]
+        point_idx, obj_idx, dist = point_idx[keep], obj_idx[keep], dist[keep]
+
+        # approaching: closer to the object than the previous point was (never for point 0)
+        has_prev = point_idx > 0
+        point_idx, obj_idx, dist = point_idx[has_prev], obj_idx[has_prev], dist[has_prev]
+        o_lat, o_lon = index.lat[obj_idx], index.lon[obj_idx]
+        d_cur = track_distance_ft(track, point_idx, o_lat, o_lon)
+        d_prev = track_distance_ft(track, point_idx - 1, o_lat, o_lon)
+        approaching = d_cur < d_prev
+        if get_backend() is None and track.projection is None:
+            # GPXPoint.approaching uses the geodesic by default
+            # decisions within the local backend's error are re-checked with the geodesic
+            for k in np.flatnonzero(np.abs(d_cur - d_prev) < local_error_ft(d_cur) + local_error_ft(d_prev)):
+                obj = (o_lat[k], o_lon[k])
+                approaching[k] = (distance_ft(obj, (lat[point_idx[k]], lon[point_idx[k]]))
+                                  < distance_ft(obj, (lat[point_idx[k] - 1], lon[point_idx[k] - 1])))
+        point_idx, obj_idx, dist = point_idx[approaching], obj_idx[approaching], dist[approaching]
+
+        block = np.zeros(len(point_idx), dtype=CANDIDATE_DTYPE)
+        block["point"] = point_idx
+        block["id"] = ids[obj_idx]
+        block["distance"] = dist
+        block["approaching"] = True
+        if so_type == "intersection":
+            block["leg"], _ = classify_approach_leg(track.bearing[point_idx], obj_bearings[obj_idx])
+        else:
+            block["leg"] = -1
+
+        # per point by distance, ties in original object order
+        order = np.lexsort((obj_idx, dist, point_idx))
+        tables.append(block[order])
+
+    if not tables:
+        return np.array([], dtype=CANDIDATE_DTYPE)
+    return np.concatenate(tables)
@@ -3,6 +3,10 @@ import click
 
 from . import ssoss_cli
 from .signal_layer import build_signal_layer
+from .tiles import build_tiles
+from .index_file import index
+from .fleet import fleet
+from .live import live
 
 
 @click.group(invoke_without_command=True, add_help_option=False)
@@ -27,6 +31,10 @@ def cli(ctx, show_help):
 
 
 cli.add_command(build_signal_layer)
+cli.add_command(build_tiles)
+cli.add_command(index)
+cli.add_command(fleet)
+cli.add_command(live)
 
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,227 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+
+from ssoss.distance import active_backend, distance_ft, get_backend, local_error_ft
+from ssoss.kinematics import heading_within
+from ssoss.motion_road_object import GPXPoint
+from ssoss.projection import track_distance_ft
+from ssoss.registry import as_registry
+
+# one row per sight-distance event
+EVENT_DTYPE = np.dtype([
+    ("point", np.int64),           # track index the heuristic fired on
+    ("id", np.int64),              # static object id
+    ("leg", np.int8),              # approach leg index, -1 for generic objects
+    ("distance", np.float64),      # backflow distance of the candidate (feet)
+    ("sight_distance", np.float64),
+    ("time", np.float64),          # point time shifted by the kinematic time to sight distance
+    ("crossing_time", np.float64), # linear interpolation of the sight distance crossing
+    ("error", np.float64),         # |distance to object - sight distance| at the point (feet)
+])
+
+
+def _geodesic_ft(lat1, lon1, lat2, lon2) -> float:
+    return distance_ft((lat2, lon2), (lat1, lon1), backend="geodesic")
+
+
+def _object_distance_ft(track, so_type, point, ids, legs, lat, lon) -> np.ndarray:
+    """ distances (feet) from track points to objects through the track's distance cache,
+    which the GPXPoint heuristics share; ``legs`` is the stop bar leg measured to, -1 for
+    the object's location
+    """
+    backend = "projected" if track.projection is not None else active_backend("local")
+    keys = list(zip(np.asarray(point).tolist(), np.asarray(ids).tolist(), np.asarray(legs).tolist(),
+                    [backend] * len(point)))
+    return track.distance_cache(so_type).get_many(
+        keys, lambda k: track_distance_ft(track, point[k], lat[k], lon[k]))
+
+
+def _recheck_ties(track) -> bool:
+    # the per-point heuristics use the geodesic unless a backend is chosen for everything
+    # or the track is projected
+    return get_backend() is None and track.projection is None
+
+
+def time_to_sight_distance(d_sd, speed_ftps, acc) -> np.ndarray:
+    """ vectorized GPXPoint.t_to_approach_acc / t_to_generic_so_acc
+
+    :param d_sd: distance to the object minus its sight distance (feet)
+    :param speed_ftps: speed at the point (ft/sec)
+    :param acc: acceleration towards the next point (ft/sec^2)
+    """
+    d_sd = np.asarray(d_sd, dtype=np.float64)
+    v = np.asarray(speed_ftps, dtype=np.float64)
+    acc = np.asarray(acc, dtype=np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        simple = np.where(v > 0, d_sd / v, 0.0)
+        disc = v ** 2 - 4 * acc * d_sd
+        radical = np.sqrt(np.where(disc > 0, disc, 0.0))
+        denominator = 2 * acc
+        t_pos = (-v + radical) / denominator
+        t_neg = (-v - radical) / denominator
+        t_acc = np.minimum(np.abs(t_neg), np.abs(t_pos))
+    return np.where((denominator == 0) | (d_sd <= 0), simple, t_acc)
+
+
+def crossing_time(t_a, t_b, s_a, s_b) -> np.ndarray:
+    """ time where the signed series goes from s_a (>= 0) to s_b (<= 0) """
+    with np.errstate(divide="ignore", invalid="ignore"):
+        frac = np.where(s_a != s_b, s_a / (s_a - s_b), 0.0)
+    return t_a + np.clip(frac, 0.0, 1.0) * (t_b - t_a)
+
+
+def _neighbour_columns(track, point):
+    """ (prev, next) indices and whether a next point exists """
+    last = track.last_index()
+    has_next = point < last
+    return np.maximum(point - 1, 0), np.minimum(point + 1, last), has_next
+
+
+def detect_intersection_crossings(track, candidates, intersections) -> np.ndarray:
+    """ find intersection sight-distance events for every candidate at once
+
+    For each (point, intersection, leg) candidate the signed series
+    ``s = distance to approach point - sight distance`` is evaluated at the previous,
+    current and next track points (the approach point is the stop bar when one is
+    available for the leg, otherwise the intersection center).  An event fires where
+    the series changes sign ahead of the point (``s_prev >= 0``, ``s_cur >= 0``,
+    ``s_next <= 0``) and the vehicle keeps closing in, the same three-point heuristic
+    as ``GPXPoint.h_prev_and_current_before_next`` and ``h_next_less_than_current``.
+
+    :param track: TrackArray
+    :param candidates: intersection candidate table (``CANDIDATE_DTYPE``)
+    :param intersections: IntersectionRegistry or a sequence of Intersection objects
+    :return: event table (``EVENT_DTYPE``) in candidate order
+    """
+    candidates = candidates[candidates["point"] > 0]
+    if len(candidates) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+
+    registry = as_registry(intersections, "intersection")
+    sd = np.round(registry.sd)
+    target = registry.sb_target
+
+    point = candidates["point"]
+    row = registry.rows(candidates["id"])
+    leg = candidates["leg"].astype(np.int64)
+    prev, nxt, has_next = _neighbour_columns(track, point)
+    lat, lon = track.lat, track.lon
+    t_lat, t_lon = target[row, leg, 0], target[row, leg, 1]
+    leg_sd = sd[row, leg]
+
+    ids = candidates["id"]
+    # the stop bar leg the approach point belongs to, -1 where it is the center
+    sb_leg = np.where(registry.sb_available[row, leg], leg, -1)
+    d0 = _object_distance_ft(track, "intersection", prev, ids, sb_leg, t_lat, t_lon)
+    d1 = _object_distance_ft(track, "intersection", point, ids, sb_leg, t_lat, t_lon)
+    d2 = np.where(has_next, _object_distance_ft(track, "intersection", nxt, ids, sb_leg, t_lat, t_lon), 0.0)
+
+    # heuristic comparisons within the local backend's error are re-checked with the geodesic
+    near_tie = ((np.abs(d0 - leg_sd) < local_error_ft(d0)) | (np.abs(d1 - leg_sd) < local_error_ft(d1))
+                | (np.abs(d2 - leg_sd) < local_error_ft(d2))
+                | (np.abs(d2 - d1) < local_error_ft(d1) + local_error_ft(d2)))
+    for k in np.flatnonzero(near_tie & _recheck_ties(track)):
+        d0[k] = _geodesic_ft(lat[prev[k]], lon[prev[k]], t_lat[k], t_lon[k])
+        d1[k] = _geodesic_ft(lat[point[k]], lon[point[k]], t_lat[k], t_lon[k])
+        d2[k] = _geodesic_ft(lat[nxt[k]], lon[nxt[k]], t_lat[k], t_lon[k]) if has_next[k] else 0.0
+
+    s0, s1, s2 = d0 - leg_sd, d1 - leg_sd, d2 - leg_sd
+    fired = (s0 >= 0) & (s1 >= 0) & (s2 <= 0) & (d2 <= d1)
+    if not fired.any():
+        return np.zeros(0, dtype=EVENT_DTYPE)
+
+    point, prev, nxt, row, leg = point[fired], prev[fired], nxt[fired], row[fired], leg[fired]
+    s1, s2, leg_sd = s1[fired], s2[fired], leg_sd[fired]
+    # the kinematic shift is measured to the intersection center like t_to_approach_acc
+    d_center = _object_distance_ft(track, "intersection", point, registry.ids[row], np.full(len(row), -1),
+                                   registry.lat[row], registry.lon[row]) - leg_sd
+
+    events = np.zeros(len(point), dtype=EVENT_DTYPE)
+    events["point"] = point
+    events["id"] = candidates["id"][fired]
+    events["leg"] = leg
+    events["distance"] = candidates["distance"][fired]
+    events["sight_distance"] = leg_sd
+    events["time"] = track.time[point] + time_to_sight_distance(
+        d_center, track.speed[point] * GPXPoint.MStoFTPS, track.acceleration[point])
+    events["crossing_time"] = crossing_time(track.time[point], track.time[nxt], s1, s2)
+    events["error"] = np.abs(s1)
+    return events
+
+
+def detect_generic_crossings(track, candidates, generic_objects, bearing_buffer_angle) -> np.ndarray:
+    """ find generic static object sight-distance events for every candidate at once
+
+    A candidate fires when the point heading is within ``bearing_buffer_angle`` of the
+    object's bearing and the point is already inside the object's sight distance
+    (``s_cur < 0``), as in ``ProcessRoadObjects.generic_so_checks``.  ``error`` is
+    ``|s_cur|``, used to pick the best sighting when several fire together.
+
+    :param track: TrackArray
+    :param candidates: generic_so candidate table (``CANDIDATE_DTYPE``)
+    :param generic_objects: GenericObjectRegistry or a sequence of GenericStaticObject objects
+    :return: event table (``EVENT_DTYPE``) in candidate order
+    """
+    if len(candidates) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+
+    registry = as_registry(generic_objects, "generic_so")
+    loc = np.stack([registry.lat, registry.lon], axis=-1)
+    sd = registry.sight_distance_ft
+    obj_bearing = registry.bearing
+
+    point = candidates["point"]
+    row = registry.rows(candidates["id"])
+    heading_ok = heading_within(track.bearing[point], obj_bearing[row], bearing_buffer_angle)
+    candidates, point, row = candidates[heading_ok], point[heading_ok], row[heading_ok]
+
+    lat, lon = track.lat, track.lon
+    no_leg = np.full(len(point), -1)
+    d1 = _object_distance_ft(track, "generic_so", point, candidates["id"], no_leg, loc[row, 0], loc[row, 1])
+    for k in np.flatnonzero((np.abs(d1 - sd[row]) < local_error_ft(d1)) & _recheck_ties(track)):
+        d1[k] = _geodesic_ft(lat[point[k]], lon[point[k]], loc[row[k], 0], loc[row[k], 1])
+    s1 = d1 - sd[row]
+
+    fired = s1 < 0
+    candidates, point, row, s1 = candidates[fired], point[fired], row[fired], s1[fired]
+    prev = np.maximum(point - 1, 0)
+    s0 = _object_distance_ft(track, "generic_so", prev, candidates["id"], no_leg[fired],
+                             loc[row, 0], loc[row, 1]) - sd[row]
+
+    events = np.zeros(len(point), dtype=EVENT_DTYPE)
+    events["point"] = point
+    events["id"] = candidates["id"]
+    events["leg"] = -1
+    events["distance"] = candidates["distance"]
+    events["sight_distance"] = sd[row]
+    events["time"] = track.time[point] + time_to_sight_distance(
+        s1, track.speed[point] * GPXPoint.MStoFTPS, track.acceleration[point])
+    events["crossing_time"] = np.where(
+        s0 >= 0, crossing_time(track.time[prev], track.time[point], s0, s1), np.nan)
+    events["error"] = np.abs(s1)
+    return events
+
+
+def cluster_events(events, time_window: float) -> np.ndarray:
+    """ keep the lowest-error sighting of each pass of an object
+
+    Events are grouped by (id, leg) and, within a group, chained into clusters while
+    consecutive times are less than ``time_window`` seconds apart, so each pass of the
+    same object is a cluster of its own.  Ties on error keep the earlier sighting.
+
+    :param events: event table (``EVENT_DTYPE``)
+    :return: one event per cluster, ordered by time
+    """
+    if len(events) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE)
+    events = events[np.lexsort((events["time"], events["leg"], events["id"]))]
+    new_group = (np.diff(events["id"]) != 0) | (np.diff(events["leg"]) != 0)
+    starts = np.concatenate(([True], new_group | (np.diff(events["time"]) >= time_window)))
+    cluster = np.cumsum(starts)
+
+    best = np.lexsort((events["time"], events["error"], cluster))
+    first = np.concatenate(([True], np.diff(cluster[best]) != 0))
+    kept = events[best[first]]
+    return kept[np.argsort(kept["time"], kind="stable")]
@@ -1,22 +1,108 @@
 # !/usr/bin/env python
 # coding: utf-8
+import itertools
 import os
 import time
 import datetime
 from datetime import datetime
-from pathlib import PurePath
-from tqdm import tqdm
+from pathlib import Path, PurePath
 
 import geopy
-import geopy.distance
 
 import gpxpy.geo as gpxgeo
 
 import numpy as np
 import pandas as pd
 
+from ssoss.distance import distance_ft, distance_ft_array
+from ssoss.kinematics import classify_approach_leg, rhumb_course
+from ssoss.spatial_index import StaticObjectIndex
 from ssoss.static_road_object import Intersection, StaticRoadObject
 
+# nearest intersections of each track point, rows of sro_df (-1 when none is in range)
+NEAREST_DTYPE = np.dtype([
+    ("nearest", np.int64),
+    ("nearest_distance", np.float64),      # feet, NaN without a nearest row
+    ("approaching", np.int64),             # nearest row the point is not moving away from
+    ("approaching_distance", np.float64),
+])
+
+# one row per track point with an approaching intersection, see DynamicRoadObject.drive_log
+DRIVE_LOG_DTYPE = np.dtype([
+    ("id", np.int64),
+    ("appr_dir", np.int8),          # 0 - NB, 1 - EB, 2 - SB, 3 - WB
+    ("timestamp", np.float64),      # get_utc_timestamp
+    ("time_delta", np.float64),     # seconds from the previous point
+    ("lat", np.float64),
+    ("lon", np.float64),
+    ("spd", np.float64),            # MPH
+    ("distance", np.float64),       # feet past the sight distance, stop bar to point
+    ("bearing", np.float64),
+    ("approaching", np.bool_),      # distance > 0
+])
+
+# rows per drive_log chunk, bounds the memory of a streamed log
+DRIVE_LOG_CHUNK = 8192
+
+
+def drive_log_frame(log, time_delta=True) -> pd.DataFrame:
+    """ approach log DataFrame (drive_gpx / drive_gpx_stop_bar columns) of DRIVE_LOG_DTYPE rows
+
+    :param log: DRIVE_LOG_DTYPE array
+    :param time_delta: keep the time_delta column (drive_gpx_stop_bar)
+    """
+    columns = {
+        "id": log["id"],
+        "appr_dir": log["appr_dir"].astype(np.int64),
+        "timestamp": log["timestamp"],
+        "time_delta": log["time_delta"],
+        "location": [geopy.Point(a, b).format_decimal() for a, b in zip(log["lat"], log["lon"])],
+        "spd": log["spd"],
+        "distance": log["distance"],
+        "bearing": log["bearing"],
+        "approaching": log["approaching"],
+    }
+    if not time_delta:
+        del columns["time_delta"]
+    return pd.DataFrame(columns)
+
+
+def write_drive_log(chunks, path) -> int:
+    """ stream approach log chunks to a CSV file, or a Parquet file (needs pyarrow) when the
+    path ends in .parquet; only one chunk is held in memory at a time
+
+    :param chunks: iterable of DRIVE_LOG_DTYPE arrays, e.g. DynamicRoadObject.drive_log()
+    :param path: output file
+    :return: number of rows written
+    """
+    path = Path(path)
+    chunks = iter(chunks)
+    first = next(chunks, None)
+    if first is None:
+        first = np.zeros(0, dtype=DRIVE_LOG_DTYPE)
+    rows = 0
+
+    if path.suffix.lower() == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        def table(chunk):
+            return pa.table({name: chunk[name] for name in chunk.dtype.names})
+
+        with pq.ParquetWriter(path, table(first).schema) as writer:
+            for chunk in itertools.chain([first], chunks):
+                writer.write_table(table(chunk))
+                rows += len(chunk)
+        return rows
+
+    with open(path, "w", newline="") as f:
+        header = True
+        for chunk in itertools.chain([first], chunks):
+            pd.DataFrame(chunk).to_csv(f, header=header, index=False)
+            header = False
+            rows += len(chunk)
+    return rows
+
 
 class DynamicRoadObject:
 
@@ -36,7 +122,7 @@ class DynamicRoadObject:
         :param obj_type: type of dynamic object (vehicle, ship, drone, etc.)
         :param sro_df: dataframe of static road objects
         :param gpx_df: dataframe of gpx points
-        :param source: default to GPX, but in future could be a live stream of GPS data
+        :param source: default to GPX; live NMEA streams are handled by ssoss.live
         """
 
         self.MStoMPH = 2.23694
@@ -65,6 +151,8 @@ class DynamicRoadObject:
 
         self.sro_df = sro_df
         self.sorted_sroDF = None
+        self._sro_arrays = None
+        self.nearest_table = None  # NEAREST_DTYPE per gpx_df row, see nearest_intersections
         self.closest_intersection = self.get_closest_intersection(as_list=False)
         self.closest_intersection_list = self.get_closest_intersection(as_list=True)
         self.closest_approaching_intersection = self.get_closest_approaching_intersection(
@@ -96,8 +184,14 @@ class DynamicRoadObject:
 
         self.spd = self.gpx_df.loc[i].spd
 
-        self.closest_intersection = self.get_closest_intersection()
-        self.closest_approaching_intersection = self.get_closest_approaching_intersection()
+        # one query for the whole track, then a row lookup per point
+        if self.nearest_table is None:
+            self.nearest_table = self.nearest_intersections()
+        objects = self._sro_arrays[0]
+        row = self.nearest_table[i]
+        self.closest_intersection = objects[row["nearest"]] if row["nearest"] >= 0 else None
+        self.closest_approaching_intersection = (objects[row["approaching"]]
+                                                 if row["approaching"] >= 0 else None)
 
     def first_timestamp(self) -> pd.Timestamp:
         t = datetime.fromisoformat(str(self.t0))
@@ -144,35 +238,35 @@ class DynamicRoadObject:
                 self.update_location_simple(i)
                 return self.pt1.format_decimal()
 
-    def get_dist_step(self) -> geopy.distance:
+    def get_dist_step(self) -> float:
         """ first distance step
 
-        :return: geopy distance in feet
+        :return: distance in feet
         """
-        return geopy.distance.distance(self.pt0, self.pt1).ft
+        return distance_ft(self.pt0, self.pt1)
 
     @staticmethod
-    def get_dist_step_from_points(point1, point2) -> geopy.distance:
+    def get_dist_step_from_points(point1, point2) -> float:
         """distance between two points in feet.
 
         :param point1: geopy point 1
         :param point2: geopy point 2
-        :return: geopy distance in feet
+        :return: distance in feet
         """
 
-        return geopy.distance.distance(point1, point2).ft
+        return distance_ft(point1, point2)
 
-    def cur_dist_to_sro(self, sro: StaticRoadObject) -> geopy.distance:
+    def cur_dist_to_sro(self, sro: StaticRoadObject) -> float:
         if sro is None:
             return None
         else:
-            return geopy.distance.distance(self.pt1, sro.get_location()).ft
+            return distance_ft(self.pt1, sro.get_location())
 
-    def prev_dist_to_sro(self, sro: StaticRoadObject) -> geopy.distance:
+    def prev_dist_to_sro(self, sro: StaticRoadObject) -> float:
         if sro is None:
             return None
         else:
-            return geopy.distance.distance(self.pt0, sro.get_location()).ft
+            return distance_ft(self.pt0, sro.get_location())
 
     def get_spd(self, units="MPH") -> float:
         if units == "MPH":
@@ -213,36 +307,73 @@ class DynamicRoadObject:
         else:
             return False
 
-    def get_closest_intersection(self, as_list=False) -> Intersection:
-        """returns None or 1st or ascending sorted list of intersection objects based on distance
+    def _object_arrays(self):
+        """ intersection objects of sro_df with their locations and the sight distance window
+        (min/max sight distance of the first intersection), built once
         """
+        if self._sro_arrays is None:
+            objects = self.sro_df.iloc[:, 1].to_numpy()
+            lat = np.array([o.get_location().latitude for o in objects], dtype=np.float64)
+            lon = np.array([o.get_location().longitude for o in objects], dtype=np.float64)
+            window = (objects[0].get_sd("min"), objects[0].get_sd("max")) if len(objects) else (0.0, 0.0)
+            self._sro_arrays = (objects, lat, lon, window)
+        return self._sro_arrays
+
+    def nearest_intersections(self, lat=None, lon=None) -> np.ndarray:
+        """ nearest and nearest approaching intersection of every track point in one query
+
+        An intersection is in range of a point when its distance is within the sight
+        distance window, and approaching when the point is no farther from it than the
+        previous point (the first point counts as approaching).  Ties go to the earlier
+        sro_df row.
+
+        :param lat, lon: track coordinates, the gpx_df points when None
+        :return: NEAREST_DTYPE table, one row per track point
+        """
+        if lat is None:
+            points = self.gpx_df["geo_point"]
+            lat = np.array([p.latitude for p in points], dtype=np.float64)
+            lon = np.array([p.longitude for p in points], dtype=np.float64)
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        objects, o_lat, o_lon, (min_sd, max_sd) = self._object_arrays()
+
+        table = np.zeros(len(lat), dtype=NEAREST_DTYPE)
+        table["nearest"] = table["approaching"] = -1
+        table["nearest_distance"] = table["approaching_distance"] = np.nan
+        if len(objects) == 0 or len(lat) == 0:
+            return table
+
+        point, obj = StaticObjectIndex(o_lat, o_lon, max_sd).query_pairs(lat, lon)
+        d = distance_ft_array(lat[point], lon[point], o_lat[obj], o_lon[obj], default="geodesic")
+        keep = (d >= min_sd) & (d <= max_sd)
+        point, obj, d = point[keep], obj[keep], d[keep]
+        prev = np.maximum(point - 1, 0)
+        d_prev = distance_ft_array(lat[prev], lon[prev], o_lat[obj], o_lon[obj], default="geodesic")
+        approaching = d <= d_prev
+
+        for column, mask in (("nearest", np.ones(len(d), dtype=bool)), ("approaching", approaching)):
+            p, o, dist = point[mask], obj[mask], d[mask]
+            order = np.lexsort((o, dist, p))
+            first = order[np.concatenate(([True], np.diff(p[order]) != 0))] if len(order) else order
+            table[column][p[first]] = o[first]
+            table[f"{column}_distance"][p[first]] = dist[first]
+        return table
 
-        # Crop min and max distances to limit search, sort and length
-        min_sd = self.sro_df.iloc[0, 1].get_sd("min")
-        max_sd = self.sro_df.iloc[0, 1].get_sd("max")
-
-        for row in range(0, self.sro_df.last_valid_index()):
-            self.sro_df.loc[row,
-                            "d"] = self.cur_dist_to_sro(self.sro_df.iloc[row, 1])
-            self.sro_df.loc[row, "approaching"] = self.approaching(
-                self.sro_df.iloc[row, 1])
-
-        self.sorted_sroDF = self.sro_df.sort_values(by=['d'], ignore_index=True)
-
-        min_row = self.sorted_sroDF[self.sorted_sroDF['d'].ge(min_sd)].index
-
-        if len(min_row) == 0:
-            min_row = 0
-        else:
-            min_row = min(min_row)
+    def get_closest_intersection(self, as_list=False) -> Intersection:
+        """returns None or 1st or ascending sorted list of intersection objects based on distance
 
-        max_row = self.sorted_sroDF[self.sorted_sroDF['d'].le(max_sd)].index
-        if len(max_row) == 0:
-            max_row = 0
-        else:
-            max_row = max(max_row) + 1  # +1 for inclusive
+        Distances of the current point to every intersection are computed at once;
+        ``sro_df`` is not modified, the list is a sorted copy with "d" and "approaching".
+        """
+        objects, o_lat, o_lon, (min_sd, max_sd) = self._object_arrays()
+        d = distance_ft_array(self.pt1.latitude, self.pt1.longitude, o_lat, o_lon, default="geodesic")
+        d_prev = distance_ft_array(self.pt0.latitude, self.pt0.longitude, o_lat, o_lon, default="geodesic")
 
-        limited_df = self.sorted_sroDF[min_row:max_row]
+        self.sorted_sroDF = (self.sro_df.assign(d=d, approaching=d <= d_prev)
+                             .sort_values(by=["d"], kind="stable", ignore_index=True))
+        in_range = self.sorted_sroDF["d"].between(min_sd, max_sd)
+        limited_df = self.sorted_sroDF[in_range]
 
         if limited_df.empty:
             return None
@@ -285,183 +416,108 @@ class DynamicRoadObject:
              "False" index_out returns strings:  "NB","EB", "SB", "WB".
         """
 
-        veh_int_diff = [
-            self.calc_bearing_diff(itrsxn.get_bearing(0)),
-            self.calc_bearing_diff(itrsxn.get_bearing(1)),
-            self.calc_bearing_diff(itrsxn.get_bearing(2)),
-            self.calc_bearing_diff(itrsxn.get_bearing(3))
-        ]
-
-        approach_leg_index = np.argmin(veh_int_diff)
-        app_leg_dir = ""
         if itrsxn is None:
             return None
-        elif index_out:
-            return int(approach_leg_index)
-        else:
-            if approach_leg_index == 0:
-                app_leg_dir = "NB"
-            elif approach_leg_index == 1:
-                app_leg_dir = "EB"
-            elif approach_leg_index == 2:
-                app_leg_dir = "SB"
-            elif approach_leg_index == 3:
-                app_leg_dir = "WB"
-            return app_leg_dir
-
-    def drive_gpx(self, gpx_filename: str, use_pickle_file=False) -> pd.DataFrame:
-        """ Load the GPX file into a dataframe with timestamp, location, speed, dist to event, bearing, and
-        id of approaching intersection
+        leg, _ = classify_approach_leg(self.get_bearing(), itrsxn.get_bearingT())
+        if index_out:
+            return int(leg)
+        return Intersection.get_bearing_str(int(leg))
 
-        :param gpx_filename: absolute filepath of file (without .gpx or .p file)
-        :param use_pickle_file: default to False, can be faster to load from pickle
-        :return: DataFrame with GPX file loaded and saves a CSV and Pickle file of gpx information
-        """
+    def _leg_bearings(self) -> np.ndarray:
+        """ approach leg bearings (m, 4) of the sro_df intersections """
+        objects = self._object_arrays()[0]
+        return np.array([o.get_bearingT() for o in objects], dtype=np.float64).reshape(len(objects), -1)
+
+    def drive_log(self, chunk_size: int = DRIVE_LOG_CHUNK):
+        """ approach log of the track in one pass, as DRIVE_LOG_DTYPE chunks
 
-        # gpx_file = PurePath(self.in_file_path, gpx_filename + ".gpx")
-        pickle_file = self.out_file_path / (str(gpx_filename) + ".pkl")
-        csv_file = self.out_file_path / (str(gpx_filename) + ".csv")
+        Track points 2 to the second to last with an approaching intersection (see
+        nearest_intersections) get a row; bearing and approach leg are computed for a whole
+        chunk at once and the leg is looked up once per row.
 
-        approach_log_df = None
+        :param chunk_size: maximum rows per chunk
+        :return: generator of DRIVE_LOG_DTYPE arrays
+        """
+        gpx_df = self.gpx_df
+        points = gpx_df["geo_point"]
+        lat = np.array([p.latitude for p in points], dtype=np.float64)
+        lon = np.array([p.longitude for p in points], dtype=np.float64)
+        if self.nearest_table is None:
+            self.nearest_table = self.nearest_intersections(lat, lon)
+        objects = self._object_arrays()[0]
+        leg_bearings = self._leg_bearings()
+        times = gpx_df["t"].tolist()
+        spd = gpx_df["spd"].to_numpy(dtype=np.float64) * self.MStoMPH
+
+        last = gpx_df.last_valid_index() or 0
+        for start in range(2, last, chunk_size):
+            i = np.arange(start, min(start + chunk_size, last))
+            row = self.nearest_table["approaching"][i]
+            i, row = i[row >= 0], row[row >= 0]
+            if len(i) == 0:
+                continue
+            bearing = rhumb_course(lat[i - 1], lon[i - 1], lat[i], lon[i])
+            leg, _ = classify_approach_leg(bearing, leg_bearings[row])
+
+            chunk = np.zeros(len(i), dtype=DRIVE_LOG_DTYPE)
+            chunk["id"] = [objects[r].get_id_num() for r in row]
+            chunk["appr_dir"] = leg
+            # same clock as get_utc_timestamp / get_time_step
+            chunk["timestamp"] = [time.mktime(times[k].timetuple()) - 28800 for k in i]
+            step = [(times[k] - times[k - 1]).total_seconds() for k in i]
+            chunk["time_delta"] = [10.0 if s < 0 else s for s in step]
+            chunk["lat"], chunk["lon"] = lat[i], lon[i]
+            chunk["spd"] = spd[i]
+            chunk["distance"] = [objects[r].distance_to_sb(geopy.Point(lat[k], lon[k]), g)
+                                 - objects[r].get_sd(g) for k, r, g in zip(i, row, leg.tolist())]
+            chunk["bearing"] = bearing
+            chunk["approaching"] = chunk["distance"] > 0
+            yield chunk
+
+    def _drive_log_files(self, gpx_filename, pickle_suffix, use_pickle_file, out_dir,
+                         time_delta) -> pd.DataFrame:
+        out_dir = self.out_file_path if out_dir is None else Path(out_dir)
+        out_dir.mkdir(exist_ok=True, parents=True)
+        pickle_file = out_dir / (str(gpx_filename) + pickle_suffix)
+        csv_file = out_dir / (str(gpx_filename) + ".csv")
 
         if use_pickle_file and os.path.isfile(pickle_file):
-            approach_log_df = pd.read_pickle(pickle_file)
-            return approach_log_df
-        else:
-            # dictionary-> Keys:Values
-            appr_dict = {
-                "id": [],
-                "appr_dir": [],
-                "timestamp": [],
-                "location": [],
-                "spd": [],
-                "distance": [],
-                "bearing": [],
-                "approaching": []
-            }
-
-            for i in range(2, self.gpx_df.last_valid_index()):
-                self.update_location_simple(i)
-                cai = self.get_closest_approaching_intersection()
-                if cai is None:
-                    if i == self.gpx_df.last_valid_index() - 1:
-                        approach_log_df = pd.DataFrame(appr_dict)
-                        approach_log_df.to_csv(csv_file)
-                        approach_log_df.to_pickle(pickle_file)
-                        print(
-                            f"exported data frame to CSV (in {csv_file}) and Pickle (in {pickle_file})"
-                        )
-                    else:
-                        pass
-                else:
-                    approaching_sd = False
-                    appr_distance = (cai.distance_from_sb(
-                        self.get_location(), self.approach_leg(cai)) -
-                                     cai.get_sd(self.approach_leg(cai)))
-
-                    if appr_distance > 0:
-                        approaching_sd = True
-
-                    appr_dict["id"].append(cai.get_id_num())
-                    appr_dict["appr_dir"].append(self.approach_leg(cai))
-                    appr_dict["timestamp"].append(self.get_utc_timestamp())
-                    appr_dict["location"].append(self.get_location())
-                    appr_dict["spd"].append(self.get_spd())
-                    appr_dict["distance"].append(appr_distance)
-                    appr_dict["bearing"].append(self.get_bearing())
-                    appr_dict["approaching"].append(approaching_sd)
-
-                    if i == self.gpx_df.last_valid_index() - 1:
-                        approach_log_df = pd.DataFrame(appr_dict)
-                        approach_log_df.to_csv(csv_file)
-                        approach_log_df.to_pickle(pickle_file)
-                        print(
-                            f"Exported dataframe to CSV ({csv_file}) and Pickle ({pickle_file})"
-                        )
+            return pd.read_pickle(pickle_file)
+
+        chunks = list(self.drive_log())
+        log = np.concatenate(chunks) if chunks else np.zeros(0, dtype=DRIVE_LOG_DTYPE)
+        approach_log_df = drive_log_frame(log, time_delta=time_delta)
+        approach_log_df.to_csv(csv_file)
+        approach_log_df.to_pickle(pickle_file)
+        print(f"Exported dataframe to CSV ({csv_file}) and Pickle ({pickle_file})")
         return approach_log_df
 
-    def drive_gpx_stop_bar(self,
-                           gpx_filename,
-                           use_pickle_file=True) -> pd.DataFrame:
+    def drive_gpx(self, gpx_filename: str, use_pickle_file=False, out_dir=None) -> pd.DataFrame:
         """ Load the GPX file into a dataframe with timestamp, location, speed, dist to event, bearing, and
         id of approaching intersection
 
-        :param gpx_directory: file directory where .gpx file is for input
-        :param gpx_filename: filename of .gpx file (without .gpx)
-        :param out_file_directory: where output files are saved to (./out/)
-        :param use_pickle_file: default to False, can be faster to load from pickle
-        :return: DataFrame with GPX calculated for sro file and saved a CSV and Pickle file of gpx information
+        For long tracks stream ``drive_log()`` through ``write_drive_log`` instead.
 
+        :param gpx_filename: absolute filepath of file (without .gpx or .p file)
+        :param use_pickle_file: default to False, can be faster to load from pickle
+        :param out_dir: where output files are saved to, defaults to ./out/
+        :return: DataFrame with GPX file loaded and saves a CSV and Pickle file of gpx information
         """
-        # self.gpx_filepath = gpx_directory + gpx_filename + ".gpx"
-        pickle_file = self.out_file_path / (str(gpx_filename) + ".p")
-        csv_file = self.out_file_path / (str(gpx_filename) + ".csv")
-
-        approach_sb_log_df = None
+        return self._drive_log_files(gpx_filename, ".pkl", use_pickle_file, out_dir, time_delta=False)
 
-        if use_pickle_file and os.path.isfile(pickle_file):
-            approach_sb_log_df = pd.read_pickle(pickle_file)
-            return approach_sb_log_df
-        else:
-            # dictionary-> Keys:Values
-            appr_dict = {
-                "id": [],
-                "appr_dir": [],
-                "timestamp": [],
-                "time_delta": [],
-                "location": [],
-                "spd": [],
-                "distance": [],
-                "bearing": [],
-                "approaching": []
-            }
-
-            for i in tqdm(range(2, self.gpx_df.last_valid_index()),
-                          desc="Loading GPX:",
-                          unit="GPX Points"):
+    def drive_gpx_stop_bar(self,
+                           gpx_filename,
+                           use_pickle_file=True,
+                           out_dir=None) -> pd.DataFrame:
+        """ Load the GPX file into a dataframe with timestamp, time step, location, speed, dist to event,
+        bearing, and id of approaching intersection
 
-                self.update_location_simple(i)
-                cai = self.get_closest_approaching_intersection()
-                if cai is None:
-                    if i == self.gpx_df.last_valid_index() - 1:
-                        approach_sb_log_df = pd.DataFrame(appr_dict)
-                        approach_sb_log_df.to_csv(csv_file)
-                        approach_sb_log_df.to_pickle(pickle_file)
-                        print(
-                            f"exported dataframe to CSV (in {csv_file}) and Pickle (in {pickle_file})"
-                        )
-                    else:
-                        pass
-                else:
-                    approaching_sd = False
-                    appr_distance = (cai.distance_from_sb(
-                        self.get_location(), self.approach_leg(cai)) -
-                                     cai.get_sd(self.approach_leg(cai)))
-                    # print(f'{i}: {appr_distance}ft from {cai.get_name()}')
-                    if appr_distance > 0:
-                        approaching_sd = True
-
-                    appr_dict["id"].append(cai.get_id_num())
-                    appr_dict["appr_dir"].append(self.approach_leg(cai))
-                    appr_dict["timestamp"].append(self.get_utc_timestamp())
-                    appr_dict["time_delta"].append(self.get_time_step())
-                    appr_dict["location"].append(self.get_location())
-                    appr_dict["spd"].append(self.get_spd())
-                    appr_dict["distance"].append(appr_distance)
-                    appr_dict["bearing"].append(self.get_bearing())
-                    appr_dict["approaching"].append(approaching_sd)
-
-                    if i == self.gpx_df.last_valid_index() - 1:
-                        print("WRITING DICT TO DATAFRAME")
-                        approach_sb_log_df = pd.DataFrame(appr_dict)
-                        approach_sb_log_df.to_csv(csv_file)
-                        approach_sb_log_df.to_pickle(pickle_file)
-                        print(
-                            f"Exported data frame to CSV ({csv_file}) and Pickle ({pickle_file})"
-                        )
-                        print(f'ApproachSB_DF:{approach_sb_log_df}')
-
-        return approach_sb_log_df
+        :param gpx_filename: filename of .gpx file (without .gpx)
+        :param use_pickle_file: default to True, can be faster to load from pickle
+        :param out_dir: where output files are saved to, defaults to ./out/
+        :return: DataFrame with GPX calculated for sro file and saved a CSV and Pickle file of gpx information
+        """
+        return self._drive_log_files(gpx_filename, ".p", use_pickle_file, out_dir, time_delta=True)
 
     def get_street(self, itrsxn: Intersection) -> str:
         """ current Street of intersection approach leg
@@ -511,27 +567,62 @@ class DynamicRoadObject:
         return df.iloc[i]
 
     @staticmethod
-    def t_spd_adjust(d0: float, spd0: float, d1: float, spd1: float) -> float:
+    def t_spd_adjust(d0, spd0, d1, spd1):
         """ Adjusts time of event based on speed of gpx points i and i+1.
 
+        Works element-wise on arrays as well as on single values.
+
         :param d0: distance a t=0
         :param spd0: speed at t=0
         :param d1: distance a t=1
         :param spd1: speed at t=1
         :return: time adjustment from t=0 to event location
         """
-        t_adj0 = d0 / spd0
-        t_adj1 = d1 / spd1
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t_adj0 = d0 / spd0
+            t_adj1 = d1 / spd1
 
-        d_step = d0 + abs(d1)
+            d_step = d0 + abs(d1)
 
-        w0 = d0 / d_step
-        w1 = abs(d1) / d_step
+            w0 = d0 / d_step
+            w1 = abs(d1) / d_step
 
         sum_t_adj = abs(w0 * t_adj0 + w1 * t_adj1)
 
         return sum_t_adj / 2.0
 
+    def _sd_table(self) -> np.ndarray:
+        """ rounded sight distance (m, 4) of every sro_df intersection and leg, as get_sd """
+        objects = self._object_arrays()[0]
+        return np.array([[o.get_sd(leg) for leg in range(4)] for o in objects],
+                        dtype=np.float64).reshape(len(objects), 4)
+
+    def _rows_by_id(self, id_nums) -> np.ndarray:
+        """ first sro_df row of each intersection id, as get_itrsxn_obj_by_id """
+        id_nums = np.asarray(id_nums)
+        ids = self.sro_df["id"].to_numpy()
+        unique_ids, first = np.unique(ids, return_index=True)
+        pos = np.minimum(np.searchsorted(unique_ids, id_nums), max(len(unique_ids) - 1, 0))
+        missing = (unique_ids[pos] != id_nums) if len(unique_ids) else np.ones(len(id_nums), dtype=bool)
+        if missing.any():
+            raise KeyError(f"intersection id {id_nums[missing][0]} is not in sro_df")
+        return first[pos]
+
+    def _approach_frame(self, gpx_df, i, t_adjust) -> pd.DataFrame:
+        """ seek_sd / seek_sb output rows for log positions ``i`` """
+        df = gpx_df.iloc[i][["id", "appr_dir", "timestamp", "location", "spd", "distance"]]
+        df = df.reset_index(drop=True)
+        df["t_adjust"] = t_adjust
+        df["string_desc"] = [self.get_info_by_id(id_num, appr_dir)
+                             for id_num, appr_dir in zip(df["id"], df["appr_dir"])]
+        return df
+
+    @staticmethod
+    def _seek_positions(gpx_df) -> np.ndarray:
+        """ log positions i with i-1 and i+2 in the log, the range seek_sd / seek_sb scan """
+        last = gpx_df.last_valid_index()
+        return np.arange(1, (last or 0) - 3)
+
     def seek_sd(self, gpx_df, csv_out=True) -> pd.DataFrame:
         """Find event time of Sight Distance(sd) for each intersection traveled through
 
@@ -548,67 +639,33 @@ class DynamicRoadObject:
 
         # For each step in the GPS
         #  if speed(i) AND speed(i+1) > 0.4 mph AND distance to sight distance <=
-        #   approaching intersection's sight distance + 50ft
+        #   approaching intersection's sight distance + distance covered in the time step
         #   AND i-1 AND i are approaching intersection
         #   AND i+1 AND i+2 are not approaching (i.e. just passed event distance)
-
-        # initialize dataframe of sighted intersections and misc. info
-        df_dict = {
-            "id": [],
-            "appr_dir": [],
-            "timestamp": [],
-            "location": [],
-            "spd": [],          # MPH
-            "distance": [],     # FEET
-            "t_adjust": [],     # SECONDS
-            "string_desc": []
-        }
-
-        for i in range(1, (gpx_df.last_valid_index() - 3)):
-            if gpx_df.spd.iloc[i] > 0.4 and \
-                    gpx_df.spd.iloc[i + 1] > 0.4 and \
-                    gpx_df.distance.iloc[i + 1] <= \
-                    self.get_itrsxn_obj_by_id(gpx_df.id.iloc[i]).get_sd(gpx_df.appr_dir.iloc[i + 1]) + \
-                        (gpx_df.time_delta.iloc[i] * (gpx_df.spd.iloc[i] * self.MPHtoFTPS)):
-                print("heuristic filter")
-
-                if (gpx_df.approaching.iloc[i - 1]) == True and \
-                        (gpx_df.approaching.iloc[i]) == True and \
-                        (gpx_df.approaching.iloc[i + 1] == False) and \
-                        (gpx_df.approaching.iloc[i + 2] == False):
-
-                    print("approach filter")
-
-                    t_adjust = self.t_spd_adjust(gpx_df.distance.iloc[i], gpx_df.spd.iloc[i],
-                                                 gpx_df.distance.iloc[i + 1], gpx_df.spd.iloc[i + 1]
-                                                 )
-
-
-                    # t_adj is less than timestep when dynamic object is close to event distance
-                    if t_adjust <= gpx_df.time_delta.iloc[i]:
-                        print("t-adjust filter")
-                        df_dict["id"].append(gpx_df.id.iloc[i])
-                        df_dict["appr_dir"].append(gpx_df.appr_dir.iloc[i])
-                        df_dict["timestamp"].append(gpx_df.timestamp.iloc[i])
-                        df_dict["location"].append(gpx_df.location.iloc[i])
-                        df_dict["spd"].append(gpx_df.spd.iloc[i])
-                        df_dict["distance"].append(gpx_df.distance.iloc[i])
-                        df_dict["t_adjust"].append(t_adjust)
-                        df_dict["string_desc"].append(
-                            self.get_info_by_id(gpx_df.id.iloc[i],
-                                                gpx_df.appr_dir.iloc[i]))
-                        print(
-                            f'seek_sd_Info:{self.get_info_by_id(gpx_df.id.iloc[i], gpx_df.appr_dir.iloc[i])}, time adjust:{t_adjust}'
-                        )
-                    else:
-                        pass
-            else:
-                pass
+        # every step is evaluated at once with masks over the log columns
+
+        spd = gpx_df["spd"].to_numpy(dtype=np.float64)
+        distance = gpx_df["distance"].to_numpy(dtype=np.float64)
+        time_delta = gpx_df["time_delta"].to_numpy(dtype=np.float64)
+        appr_dir = gpx_df["appr_dir"].to_numpy()
+        approaching = gpx_df["approaching"].to_numpy() == True
+
+        i = self._seek_positions(gpx_df)
+        i = i[(spd[i] > 0.4) & (spd[i + 1] > 0.4)]
+        sd_next = self._sd_table()[self._rows_by_id(gpx_df["id"].to_numpy()[i]),
+                                   appr_dir[i + 1].astype(np.int64)]
+        heuristic = distance[i + 1] <= sd_next + time_delta[i] * (spd[i] * self.MPHtoFTPS)
+        passed = approaching[i - 1] & approaching[i] & ~approaching[i + 1] & ~approaching[i + 2]
+        i = i[heuristic & passed]
+
+        t_adjust = self.t_spd_adjust(distance[i], spd[i], distance[i + 1], spd[i + 1])
+        # t_adj is less than timestep when dynamic object is close to event distance
+        close = t_adjust <= time_delta[i]
+
+        df = self._approach_frame(gpx_df, i[close], t_adjust[close])
         if csv_out:
-            pd.DataFrame(df_dict).to_csv(
-                self.out_file_path / "approaching_intersections.csv"
-            )
-        return pd.DataFrame(df_dict)
+            df.to_csv(self.out_file_path / "approaching_intersections.csv")
+        return df
 
     # TODO: Ensure this works properly for Stop bar data, combine with seek_sd method
     def seek_sb(self, gpx_df, csv_out=True) -> pd.DataFrame:
@@ -619,74 +676,39 @@ class DynamicRoadObject:
         :return: dataframe of intersection approaches and speed and distance
         """
 
-        # See seek_sd for how this method works
-
-        df_dict_sb = {
-            "id": [],
-            "appr_dir": [],
-            "timestamp": [],
-            "location": [],
-            "spd": [],
-            "distance": [],
-            "t_adjust": [],
-            "string_desc": []
-        }
-
-        for i in range(1, (gpx_df.last_valid_index() - 3)):
-            if self.get_itrsxn_obj_by_id(gpx_df.id.iloc[i]).distance_from_sb(
-                    gpx_df.location.iloc[i + 1], gpx_df.appr_dir.iloc[i + 1]) is None:
-                print(f'USING CENTER OF INTERSECTION LOCATION')
-                approach_distance = self.get_itrsxn_obj_by_id(
-                    gpx_df.id.iloc[i]).get_sd(gpx_df.appr_dir.iloc[i + 1]) + 50
-            else:
-                print(f'USING STOP BAR LOCATION')
-                approach_distance = self.get_itrsxn_obj_by_id(
-                    gpx_df.id.iloc[i]).distance_from_sb(gpx_df.location.iloc[i + 1],
-                                                        gpx_df.appr_dir.iloc[i + 1])
-
-            if gpx_df.spd.iloc[i] > 0.2 and gpx_df.spd.iloc[i + 1] > 0.2 \
-                    and gpx_df.distance.iloc[i + 1] <= approach_distance <= gpx_df.distance.iloc[i]:
-
-                if True:
-                    """
-                    calculate exact time based on speed. using i and i+1. 
-                    
-                    For point i and i+1, the exact time adjustment is weighted
-                    based on the speeds at these two point's in time. This shifts the exact position
-                    of the car to the most accurate time it was at the calculated sight distance
-                    
-                    store that time in UTC in DF
-                    """
-
-                    t_adjust = self.t_spd_adjust(gpx_df.distance.iloc[i], gpx_df.spd.iloc[i],
-                                                 gpx_df.distance.iloc[i + 1], gpx_df.spd.iloc[i + 1]
-                                                 )
-
-                    if t_adjust <= 1:
-                        df_dict_sb["id"].append(gpx_df.id.iloc[i])
-                        df_dict_sb["appr_dir"].append(gpx_df.appr_dir.iloc[i])
-                        df_dict_sb["timestamp"].append(gpx_df.timestamp.iloc[i])
-                        df_dict_sb["location"].append(gpx_df.location.iloc[i])
-                        df_dict_sb["spd"].append(gpx_df.spd.iloc[i])
-                        df_dict_sb["distance"].append(gpx_df.distance.iloc[i])
-                        df_dict_sb["t_adjust"].append(t_adjust)
-                        df_dict_sb["string_desc"].append(
-                            self.get_info_by_id(gpx_df.id.iloc[i],
-                                                gpx_df.appr_dir.iloc[i]))
-
-                        # print(self.utc_to_timestamp(df.timestamp.iloc[i]))
-                        print(
-                            f'info:{self.get_info_by_id(gpx_df.id.iloc[i], gpx_df.appr_dir.iloc[i])}'
-                        )
-
-                    else:
-                        pass
-            else:
-                pass
+        # See seek_sd for how this method works.  The approach distance is the stop bar
+        # distance of point i+1 to the leg of i+1 of the intersection at i; it can only
+        # fall between distance(i+1) and distance(i) where the distance is not growing, so
+        # it is measured for those rows only.
+
+        spd = gpx_df["spd"].to_numpy(dtype=np.float64)
+        distance = gpx_df["distance"].to_numpy(dtype=np.float64)
+        ids = gpx_df["id"].to_numpy()
+        appr_dir = gpx_df["appr_dir"].to_numpy().astype(np.int64)
+
+        i = self._seek_positions(gpx_df)
+        i = i[(spd[i] > 0.2) & (spd[i + 1] > 0.2) & (distance[i + 1] <= distance[i])]
+        rows = self._rows_by_id(ids[i])
+        sd_next = self._sd_table()[rows, appr_dir[i + 1]]
+
+        objects = self._object_arrays()[0]
+        location = gpx_df["location"].to_numpy()
+        approach_distance = np.empty(len(i))
+        for k, (j, r) in enumerate(zip(i, rows)):
+            d = objects[r].distance_to_sb(geopy.Point(location[j + 1]), appr_dir[j + 1])
+            approach_distance[k] = sd_next[k] + 50 if d is None else d
+
+        window = (distance[i + 1] <= approach_distance) & (approach_distance <= distance[i])
+        i = i[window]
+        # calculate exact time based on speed, using i and i+1: the time adjustment is
+        # weighted by the speeds at the two points to shift the event to the stop bar
+        t_adjust = self.t_spd_adjust(distance[i], spd[i], distance[i + 1], spd[i + 1])
+        close = t_adjust <= 1
+
+        df = self._approach_frame(gpx_df, i[close], t_adjust[close])
         if csv_out:
-            pd.DataFrame(df_dict_sb).to_csv(
-                self.out_file_path / "approaching_intersections_Stopbar.csv")
-        return pd.DataFrame(df_dict_sb)
+            df.to_csv(self.out_file_path / "approaching_intersections_Stopbar.csv")
+        return df
 
     def get_info_at_timestamp(self, timestamp):
         """Return data for the GPX row closest to ``timestamp``.
@@ -0,0 +1,237 @@
+# !/usr/bin/env python
+# coding: utf-8
+"""Fleet mode: many vehicles' GPX tracks against one static object inventory.
+
+The inventory is read and its ``StaticObjectIndex`` built once in the calling process.
+Each worker process receives them once, through the pool initializer, and runs the
+usual ``ProcessRoadObjects`` pipeline for every (vehicle, GPX) pair it is handed.  The
+events of all vehicles come back as one table tagged with the vehicle and its GPX file,
+along with per-vehicle throughput.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+
+import click
+import numpy as np
+import pandas as pd
+
+from ssoss.crossing_detector import EVENT_DTYPE, cluster_events
+from ssoss.distance import get_backend, set_backend, use_backend
+from ssoss.gpx_reader import gpx_stem
+from ssoss.index_file import IndexFile, is_index_file
+from ssoss.ingest import read_static_objects
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.registry import IntersectionRegistry, StaticObjectRegistry
+from ssoss.spatial_index import StaticObjectIndex
+from ssoss.tiles import TiledInventory, is_tiled_inventory
+from ssoss.track_cache import file_digest
+
+# ProcessRoadObjects options forwarded to every vehicle
+FLEET_OPTIONS = ("use_pickle", "event_engine", "projected", "distance_cache_size")
+
+METRIC_COLUMNS = ("vehicle", "gpx", "points", "events", "track_seconds", "seconds", "points_per_second")
+
+# registry and options of a worker process, set once by _init_worker
+_worker_state: Dict[str, object] = {}
+
+
+@dataclass
+class FleetResult:
+    """Combined outcome of ``process_fleet``.
+
+    ``events`` has one row per sight-distance event with ``vehicle`` and ``gpx`` followed
+    by the ``EVENT_DTYPE`` columns and the event ``description`` used by the single track
+    checks; rows are in vehicle order, then by time.  ``metrics`` has one row per vehicle
+    (``METRIC_COLUMNS``): ``seconds`` is the wall time spent on it in its worker.
+    """
+
+    kind: str
+    events: pd.DataFrame
+    metrics: pd.DataFrame
+    seconds: float  # wall time of the whole run
+    workers: int
+
+    @property
+    def points_per_second(self) -> float:
+        return float(self.metrics["points"].sum()) / self.seconds if self.seconds > 0 else 0.0
+
+    def report(self) -> str:
+        """ one line per vehicle and a fleet total """
+        lines = [f"{m.vehicle}: {m.points} points, {m.events} events in {m.seconds:.2f}s "
+                 f"({m.points_per_second:,.0f} points/s)" for m in self.metrics.itertuples()]
+        lines.append(f"fleet: {len(self.metrics)} tracks, {len(self.events)} {self.kind} events in "
+                     f"{self.seconds:.2f}s with {self.workers} worker(s) ({self.points_per_second:,.0f} points/s)")
+        return "\n".join(lines)
+
+
+def _vehicle_pairs(vehicles):
+    if isinstance(vehicles, dict):
+        vehicles = vehicles.items()
+    # ProcessRoadObjects resolves the GPX file against its own directory
+    return [(vehicle, Path(gpx).absolute()) for vehicle, gpx in vehicles]
+
+
+def _read_inventory(path: Path, layer=None) -> StaticObjectRegistry:
+    result = read_static_objects(path, layer=layer)
+    if result.errors:
+        print(f"Check {result.kind} input file formatting.\n{result.report()}")
+    registry = result.registry
+    registry.source_digest = file_digest(path)
+    return registry
+
+
+def load_fleet_inventory(static_objects, layer=None) -> StaticObjectRegistry:
+    """ registry of an inventory (any file ProcessRoadObjects reads) with its spatial index built
+
+    A registry is returned as is, with its index built if it has none yet.  A tiled
+    inventory is read whole.
+    """
+    if isinstance(static_objects, StaticObjectRegistry):
+        registry = static_objects
+    elif is_index_file(static_objects):
+        index_file = IndexFile(static_objects)
+        if index_file.is_stale():
+            print(f"{index_file.path} is older than {index_file.source_path}, reading that instead. "
+                  f"Rebuild with: ssoss index build {index_file.source_path}")
+            registry = _read_inventory(index_file.source_path)
+        else:
+            registry = index_file.registry()
+            registry.source_digest = index_file.source_digest
+    elif is_tiled_inventory(static_objects):
+        inventory = TiledInventory(static_objects)
+        registry = inventory.read().registry
+        registry.source_digest = inventory.digest(sorted(inventory.tiles))
+    else:
+        registry = _read_inventory(Path(static_objects), layer)
+    if registry.spatial_index is None:
+        registry.spatial_index = StaticObjectIndex(registry.lat, registry.lon, registry.search_radius_ft(),
+                                                   objects=registry, ids=registry.ids)
+    return registry
+
+
+def _process_vehicle(vehicle, gpx_file: Path, registry, options: dict):
+    """ events, event descriptions and metrics of one vehicle's track """
+    start = time.perf_counter()
+    pro = ProcessRoadObjects(gpx_filestring=str(gpx_file), static_objects=registry, **options)
+    if isinstance(registry, IntersectionRegistry):
+        events = pro.detect_events("intersection")
+        events = events[np.argsort(events["time"], kind="stable")]
+        descriptions = [pro.intersection_frame_description(int(e["id"]), int(e["leg"]), float(e["distance"]),
+                                                           float(e["time"])) for e in events]
+    else:
+        events = cluster_events(pro.detect_events("generic_so"), pro.GENERIC_SO_TIME_BUFFER)
+        descriptions = pro.include_timestamp_to_description(
+            [registry.get(int(e["id"])).print_detail_info() for e in events],
+            [float(t) for t in events["time"]])
+    seconds = time.perf_counter() - start
+    points = len(pro.track)
+    metrics = {
+        "vehicle": vehicle,
+        "gpx": str(gpx_file),
+        "points": points,
+        "events": len(events),
+        "track_seconds": pro.sum_time_gap,
+        "seconds": seconds,
+        "points_per_second": points / seconds if seconds > 0 else 0.0,
+    }
+    return events, descriptions, metrics
+
+
+def _init_worker(backend, registry, options) -> None:
+    set_backend(backend)
+    _worker_state["registry"] = registry
+    _worker_state["options"] = options
+
+
+def _vehicle_job(job):
+    vehicle, gpx_file = job
+    return _process_vehicle(vehicle, gpx_file, _worker_state["registry"], _worker_state["options"])
+
+
+def process_fleet(vehicles, static_objects, workers: int = 1, static_object_layer=None,
+                  **options) -> FleetResult:
+    """ run the sight-distance checks for many vehicles against one inventory
+
+    :param vehicles: (vehicle id, GPX file) pairs, or a dict of them; a vehicle may appear
+        with several GPX files
+    :param static_objects: inventory file, index file or tiled inventory directory as for
+        ProcessRoadObjects, or an already loaded registry
+    :param workers: processes the vehicles are spread over (1 runs them in turn)
+    :param static_object_layer: layer of a multi-layer inventory such as a GeoPackage
+    :param options: ProcessRoadObjects options for every vehicle (``FLEET_OPTIONS``) and
+        ``distance_backend``, selected for this run only (the current setting when None)
+    :return: FleetResult with the vehicle-tagged events and per-vehicle metrics
+    """
+    unknown = set(options) - set(FLEET_OPTIONS) - {"distance_backend"}
+    if unknown:
+        raise TypeError(f"unknown fleet options: {', '.join(sorted(unknown))}")
+    distance_backend = options.pop("distance_backend", None)
+    if distance_backend is None:
+        distance_backend = get_backend()
+
+    start = time.perf_counter()
+    pairs = _vehicle_pairs(vehicles)
+    with use_backend(distance_backend):
+        registry = load_fleet_inventory(static_objects, layer=static_object_layer)
+        workers = max(1, min(int(workers), len(pairs)))
+        if workers == 1:
+            results = [_process_vehicle(vehicle, gpx_file, registry, options) for vehicle, gpx_file in pairs]
+        else:
+            # the registry and its index are sent to each worker once, not with every vehicle
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(distance_backend, registry, options)) as pool:
+                results = list(pool.map(_vehicle_job, pairs))
+
+    frames = []
+    for (vehicle, gpx_file), (events, descriptions, _) in zip(pairs, results):
+        frame = pd.DataFrame(events)
+        frame.insert(0, "vehicle", [vehicle] * len(events))
+        frame.insert(1, "gpx", str(gpx_file))
+        frame["description"] = descriptions
+        frames.append(frame)
+    if not frames:
+        frame = pd.DataFrame(np.zeros(0, dtype=EVENT_DTYPE))
+        frame.insert(0, "vehicle", pd.Series(dtype=object))
+        frame.insert(1, "gpx", pd.Series(dtype=object))
+        frame["description"] = pd.Series(dtype=object)
+        frames.append(frame)
+    events = pd.concat(frames, ignore_index=True)
+    metrics = pd.DataFrame([m for _, _, m in results], columns=list(METRIC_COLUMNS))
+    kind = "intersection" if isinstance(registry, IntersectionRegistry) else "generic_so"
+    return FleetResult(kind, events, metrics, time.perf_counter() - start, workers)
+
+
+def _parse_vehicle(value: str):
+    vehicle, sep, gpx = value.partition("=")
+    if not sep:
+        return gpx_stem(value), Path(value)
+    return vehicle, Path(gpx)
+
+
+@click.command("fleet")
+@click.argument("inventory", type=click.Path(exists=True))
+@click.argument("tracks", nargs=-1, required=True)
+@click.option("-w", "--workers", type=click.IntRange(1), default=1, show_default=True,
+              help="Processes the vehicles are spread over")
+@click.option("-o", "--output", type=click.Path(dir_okay=False), default="fleet_events.csv", show_default=True,
+              help="CSV file for the combined events")
+@click.option("--metrics", "metrics_file", type=click.Path(dir_okay=False),
+              help="CSV file for the per-vehicle throughput metrics")
+@click.option("--layer", help="Layer of a multi-layer inventory such as a GeoPackage")
+def fleet(inventory, tracks, workers, output, metrics_file, layer):
+    """Check many vehicles' tracks against one inventory.
+
+    TRACKS are GPX files, each optionally prefixed with its vehicle id as VEHICLE=FILE
+    (the file name is the vehicle id otherwise).
+    """
+    result = process_fleet([_parse_vehicle(t) for t in tracks], inventory, workers=workers,
+                           static_object_layer=layer)
+    result.events.to_csv(output, index=False)
+    if metrics_file:
+        result.metrics.to_csv(metrics_file, index=False)
+    click.echo(result.report())
+    click.echo(f"Wrote {len(result.events)} events to {output}")
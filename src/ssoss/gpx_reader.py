@@ -0,0 +1,197 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+import gzip
+from array import array
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from lxml import etree
+
+GPX_10_NS = "http://www.topografix.com/GPX/1/0"
+GPX_11_NS = "http://www.topografix.com/GPX/1/1"
+
+
+@dataclass
+class GPXColumns:
+    """Columnar contents of a GPX track.
+
+    All columns are NumPy arrays of equal length, one entry per ``trkpt``.
+    ``time`` is seconds since January 1st 1970 (UTC) and ``speed`` is meters/sec
+    as recorded in the file (``NaN`` where the file has no speed element).
+    ``timezone`` is the IANA name of the track's local time, UTC until it is looked up.
+    """
+
+    time: np.ndarray
+    lat: np.ndarray
+    lon: np.ndarray
+    speed: np.ndarray
+    ele: np.ndarray
+    extensions: Dict[str, np.ndarray] = field(default_factory=dict)
+    version: str = "1.0"
+    naive_time: bool = False
+    timezone: str = "UTC"
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def localize(self, tzinfo) -> None:
+        """ reinterpret timestamps without a UTC offset as wall clock time in ``tzinfo``
+
+        GPX times should be UTC, but some loggers write local time without an offset.
+        Those points are parsed as UTC and shifted here once the timezone is known.
+        """
+        if not self.naive_time or len(self.time) == 0:
+            return
+        first = datetime.fromtimestamp(self.time[0], tz=timezone.utc).replace(tzinfo=tzinfo)
+        last = datetime.fromtimestamp(self.time[-1], tz=timezone.utc).replace(tzinfo=tzinfo)
+        if first.utcoffset() == last.utcoffset():
+            self.time = self.time - first.utcoffset().total_seconds()
+        else:  # track crosses a daylight saving change
+            self.time = np.array([
+                t - datetime.fromtimestamp(t, tz=timezone.utc).replace(tzinfo=tzinfo).utcoffset().total_seconds()
+                for t in self.time
+            ])
+        self.naive_time = False
+
+
+def gpx_stem(gpx_filestring: str) -> str:
+    """ filename of a GPX file without the .gpx or .gpx.gz suffix
+    """
+    name = Path(gpx_filestring).name
+    for suffix in (".gpx.gz", ".gpx", ".gz"):
+        if name.lower().endswith(suffix):
+            return name[:-len(suffix)]
+    return Path(name).stem
+
+
+def _open(gpx_path):
+    """ open plain or gzip compressed GPX file as a binary stream
+    """
+    f = open(gpx_path, "rb")
+    if f.read(2) == b"\x1f\x8b":
+        f.close()
+        return gzip.open(gpx_path, "rb")
+    f.seek(0)
+    return f
+
+
+def _localname(tag) -> str:
+    return etree.QName(tag).localname
+
+
+def parse_iso_timestamp(text: str):
+    """ parse ISO 8601 GPX time to (epoch seconds, had_offset)
+    """
+    text = text.strip()
+    if text.endswith(("Z", "z")):
+        text = text[:-1] + "+00:00"
+    dt = datetime.fromisoformat(text)
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc).timestamp(), False
+    return dt.timestamp(), True
+
+
+def sniff_gpx_version(gpx_path) -> str:
+    """ read only the root element of a GPX file to determine the version (1.0 or 1.1)
+    """
+    with _open(gpx_path) as f:
+        for _, elem in etree.iterparse(f, events=("start",)):
+            if etree.QName(elem).namespace == GPX_11_NS:
+                return "1.1"
+            return "1.0"
+    return "1.0"
+
+
+def _discard(elem) -> None:
+    # free a finished element and any already processed siblings
+    elem.clear()
+    while elem.getprevious() is not None:
+        del elem.getparent()[0]
+
+
+def read_gpx(gpx_path) -> GPXColumns:
+    """ Stream a GPX 1.0/1.1 file (optionally .gz compressed) into NumPy columns.
+
+    The file is read with ``iterparse`` and every element is discarded once it ends (a
+    ``trkpt`` as soon as its values are copied), so parsing never holds the document tree
+    in memory, whatever waypoints, routes or metadata the file also has.
+    Extension values (e.g. Garmin TrackPointExtension) are returned by local tag name,
+    padded with ``NaN`` for points that do not have them.
+
+    :param gpx_path: path to .gpx or .gpx.gz file
+    :return: GPXColumns with time, lat, lon, speed, elevation and extension columns
+    """
+    t_col, lat_col, lon_col = array("d"), array("d"), array("d")
+    spd_col, ele_col = array("d"), array("d")
+    ext_cols = {}
+    version = "1.0"
+    naive_time = False
+    nan = float("nan")
+    n = 0
+    in_point = False
+
+    with _open(gpx_path) as f:
+        context = etree.iterparse(f, events=("start", "end"))
+        for event, elem in context:
+            name = _localname(elem.tag)
+            if event == "start":
+                if n == 0 and name == "gpx":
+                    version = "1.1" if etree.QName(elem).namespace == GPX_11_NS else "1.0"
+                in_point = in_point or name == "trkpt"
+                continue
+            if name != "trkpt":
+                # a point's children are read when the point ends
+                if not in_point:
+                    _discard(elem)
+                continue
+            in_point = False
+
+            lat_col.append(float(elem.get("lat")))
+            lon_col.append(float(elem.get("lon")))
+            t, spd, ele = nan, nan, nan
+            for child in elem:
+                name = _localname(child.tag)
+                if name == "time" and child.text:
+                    t, has_offset = parse_iso_timestamp(child.text)
+                    naive_time = naive_time or not has_offset
+                elif name == "speed" and child.text and version == "1.0":
+                    spd = float(child.text)
+                elif name == "ele" and child.text:
+                    ele = float(child.text)
+                elif name == "extensions":
+                    for ext in child.iter():
+                        if len(ext) or not isinstance(ext.tag, str) or not ext.text:
+                            continue
+                        try:
+                            value = float(ext.text)
+                        except ValueError:
+                            continue
+                        key = _localname(ext.tag)
+                        if key not in ext_cols:
+                            ext_cols[key] = array("d", [nan]) * n
+                        col = ext_cols[key]
+                        col.extend([nan] * (n - len(col)))
+                        col.append(value)
+            t_col.append(t)
+            spd_col.append(spd)
+            ele_col.append(ele)
+            n += 1
+            _discard(elem)
+
+    for col in ext_cols.values():
+        col.extend([nan] * (n - len(col)))
+
+    return GPXColumns(
+        time=np.frombuffer(t_col, dtype=np.float64),
+        lat=np.frombuffer(lat_col, dtype=np.float64),
+        lon=np.frombuffer(lon_col, dtype=np.float64),
+        speed=np.frombuffer(spd_col, dtype=np.float64),
+        ele=np.frombuffer(ele_col, dtype=np.float64),
+        extensions={k: np.frombuffer(v, dtype=np.float64) for k, v in ext_cols.items()},
+        version=version,
+        naive_time=naive_time,
+    )
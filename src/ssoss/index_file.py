@@ -0,0 +1,177 @@
+# !/usr/bin/env python
+# coding: utf-8
+"""Prebuilt static object index files.
+
+An index file holds the columns of an intersection or generic static object registry
+together with its built ``StaticObjectIndex`` (sorted cell keys with start/end offsets),
+so a large inventory is memory-mapped on startup instead of parsed and re-indexed.
+
+Layout: the 8 byte magic, a little-endian uint64 header length, a JSON header, then every
+array as raw bytes at a 64 byte aligned offset listed in the header.  The header also
+records the size, modification time and content hash of the inventory the file was built
+from, so a file older than its source can be detected.
+"""
+
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+import click
+import numpy as np
+
+from ssoss.ingest import IngestResult, read_static_objects
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry
+from ssoss.spatial_index import StaticObjectIndex
+from ssoss.track_cache import file_digest
+
+INDEX_SUFFIX = ".ssidx"
+INDEX_FORMAT_VERSION = 1
+MAGIC = b"SSOSSIDX"
+_ALIGN = 64
+
+INTERSECTION_ARRAYS = ("ids", "name", "lat", "lon", "spd", "bearing", "stop_bar", "sb_available",
+                       "sb_target", "sb_offset_ft")
+GENERIC_ARRAYS = ("ids", "street_name", "lat", "lon", "bearing", "description", "sight_distance_ft")
+
+
+def _source_stamp(source: Path) -> dict:
+    stat = source.stat()
+    return {"path": str(source.resolve()), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns,
+            "digest": file_digest(source)}
+
+
+def write_index_file(source, path=None, kind: Optional[str] = None, layer=None) -> IngestResult:
+    """ read an inventory and write its registry columns and spatial index to ``path``
+
+    :param source: inventory file (CSV, GeoJSON, GeoPackage)
+    :param path: index file to write, the source name with an .ssidx suffix when None
+    :return: ingest result of the source, bad rows are left out of the index
+    """
+    source = Path(source)
+    path = source.with_suffix(INDEX_SUFFIX) if path is None else Path(path)
+    result = read_static_objects(source, kind=kind, layer=layer)
+    registry = result.registry
+    index = StaticObjectIndex(registry.lat, registry.lon, registry.search_radius_ft())
+
+    names = INTERSECTION_ARRAYS if result.kind == "intersection" else GENERIC_ARRAYS
+    arrays = {f"registry.{name}": getattr(registry, name) for name in names}
+    arrays.update({f"index.{name}": getattr(index, name) for name in StaticObjectIndex.ARRAYS})
+    # object (string) columns are stored fixed width so they can be mapped too
+    arrays = {name: np.ascontiguousarray(a.astype(str) if a.dtype == object else a)
+              for name, a in arrays.items()}
+
+    header = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "kind": result.kind,
+        "source": _source_stamp(source),
+        "index": {"cell_lat": index.cell_lat, "cell_lon": index.cell_lon},
+        "arrays": {},
+    }
+    # offsets depend on the header length, so size the header with placeholder offsets first
+    offset = 0
+    for name, a in arrays.items():
+        header["arrays"][name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += -(-a.nbytes // _ALIGN) * _ALIGN
+    data_start = -(-(len(MAGIC) + 8 + len(json.dumps(header)) + 24 * len(arrays)) // _ALIGN) * _ALIGN
+    for entry in header["arrays"].values():
+        entry["offset"] += data_start
+    header_bytes = json.dumps(header).encode()
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+        for name, a in arrays.items():
+            f.seek(header["arrays"][name]["offset"])
+            f.write(a.tobytes())
+        f.truncate(max(f.tell(), data_start))
+    os.replace(tmp, path)
+    return result
+
+
+def is_index_file(path) -> bool:
+    """ True when ``path`` starts with the index file magic """
+    path = Path(path)
+    if not path.is_file():
+        return False
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class IndexFile:
+    """Memory-mapped reader for a file written by ``write_index_file``."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{self.path} is not a static object index file")
+            (length,) = struct.unpack("<Q", f.read(8))
+            header = json.loads(f.read(length))
+        if header.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{self.path} is not a version {INDEX_FORMAT_VERSION} index file, rebuild it")
+        self.kind = header["kind"]
+        self.source = header["source"]
+        self._index = header["index"]
+        self._arrays = header["arrays"]
+
+    @property
+    def source_path(self) -> Path:
+        return Path(self.source["path"])
+
+    @property
+    def source_digest(self) -> str:
+        return self.source["digest"]
+
+    def is_stale(self) -> bool:
+        """ True when the source inventory changed since the index was built; a missing
+        source cannot be checked and counts as current
+        """
+        source = self.source_path
+        if not source.is_file():
+            return False
+        stat = source.stat()
+        if stat.st_size == self.source["size"] and stat.st_mtime_ns == self.source["mtime_ns"]:
+            return False
+        return file_digest(source) != self.source_digest
+
+    def array(self, name: str) -> np.ndarray:
+        """ read-only memory map of a stored array """
+        entry = self._arrays[name]
+        shape = tuple(entry["shape"])
+        if int(np.prod(shape)) == 0:
+            return np.zeros(shape, dtype=entry["dtype"])
+        return np.memmap(self.path, dtype=entry["dtype"], mode="r", offset=entry["offset"], shape=shape)
+
+    def registry(self):
+        """ registry over the mapped columns with its prebuilt spatial index attached """
+        if self.kind == "intersection":
+            registry = IntersectionRegistry(**{name: self.array(f"registry.{name}")
+                                               for name in INTERSECTION_ARRAYS})
+        else:
+            registry = GenericObjectRegistry(**{name: self.array(f"registry.{name}")
+                                                for name in GENERIC_ARRAYS})
+        arrays = {name: self.array(f"index.{name}") for name in StaticObjectIndex.ARRAYS}
+        registry.spatial_index = StaticObjectIndex.from_arrays(
+            arrays, self._index["cell_lat"], self._index["cell_lon"], objects=registry, ids=registry.ids)
+        return registry
+
+
+@click.group("index")
+def index():
+    """Prebuilt static object index files."""
+
+
+@index.command("build")
+@click.argument("inventory", type=click.Path(exists=True, dir_okay=False))
+@click.option("-o", "--output", type=click.Path(dir_okay=False),
+              help=f"Index file to write (default: inventory name with {INDEX_SUFFIX})")
+@click.option("--layer", help="Layer of a multi-layer inventory such as a GeoPackage")
+def build_index(inventory, output, layer):
+    """Write a memory-mappable index file for a static object inventory."""
+    output = Path(output) if output else Path(inventory).with_suffix(INDEX_SUFFIX)
+    result = write_index_file(inventory, output, layer=layer)
+    if result.errors:
+        click.echo(result.report(), err=True)
+    click.echo(f"Indexed {len(result.registry)} {result.kind} objects in {output}")
@@ -0,0 +1,331 @@
+# !/usr/bin/env python
+# coding: utf-8
+"""Bulk loading of static object inventories.
+
+CSV files are read in one pass (with the pyarrow engine when it is installed) and are
+positional, as documented in the README:
+
+* generic objects, 7 columns: ``id, street name, lat, lon, bearing, description, distance``
+* intersections, 13 columns: ``id, name1, name2, lat, lon, 4 speeds, 4 bearings``, plus
+  16 optional stop bar columns (29 total): ``lat1, lon1, lat2, lon2`` for NB, EB, SB, WB
+
+GeoJSON, GeoPackage and other layers readable by geopandas take the location from
+point geometries and the other values from attributes named as in ``GENERIC_COLUMNS`` /
+``INTERSECTION_COLUMNS`` (case-insensitive).  A layer with ``name1``/``name2`` attributes
+is an intersection inventory.
+
+Every row is validated with column-wise checks and all bad rows, including CSV rows
+with more fields than the header, are reported together; the registry is built from
+the rows that pass.
+"""
+
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from ssoss.registry import COMPASS_BEARING, GenericObjectRegistry, IntersectionRegistry
+
+try:
+    import pyarrow  # noqa: F401
+    _CSV_ENGINE = "pyarrow"
+except ImportError:
+    _CSV_ENGINE = "c"
+
+LEGS = ("nb", "eb", "sb", "wb")
+GENERIC_COLUMNS = ("id", "street_name", "lat", "lon", "bearing", "description", "distance_ft")
+STOP_BAR_COLUMNS = tuple(f"sb_{leg}_{c}" for leg in LEGS for c in ("lat1", "lon1", "lat2", "lon2"))
+INTERSECTION_COLUMNS = (("id", "name1", "name2", "lat", "lon")
+                        + tuple(f"spd_{leg}" for leg in LEGS)
+                        + tuple(f"bearing_{leg}" for leg in LEGS)
+                        + STOP_BAR_COLUMNS)
+_INTERSECTION_BASE = len(INTERSECTION_COLUMNS) - len(STOP_BAR_COLUMNS)
+
+KINDS = ("intersection", "generic_so")
+GEO_SUFFIXES = (".geojson", ".json", ".gpkg", ".shp", ".fgb")
+
+
+@dataclass
+class IngestResult:
+    """Registry built from the valid rows plus every problem found in the others."""
+
+    kind: str
+    registry: Union[IntersectionRegistry, GenericObjectRegistry]
+    rows_read: int
+    # (row, message): CSV line number (header is line 1) or 1-based feature number
+    errors: List[Tuple[int, str]] = field(default_factory=list)
+
+    @property
+    def bad_rows(self) -> List[int]:
+        return sorted({row for row, _ in self.errors})
+
+    def report(self, limit: int = 20) -> str:
+        """ one line per problem, at most ``limit`` lines """
+        if not self.errors:
+            return f"{self.rows_read} rows read, no problems"
+        lines = [f"{len(self.bad_rows)} of {self.rows_read} rows skipped:"]
+        lines += [f"  row {row}: {message}" for row, message in self.errors[:limit]]
+        if len(self.errors) > limit:
+            lines.append(f"  ... {len(self.errors) - limit} more")
+        return "\n".join(lines)
+
+
+class IngestError(ValueError):
+    """Raised by ``read_static_objects(strict=True)`` with the full list of problems."""
+
+    def __init__(self, result: IngestResult):
+        self.result = result
+        super().__init__(result.report(limit=len(result.errors)))
+
+
+def read_static_objects(path, kind: Optional[str] = None, layer=None,
+                        strict: bool = False) -> IngestResult:
+    """ read a static object inventory from CSV or a geospatial layer
+
+    :param path: file to read, or a list of CSV files of one kind read as a single table
+        (rows are then numbered as if the files shared one header)
+    :param kind: "intersection" or "generic_so", detected from the columns when None
+    :param layer: layer name or index for multi-layer sources such as GeoPackage
+    :param strict: raise IngestError instead of skipping bad rows
+    """
+    if kind is not None and kind not in KINDS:
+        raise ValueError(f"kind must be one of {KINDS}")
+    if isinstance(path, (list, tuple)):
+        table, row_numbers, geometry_errors = _read_csvs([Path(p) for p in path], kind)
+    elif Path(path).suffix.lower() in GEO_SUFFIXES:
+        table, row_numbers, geometry_errors = _read_layer(Path(path), layer, kind)
+    else:
+        table, row_numbers, geometry_errors = _read_csv(Path(path), kind)
+    kind = kind or table.attrs["kind"]
+
+    line_errors = table.attrs.get("line_errors", [])
+    errors = list(geometry_errors) + line_errors
+    if kind == "intersection":
+        registry, more = _intersections(table, row_numbers, geometry_errors)
+    else:
+        registry, more = _generic(table, row_numbers, geometry_errors)
+    errors += more
+    errors.sort(key=lambda e: e[0])
+
+    result = IngestResult(kind, registry, len(table) + len(line_errors), errors)
+    if strict and errors:
+        raise IngestError(result)
+    return result
+
+
+_BAD_LINE = "\0bad line"
+
+
+def _read_raw_csv(path: Path):
+    """ string table of a CSV file and the (line, message) of each row with more fields
+    than the header, which is left out of the table
+    """
+    try:
+        raw = pd.read_csv(path, dtype=str, keep_default_na=False, engine=_CSV_ENGINE)
+        return raw, np.arange(len(raw)) + 2, []
+    except pd.errors.ParserError:
+        pass
+    # the python engine hands each ragged row to a callable; it is kept as a marker row
+    # so its line number follows from its position
+    n_fields = []
+
+    def bad_line(fields):
+        n_fields.append(len(fields))
+        return [_BAD_LINE] + [""] * (n_header - 1)
+
+    n_header = len(pd.read_csv(path, dtype=str, nrows=0).columns)
+    raw = pd.read_csv(path, dtype=str, keep_default_na=False, engine="python", on_bad_lines=bad_line)
+    marked = (raw.iloc[:, 0] == _BAD_LINE).to_numpy()
+    # header is line 1
+    lines = np.arange(len(raw)) + 2
+    errors = [(int(line), f"{n} fields, expected {n_header}") for line, n in zip(lines[marked], n_fields)]
+    return raw[~marked].reset_index(drop=True), lines[~marked], errors
+
+
+def _read_csv(path: Path, kind: Optional[str]):
+    raw, row_numbers, line_errors = _read_raw_csv(path)
+    n_columns = raw.shape[1]
+    if kind is None:
+        if n_columns == len(GENERIC_COLUMNS):
+            kind = "generic_so"
+        elif n_columns in (_INTERSECTION_BASE, len(INTERSECTION_COLUMNS)):
+            kind = "intersection"
+        else:
+            raise ValueError("generic static object .csv file must have 7, 13 or 29 columns. Check documentation.")
+    names = GENERIC_COLUMNS if kind == "generic_so" else INTERSECTION_COLUMNS
+    if n_columns > len(names):
+        raise ValueError(f"{kind} .csv file has {n_columns} columns, expected at most {len(names)}")
+    table = raw.fillna("").astype(str)
+    table.columns = names[:n_columns]
+    table.attrs["kind"] = kind
+    table.attrs["line_errors"] = line_errors
+    return table, row_numbers, []
+
+
+def _read_csvs(paths: List[Path], kind: Optional[str]):
+    if not paths:
+        if kind is None:
+            raise ValueError("kind is needed to read an empty list of files")
+        names = GENERIC_COLUMNS if kind == "generic_so" else INTERSECTION_COLUMNS
+        table = pd.DataFrame({c: pd.Series(dtype=str) for c in names})
+        table.attrs["kind"] = kind
+        return table, np.zeros(0, dtype=np.int64), []
+    tables = [_read_csv(p, kind)[0] for p in paths]
+    kinds = {t.attrs["kind"] for t in tables}
+    if len(kinds) > 1:
+        raise ValueError("static object files mix intersections and generic static objects")
+    line_errors = [(line, f"{p.name}: {message}") for p, t in zip(paths, tables)
+                   for line, message in t.attrs["line_errors"]]
+    table = pd.concat(tables, ignore_index=True).fillna("")
+    table.attrs["kind"] = kinds.pop()
+    table.attrs["line_errors"] = line_errors
+    return table, np.arange(len(table)) + 2, []
+
+
+def _read_layer(path: Path, layer, kind: Optional[str]):
+    import geopandas as gpd
+
+    gdf = gpd.read_file(path, layer=layer)
+    if gdf.crs is not None and gdf.crs.to_epsg() != 4326:
+        gdf = gdf.to_crs(4326)
+    row_numbers = np.arange(len(gdf)) + 1
+
+    is_point = np.asarray(gdf.geometry.geom_type == "Point") & ~np.asarray(gdf.geometry.is_empty)
+    geometry_errors = [(int(r), "geometry is not a point") for r in row_numbers[~is_point]]
+    lat = np.full(len(gdf), np.nan)
+    lon = np.full(len(gdf), np.nan)
+    lat[is_point] = gdf.geometry[is_point].y
+    lon[is_point] = gdf.geometry[is_point].x
+
+    attributes = pd.DataFrame(gdf.drop(columns=gdf.geometry.name))
+    attributes.columns = [str(c).lower() for c in attributes.columns]
+    if kind is None:
+        kind = "intersection" if {"name1", "name2"} <= set(attributes.columns) else "generic_so"
+    names = GENERIC_COLUMNS if kind == "generic_so" else INTERSECTION_COLUMNS
+    required = [c for c in names if c not in ("lat", "lon") and c not in STOP_BAR_COLUMNS]
+    missing = [c for c in required if c not in attributes.columns]
+    if missing:
+        raise ValueError(f"{kind} layer is missing attributes: {', '.join(missing)}")
+
+    table = pd.DataFrame({c: attributes[c] if c in attributes.columns else "" for c in names
+                          if c not in ("lat", "lon")}, index=attributes.index)
+    table = table.astype(object).where(table.notna(), "").astype(str)
+    table["lat"] = lat.astype(str)
+    table["lon"] = lon.astype(str)
+    table = table[[c for c in names if c in table.columns]].reset_index(drop=True)
+    table.attrs["kind"] = kind
+    return table, row_numbers, geometry_errors
+
+
+def _parse_float(value: str) -> float:
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def _to_float(column: pd.Series) -> np.ndarray:
+    """ float values of a string column, NaN where one does not parse
+
+    Every value is parsed on its own like float(), so coordinates match the CSV loader
+    bit for bit and a value's result does not depend on the other rows.  NumPy's string
+    cast applies the same rules and does the whole column at once when every value parses.
+    """
+    strings = column.to_numpy(dtype=str)
+    try:
+        return strings.astype(np.float64)
+    except ValueError:
+        return np.vectorize(_parse_float, otypes=[np.float64])(strings)
+
+
+def _numbers(table, columns, row_numbers, errors, integer=False) -> np.ndarray:
+    """ numeric values of ``columns`` (n, k), NaN where a value does not parse or is not finite """
+    values = (np.column_stack([_to_float(table[c]) for c in columns])
+              if len(columns) else np.zeros((len(table), 0)))
+    bad = np.isnan(values)
+    if integer:
+        bad |= ~bad & (np.mod(np.nan_to_num(values), 1) != 0)
+    for r, k in zip(*np.nonzero(bad)):
+        errors.append((int(row_numbers[r]), f"{columns[k]}: {table[columns[k]].iat[r]!r} is not a"
+                                           f"{'n integer' if integer else ' number'}"))
+    infinite = np.isinf(values)
+    for r, k in zip(*np.nonzero(infinite)):
+        errors.append((int(row_numbers[r]), f"{columns[k]}: {table[columns[k]].iat[r]!r} is not finite"))
+    values[bad | infinite] = np.nan
+    return values
+
+
+def _check_location(lat, lon, row_numbers, errors) -> None:
+    bad = ~np.isnan(lat) & ~np.isnan(lon) & ((np.abs(lat) > 90) | (np.abs(lon) > 180))
+    errors += [(int(r), "lat/lon out of range") for r in row_numbers[bad]]
+
+
+def _check_ids(ids, ok, row_numbers, errors) -> None:
+    """ flag later repeats of an id among rows that are otherwise valid """
+    candidates = np.flatnonzero(ok)
+    _, first = np.unique(ids[candidates], return_index=True)
+    repeat = np.setdiff1d(np.arange(len(candidates)), first)
+    errors += [(int(row_numbers[candidates[k]]), f"duplicate id {int(ids[candidates[k]])}") for k in repeat]
+
+
+def _valid_rows(n, row_numbers, errors, skip=()) -> np.ndarray:
+    bad_numbers = {row for row, _ in errors} | set(skip)
+    return ~np.isin(row_numbers, list(bad_numbers)) if bad_numbers else np.ones(n, dtype=bool)
+
+
+def _generic(table, row_numbers, geometry_errors):
+    errors = []
+    ids = _numbers(table, ["id"], row_numbers, errors, integer=True)[:, 0]
+    loc = _numbers(table, ["lat", "lon"], row_numbers,
+                   [] if geometry_errors else errors)
+    _check_location(loc[:, 0], loc[:, 1], row_numbers, errors)
+    sd = _numbers(table, ["distance_ft"], row_numbers, errors)[:, 0]
+
+    raw_bearing = table["bearing"].str.strip()
+    bearing = (raw_bearing.map(COMPASS_BEARING)
+               .fillna(pd.Series(_to_float(raw_bearing), index=raw_bearing.index))
+               .to_numpy(dtype=np.float64))
+    bad = ~np.isfinite(bearing)
+    errors += [(int(r), f"bearing: {v!r} is not NB/EB/SB/WB or a finite number")
+               for r, v in zip(row_numbers[bad], raw_bearing[bad])]
+
+    ok = _valid_rows(len(table), row_numbers, errors + geometry_errors)
+    _check_ids(ids, ok, row_numbers, errors)
+    ok = _valid_rows(len(table), row_numbers, errors + geometry_errors)
+    registry = GenericObjectRegistry(
+        ids[ok].astype(np.int64), table["street_name"].to_numpy()[ok], loc[ok, 0], loc[ok, 1],
+        bearing[ok], table["description"].to_numpy()[ok], sd[ok])
+    return registry, errors
+
+
+def _intersections(table, row_numbers, geometry_errors):
+    errors = []
+    ids = _numbers(table, ["id"], row_numbers, errors, integer=True)[:, 0]
+    loc = _numbers(table, ["lat", "lon"], row_numbers,
+                   [] if geometry_errors else errors)
+    _check_location(loc[:, 0], loc[:, 1], row_numbers, errors)
+    spd = _numbers(table, [f"spd_{leg}" for leg in LEGS], row_numbers, errors, integer=True)
+    bearing = _numbers(table, [f"bearing_{leg}" for leg in LEGS], row_numbers, errors)
+
+    # a leg has a stop bar when all four of its values are filled in, as in the CSV loader
+    m = len(table)
+    stop_bar = np.full((m, 4, 2, 2), np.nan)
+    sb_available = np.zeros((m, 4), dtype=bool)
+    for b, leg in enumerate(LEGS):
+        columns = [c for c in STOP_BAR_COLUMNS[4 * b:4 * b + 4] if c in table.columns]
+        if len(columns) < 4:
+            continue
+        filled = np.all(np.column_stack([table[c].str.strip().to_numpy() != "" for c in columns]), axis=1)
+        stop_bar[filled, b] = _numbers(table[filled], columns, row_numbers[filled], errors).reshape(-1, 2, 2)
+        sb_available[:, b] = filled
+
+    ok = _valid_rows(m, row_numbers, errors + geometry_errors)
+    _check_ids(ids, ok, row_numbers, errors)
+    ok = _valid_rows(m, row_numbers, errors + geometry_errors)
+    names = np.column_stack([table["name1"].to_numpy(), table["name2"].to_numpy()]) if m else np.zeros((0, 2))
+    registry = IntersectionRegistry(
+        ids[ok].astype(np.int64), names[ok], loc[ok, 0], loc[ok, 1], spd[ok].astype(np.int64),
+        bearing[ok], stop_bar=stop_bar[ok], sb_available=sb_available[ok])
+    return registry, errors
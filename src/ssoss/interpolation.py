@@ -60,17 +60,42 @@ def position_at_time(track_df: pd.DataFrame, when: datetime) -> tuple[float, flo
     return pt["lat2"], pt["lon2"]
 
 
+def times_at_distances(cumulative_distance, time, distances) -> np.ndarray:
+    """ first time each along-track distance is reached, linearly interpolated
+
+    :param cumulative_distance: non-decreasing distance along the track per point
+    :param time: time per point (any numeric unit)
+    :param distances: query distances in the same unit as ``cumulative_distance``
+    :return: times, NaN for distances outside the track
+    """
+    cum = np.asarray(cumulative_distance, dtype=np.float64)
+    time = np.asarray(time, dtype=np.float64)
+    distances = np.atleast_1d(np.asarray(distances, dtype=np.float64))
+    out = np.full(len(distances), np.nan)
+    if len(cum) == 0:
+        return out
+
+    inside = (distances >= cum[0]) & (distances <= cum[-1])
+    if len(cum) == 1:
+        out[inside] = time[0]
+        return out
+    d = distances[inside]
+    # first point at or beyond the distance; the previous point is strictly before it
+    idx = np.searchsorted(cum, d, side="left")
+    at_start = idx == 0
+    hi = np.maximum(idx, 1)
+    d0, d1 = cum[hi - 1], cum[hi]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = np.where(d1 > d0, (d - d0) / (d1 - d0), 0.0)
+    t = time[hi - 1] + ratio * (time[hi] - time[hi - 1])
+    out[inside] = np.where(at_start, time[0], t)
+    return out
+
+
 def time_at_distance(track_df: pd.DataFrame, distance_m: float) -> datetime:
     df, t0 = _prep_track(track_df)
     if distance_m < 0 or distance_m > df["distance_m"].iloc[-1]:
         raise ValueError("distance outside track range")
 
-    idx = np.searchsorted(df["distance_m"], distance_m) - 1
-    idx = np.clip(idx, 0, len(df) - 2)
-    d0 = df["distance_m"].iloc[idx]
-    d1 = df["distance_m"].iloc[idx + 1]
-    ratio = (distance_m - d0) / (d1 - d0)
-    t0s = df["time_s"].iloc[idx]
-    t1s = df["time_s"].iloc[idx + 1]
-    t_sec = t0s + ratio * (t1s - t0s)
+    t_sec = times_at_distances(df["distance_m"], df["time_s"], distance_m)[0]
     return t0 + timedelta(seconds=float(t_sec))
@@ -0,0 +1,136 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+import numpy as np
+
+# WGS84 ellipsoid
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_E2 = WGS84_F * (2 - WGS84_F)
+
+M_TO_FT = 3.280839895013123
+MS_TO_FTPS = 2.23694 / 0.681818  # same factors as GPXPoint.MStoFTPS
+
+# speeds above this (meters/sec) are treated as GPS jumps and reported as 0
+MAX_VALID_SPEED_MS = 50.0
+
+
+def segment_distance_m(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """ ellipsoidal distance in meters between arrays of nearby points
+
+    Uses the WGS84 meridional and prime vertical radii of curvature at the mid latitude.
+    For points up to 500 m apart this agrees with the full geodesic to better than 1 mm.
+    """
+    lat1 = np.asarray(lat1, dtype=np.float64)
+    lat2 = np.asarray(lat2, dtype=np.float64)
+    phi = np.radians((lat1 + lat2) / 2)
+    w = 1 - WGS84_E2 * np.sin(phi) ** 2
+    m_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    n_radius = WGS84_A / np.sqrt(w)
+    dlat = np.radians(lat2 - lat1)
+    dlon = np.radians((np.asarray(lon2) - np.asarray(lon1) + 180.0) % 360.0 - 180.0)
+    return np.hypot(m_radius * dlat, n_radius * np.cos(phi) * dlon)
+
+
+def local_offsets_m(lat0, lon0, lat, lon):
+    """ (east, north) meters of points from an origin on a plane tangent at the origin
+
+    Uses the WGS84 radii of curvature at the origin latitude, accurate to well under a
+    meter for offsets of a few hundred meters.
+    """
+    lat0 = np.asarray(lat0, dtype=np.float64)
+    phi = np.radians(lat0)
+    w = 1 - WGS84_E2 * np.sin(phi) ** 2
+    m_radius = WGS84_A * (1 - WGS84_E2) / w ** 1.5
+    n_radius = WGS84_A / np.sqrt(w)
+    dlat = np.radians(np.asarray(lat, dtype=np.float64) - lat0)
+    dlon = np.radians((np.asarray(lon, dtype=np.float64) - np.asarray(lon0) + 180.0) % 360.0 - 180.0)
+    return n_radius * np.cos(phi) * dlon, m_radius * dlat
+
+
+def rhumb_course(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """ vectorized gpxpy.geo.get_course (loxodromic), degrees clockwise from north [0, 360)
+    """
+    d_lon = np.radians(np.asarray(lon2, dtype=np.float64) - np.asarray(lon1, dtype=np.float64))
+    d_lon = np.where(d_lon > np.pi, d_lon - 2 * np.pi, d_lon)
+    d_lon = np.where(d_lon < -np.pi, d_lon + 2 * np.pi, d_lon)
+    phi1 = np.radians(lat1)
+    phi2 = np.radians(lat2)
+    x = np.log(np.tan(np.pi / 4 + 0.5 * phi2) / np.tan(np.pi / 4 + 0.5 * phi1))
+    return (np.degrees(np.arctan2(d_lon, x)) + 360.0) % 360.0
+
+
+def bearing_diff(n, m) -> np.ndarray:
+    """ vectorized GPXPoint.calc_bearing_diff, smallest angle between two headings (degrees)
+    """
+    n = np.asarray(n, dtype=np.float64)
+    m = np.asarray(m, dtype=np.float64)
+    return np.minimum(np.abs(n - m), np.minimum(np.abs(360 - n + m), np.abs(360 - m + n)))
+
+
+def classify_approach_leg(heading, leg_bearings):
+    """ approach leg of each candidate, the leg whose bearing is closest to the heading
+
+    Vectorized GPXPoint.get_approach_leg: ties go to the first leg, as with np.argmin.
+
+    :param heading: track heading per candidate (n,) or a single heading (degrees)
+    :param leg_bearings: leg bearings per candidate (n, k), usually k = 4 for NB/EB/SB/WB,
+        or (k,) shared by all candidates
+    :return: (leg index, angular error in degrees to that leg's bearing)
+    """
+    diffs = bearing_diff(np.asarray(heading, dtype=np.float64)[..., None], leg_bearings)
+    leg = np.argmin(diffs, axis=-1)
+    error = np.take_along_axis(diffs, leg[..., None], axis=-1)[..., 0]
+    return leg, error
+
+
+def heading_within(heading, bearing, buffer_angle: float) -> np.ndarray:
+    """ True where the heading is less than ``buffer_angle`` degrees from the bearing,
+    the generic static object bearing filter (single-leg classify_approach_leg)
+    """
+    _, error = classify_approach_leg(heading, np.asarray(bearing, dtype=np.float64)[..., None])
+    return error < buffer_angle
+
+
+def derive_speed(time, lat, lon) -> np.ndarray:
+    """ speed (meters/sec) of each point from the previous point, 0 for the first point
+
+    Matches ProcessRoadObjects.speed_calc: non-positive time steps and speeds at or above
+    MAX_VALID_SPEED_MS give 0.
+    """
+    time = np.asarray(time, dtype=np.float64)
+    speed = np.zeros(len(time), dtype=np.float64)
+    if len(time) < 2:
+        return speed
+    dist = segment_distance_m(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    dt = np.diff(time)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        seg_speed = np.where(dt > 0, dist / dt, 0.0)
+    seg_speed[seg_speed >= MAX_VALID_SPEED_MS] = 0.0
+    speed[1:] = seg_speed
+    return speed
+
+
+def compute_kinematics(track) -> None:
+    """ fill bearing, cumulative_distance and acceleration columns of a TrackArray in one pass
+
+    bearing: course from previous point (degrees), 0 for the first point
+    cumulative_distance: feet along the track from the first point
+    acceleration: (v[i+1] - v[i]) / dt in ft/sec^2, 0 for the last point or a zero time step
+    """
+    n = len(track)
+    track.bearing = np.zeros(n, dtype=np.float64)
+    track.cumulative_distance = np.zeros(n, dtype=np.float64)
+    track.acceleration = np.zeros(n, dtype=np.float64)
+    if n < 2:
+        return
+
+    lat, lon = track.lat, track.lon
+    track.bearing[1:] = rhumb_course(lat[:-1], lon[:-1], lat[1:], lon[1:])
+    seg_ft = segment_distance_m(lat[:-1], lon[:-1], lat[1:], lon[1:]) * M_TO_FT
+    np.cumsum(seg_ft, out=track.cumulative_distance[1:])
+
+    spd_ftps = track.speed * MS_TO_FTPS
+    dt = np.diff(track.time)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        track.acceleration[:-1] = np.where(dt != 0, np.diff(spd_ftps) / dt, 0.0)
@@ -0,0 +1,170 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from typing import Tuple
+
+import numpy as np
+
+from ssoss.crossing_detector import EVENT_DTYPE
+from ssoss.interpolation import times_at_distances
+from ssoss.kinematics import M_TO_FT, classify_approach_leg, heading_within, local_offsets_m
+from ssoss.registry import as_registry
+from ssoss.spatial_index import StaticObjectIndex
+
+# segments longer than this (feet) are recording gaps and are never projected onto
+MAX_SEGMENT_FT = 1000.0
+
+# one row per pass of the track by a static object
+STATION_DTYPE = np.dtype([
+    ("object", np.int64),       # row of the object in the inventory passed in
+    ("segment", np.int64),      # track segment (point i to i + 1) the object projects onto
+    ("station", np.float64),    # along-track distance of the projection (feet)
+    ("offset", np.float64),     # lateral distance from the track (feet)
+    ("east", np.float64),       # segment unit direction, east component
+    ("north", np.float64),      # segment unit direction, north component
+])
+
+
+def project_onto_track(track, lat, lon, max_offset_ft: float) -> np.ndarray:
+    """ along-track station(s) of points projected onto the track polyline
+
+    Every track segment within ``max_offset_ft`` of a point is a candidate; runs of
+    consecutive candidate segments are one pass of the track, and each pass keeps the
+    segment with the smallest lateral offset.  A point passed several times (loops,
+    out-and-back drives) gets one station per pass.
+
+    :param track: TrackArray
+    :param lat: point latitudes (degrees)
+    :param lon: point longitudes (degrees)
+    :param max_offset_ft: largest lateral distance from the track to project
+    :return: station table (``STATION_DTYPE``) ordered by object then station
+    """
+    lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+    lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+    n = len(track)
+    if n < 2 or len(lat) == 0:
+        return np.zeros(0, dtype=STATION_DTYPE)
+
+    seg_ft = np.diff(track.cumulative_distance)
+    usable = np.flatnonzero(seg_ft <= MAX_SEGMENT_FT)
+    if len(usable) == 0:
+        return np.zeros(0, dtype=STATION_DTYPE)
+    mid_lat = (track.lat[usable] + track.lat[usable + 1]) / 2
+    mid_lon = (track.lon[usable] + track.lon[usable + 1]) / 2
+    seg_index = StaticObjectIndex(mid_lat, mid_lon, max_offset_ft + seg_ft[usable] / 2)
+
+    # reverse query: which segments are near each object
+    obj, k = seg_index.query_pairs(lat, lon)
+    seg = usable[k]
+
+    e_seg, n_seg = local_offsets_m(track.lat[seg], track.lon[seg], track.lat[seg + 1], track.lon[seg + 1])
+    e_obj, n_obj = local_offsets_m(track.lat[seg], track.lon[seg], lat[obj], lon[obj])
+    length2 = e_seg ** 2 + n_seg ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        u = np.clip(np.where(length2 > 0, (e_obj * e_seg + n_obj * n_seg) / length2, 0.0), 0.0, 1.0)
+        length = np.sqrt(length2)
+        unit_e = np.where(length > 0, e_seg / length, 0.0)
+        unit_n = np.where(length > 0, n_seg / length, 0.0)
+    offset = np.hypot(e_obj - u * e_seg, n_obj - u * n_seg) * M_TO_FT
+
+    keep = offset <= max_offset_ft
+    obj, seg, u, offset, unit_e, unit_n = obj[keep], seg[keep], u[keep], offset[keep], unit_e[keep], unit_n[keep]
+    if len(obj) == 0:
+        return np.zeros(0, dtype=STATION_DTYPE)
+
+    order = np.lexsort((seg, obj))
+    obj, seg, u, offset, unit_e, unit_n = obj[order], seg[order], u[order], offset[order], unit_e[order], unit_n[order]
+    new_pass = np.ones(len(obj), dtype=bool)
+    new_pass[1:] = (obj[1:] != obj[:-1]) | (seg[1:] - seg[:-1] > 1)
+    pass_id = np.cumsum(new_pass)
+    # closest segment of each pass
+    best = np.lexsort((offset, pass_id))
+    first = np.ones(len(best), dtype=bool)
+    first[1:] = pass_id[best][1:] != pass_id[best][:-1]
+    best = best[first]
+
+    stations = np.zeros(len(best), dtype=STATION_DTYPE)
+    stations["object"] = obj[best]
+    stations["segment"] = seg[best]
+    stations["station"] = track.cumulative_distance[seg[best]] + u[best] * seg_ft[seg[best]]
+    stations["offset"] = offset[best]
+    stations["east"] = unit_e[best]
+    stations["north"] = unit_n[best]
+    return stations[np.lexsort((stations["station"], stations["object"]))]
+
+
+def _events_at_stations(track, stations, ids, legs, target_station, sight_distance) -> np.ndarray:
+    event_station = target_station - sight_distance
+    times = times_at_distances(track.cumulative_distance, track.time, event_station)
+    ok = ~np.isnan(times)
+    point = np.clip(np.searchsorted(track.cumulative_distance, event_station[ok], side="right") - 1,
+                    0, len(track) - 1)
+
+    events = np.zeros(int(ok.sum()), dtype=EVENT_DTYPE)
+    events["point"] = point
+    events["id"] = ids[ok]
+    events["leg"] = legs[ok]
+    events["distance"] = target_station[ok] - track.cumulative_distance[point]
+    events["sight_distance"] = sight_distance[ok]
+    events["time"] = times[ok]
+    events["crossing_time"] = times[ok]
+    events["error"] = stations["offset"][ok]
+    return events[np.argsort(events["time"], kind="stable")]
+
+
+def _segment_bearing(track, stations) -> np.ndarray:
+    # bearing column is the course from the previous point, so segment i ends at i + 1
+    return track.bearing[stations["segment"] + 1]
+
+
+def intersection_events(track, intersections, max_offset_ft: float) -> Tuple[np.ndarray, np.ndarray]:
+    """ intersection sight-distance events by linear referencing
+
+    Each intersection center is projected onto the track; the approach leg is the one
+    whose bearing best matches the track heading at the projection.  When the leg has a
+    stop bar the approach point moves along the track by the stop bar's along-track offset
+    from the center.  The event is where the track is one sight distance before the
+    approach point, timed by interpolating on cumulative distance.
+
+    :return: (event table ``EVENT_DTYPE`` ordered by time, station table)
+    """
+    registry = as_registry(intersections, "intersection")
+    lat, lon = registry.lat, registry.lon
+    stations = project_onto_track(track, lat, lon, max_offset_ft)
+    if len(stations) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE), stations
+
+    row = stations["object"]
+    legs, _ = classify_approach_leg(_segment_bearing(track, stations), registry.bearing[row])
+
+    sb_target = registry.sb_target[row, legs]
+    e, n = local_offsets_m(lat[row], lon[row], sb_target[:, 0], sb_target[:, 1])
+    along = (e * stations["east"] + n * stations["north"]) * M_TO_FT
+    target_station = stations["station"] + np.where(registry.sb_available[row, legs], along, 0.0)
+
+    ids = registry.ids[row]
+    sight_distance = np.round(registry.sd[row, legs])
+    return _events_at_stations(track, stations, ids, legs, target_station, sight_distance), stations
+
+
+def generic_events(track, generic_objects, max_offset_ft: float,
+                   bearing_buffer_angle: float) -> Tuple[np.ndarray, np.ndarray]:
+    """ generic static object sight-distance events by linear referencing
+
+    Passes where the track heading at the projection is more than ``bearing_buffer_angle``
+    from the object's bearing are dropped, as in ``generic_so_checks``.
+
+    :return: (event table ``EVENT_DTYPE`` ordered by time, station table)
+    """
+    registry = as_registry(generic_objects, "generic_so")
+    stations = project_onto_track(track, registry.lat, registry.lon, max_offset_ft)
+    if len(stations) == 0:
+        return np.zeros(0, dtype=EVENT_DTYPE), stations
+
+    obj_bearing = registry.bearing[stations["object"]]
+    stations = stations[heading_within(_segment_bearing(track, stations), obj_bearing, bearing_buffer_angle)]
+    row = stations["object"]
+    ids = registry.ids[row]
+    sight_distance = registry.sight_distance_ft[row]
+    legs = np.full(len(row), -1, dtype=np.int64)
+    return _events_at_stations(track, stations, ids, legs, stations["station"], sight_distance), stations
@@ -0,0 +1,411 @@
+# !/usr/bin/env python
+# coding: utf-8
+"""Live GPS stream mode.
+
+NMEA 0183 RMC sentences are read from an asyncio stream (a TCP socket, a serial device,
+or a recorded file replayed at N times real time) and every fix is checked for
+sight-distance crossings as it arrives.  Kinematics are updated from the previous fix
+only, and a fix looks up just the objects in the grid cells around it; the detector
+keeps the last distance of each object in range and nothing of the track before, so
+the cost of a fix is proportional to its candidates, not to the drive so far.
+
+Each event carries ``latency_ms``, the time from reading its sentence off the stream to
+emitting the event.
+"""
+
+import asyncio
+import math
+import statistics
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+import click
+import numpy as np
+
+from ssoss.crossing_detector import EVENT_DTYPE, crossing_time, time_to_sight_distance
+from ssoss.distance import distance_ft_array
+from ssoss.fleet import load_fleet_inventory
+from ssoss.kinematics import (MAX_VALID_SPEED_MS, MS_TO_FTPS, classify_approach_leg, heading_within,
+                              rhumb_course, segment_distance_m)
+from ssoss.registry import IntersectionRegistry
+from ssoss.spatial_index import StaticObjectIndex
+
+KNOTS_TO_MS = 1852.0 / 3600.0
+
+# EVENT_DTYPE plus the stream-to-event latency; ``point`` is the index of the fix before
+# the crossing and ``distance``, as in the batch table, the search-radius distance from
+# the object (intersection center) to that fix
+LIVE_EVENT_DTYPE = np.dtype(EVENT_DTYPE.descr + [("latency_ms", np.float64)])
+
+
+@dataclass
+class Fix:
+    """One GPS fix of an NMEA RMC sentence."""
+
+    time: float    # UTC epoch seconds
+    lat: float
+    lon: float
+    speed: float   # meters/sec, NaN when the sentence has none
+    course: float  # degrees true, NaN when the sentence has none
+
+
+def _checksum(body: str) -> int:
+    value = 0
+    for char in body:
+        value ^= ord(char)
+    return value
+
+
+def _degrees(value: str, hemisphere: str) -> float:
+    # ddmm.mmmm / dddmm.mmmm
+    point = value.index(".") if "." in value else len(value)
+    degrees = float(value[:point - 2]) + float(value[point - 2:]) / 60.0
+    return -degrees if hemisphere in ("S", "W") else degrees
+
+
+def _optional_float(value: str) -> float:
+    return float(value) if value else math.nan
+
+
+def parse_nmea(line: str) -> Optional[Fix]:
+    """ fix of an RMC sentence ($GPRMC, $GNRMC, ...) with an active status
+
+    :return: None for other sentences, void fixes and sentences with a bad checksum
+    """
+    line = line.strip()
+    if not line.startswith("$"):
+        return None
+    body, star, checksum = line[1:].partition("*")
+    if star:
+        try:
+            if int(checksum[:2], 16) != _checksum(body):
+                return None
+        except ValueError:
+            return None
+    fields = body.split(",")
+    if len(fields) < 10 or fields[0][2:] != "RMC" or fields[2] != "A":
+        return None
+    try:
+        hhmmss, ddmmyy = fields[1], fields[9]
+        seconds = float(hhmmss[4:])
+        t = datetime(2000 + int(ddmmyy[4:6]), int(ddmmyy[2:4]), int(ddmmyy[0:2]),
+                     int(hhmmss[0:2]), int(hhmmss[2:4]), tzinfo=timezone.utc).timestamp() + seconds
+        return Fix(t, _degrees(fields[3], fields[4]), _degrees(fields[5], fields[6]),
+                   _optional_float(fields[7]) * KNOTS_TO_MS, _optional_float(fields[8]))
+    except (ValueError, IndexError):
+        return None
+
+
+def rmc_sentence(t: float, lat: float, lon: float, speed: float = math.nan, course: float = math.nan) -> str:
+    """ RMC sentence with checksum for a fix, e.g. to turn a GPX track into a replay file
+
+    :param t: UTC epoch seconds
+    :param speed: meters/sec
+    """
+    dt = datetime.fromtimestamp(t, tz=timezone.utc)
+    lat_deg, lon_deg = int(abs(lat)), int(abs(lon))
+    body = ",".join([
+        "GPRMC",
+        f"{dt:%H%M%S}.{dt.microsecond // 10000:02d}",
+        "A",
+        f"{lat_deg:02d}{(abs(lat) - lat_deg) * 60:09.6f}", "N" if lat >= 0 else "S",
+        f"{lon_deg:03d}{(abs(lon) - lon_deg) * 60:09.6f}", "E" if lon >= 0 else "W",
+        "" if math.isnan(speed) else f"{speed / KNOTS_TO_MS:.3f}",
+        "" if math.isnan(course) else f"{course:.2f}",
+        f"{dt:%d%m%y}", "", "", "A",
+    ])
+    return f"${body}*{_checksum(body):02X}"
+
+
+async def stream_lines(reader: asyncio.StreamReader) -> AsyncIterator[str]:
+    """ decoded lines of an asyncio stream until it closes """
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield line.decode("ascii", errors="replace").strip()
+
+
+async def tcp_lines(host: str, port: int) -> AsyncIterator[str]:
+    """ lines of an NMEA-over-TCP feed (e.g. a GPS receiver or gpsd relay) """
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        async for line in stream_lines(reader):
+            yield line
+    finally:
+        writer.close()
+        await writer.wait_closed()
+
+
+async def serial_lines(device) -> AsyncIterator[str]:
+    """ lines of a serial device or any other blocking byte stream, read in a worker thread
+
+    :param device: path of the device (opened read-only) or an open binary file object
+    """
+    loop = asyncio.get_running_loop()
+    f = open(device, "rb") if isinstance(device, (str, Path)) else device
+    try:
+        while True:
+            line = await loop.run_in_executor(None, f.readline)
+            if not line:
+                return
+            yield line.decode("ascii", errors="replace").strip()
+    finally:
+        if f is not device:
+            f.close()
+
+
+async def replay_lines(path, speed: float = 1.0) -> AsyncIterator[str]:
+    """ lines of a recorded NMEA file, paced by their fix times
+
+    :param speed: replay rate in multiples of real time, 0 for as fast as possible
+    """
+    loop = asyncio.get_running_loop()
+    first = start = None
+    with open(path, "r", errors="replace") as f:
+        for line in f:
+            fix = parse_nmea(line) if speed > 0 else None
+            if fix is not None:
+                if first is None:
+                    first, start = fix.time, loop.time()
+                delay = start + (fix.time - first) / speed - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            yield line.strip()
+
+
+class LiveApproachDetector:
+    """Incremental sight-distance crossing detection for a stream of fixes.
+
+    For each fix the objects within their search radius (grid index query) are measured
+    once.  An intersection approached at the previous fix fires when the distance to its
+    approach point (stop bar or center) minus the approach leg's sight distance is
+    ``>= 0`` at the two fixes before and ``<= 0`` at the newest one while closing in, the
+    streaming form of ``detect_intersection_crossings`` with the newest fix as the
+    look-ahead point.  A
+    generic object fires when the vehicle, heading within ``bearing_buffer_angle`` of it,
+    enters its sight distance, at most once per ``time_buffer`` seconds.
+    """
+
+    def __init__(self, registry, bearing_buffer_angle: float = 50.0, time_buffer: float = 3.0):
+        """
+        :param registry: IntersectionRegistry or GenericObjectRegistry; its spatial index
+            is built here when it has none yet
+        :param bearing_buffer_angle: generic object heading tolerance (degrees)
+        :param time_buffer: seconds within which a generic object fires once
+        """
+        self.registry = registry
+        self.is_intersection = isinstance(registry, IntersectionRegistry)
+        if registry.spatial_index is None:
+            registry.spatial_index = StaticObjectIndex(registry.lat, registry.lon, registry.search_radius_ft(),
+                                                       objects=registry, ids=registry.ids)
+        self.index = registry.spatial_index
+        self.bearing_buffer_angle = bearing_buffer_angle
+        self.time_buffer = time_buffer
+
+        self.fixes = 0
+        self._prev = None  # (time, lat, lon, speed m/s) of the previous fix
+        self._bearing = 0.0
+        # state of the objects in range of the previous fix: for intersections
+        # (id, leg) -> (registry row, signed distance to the sight distance at the fix
+        # before, distance to the approach point, distance to the center, distance to the
+        # object) of the approaching legs; for generic objects (id, -1) -> (signed distance
+        # to the sight distance, distance to the object)
+        self._state = {}
+        self._fired = {}  # generic object id -> last trigger time
+
+    def _kinematics(self, fix: Fix):
+        """ heading (degrees) and speed (m/s) at the fix and the acceleration (ft/s^2) of
+        the previous fix, from the previous fix only
+        """
+        if self._prev is None:
+            speed = 0.0 if math.isnan(fix.speed) else fix.speed
+            return (0.0 if math.isnan(fix.course) else fix.course), speed, 0.0
+        t0, lat0, lon0, speed0 = self._prev
+        dt = fix.time - t0
+        speed = fix.speed
+        if math.isnan(speed):
+            step = float(segment_distance_m(lat0, lon0, fix.lat, fix.lon))
+            speed = step / dt if dt > 0 else 0.0
+            speed = 0.0 if speed >= MAX_VALID_SPEED_MS else speed
+        heading = float(rhumb_course(lat0, lon0, fix.lat, fix.lon))
+        acc = (speed - speed0) * MS_TO_FTPS / dt if dt != 0 else 0.0
+        return heading, speed, acc
+
+    def update(self, fix: Fix) -> np.ndarray:
+        """ advance to a new fix
+
+        :return: events (``LIVE_EVENT_DTYPE``, latency not yet set) fired between the
+            previous fix and this one
+        """
+        heading, speed, acc = self._kinematics(fix)
+        point = self.fixes
+        self.fixes += 1
+        prev, self._prev = self._prev, (fix.time, fix.lat, fix.lon, speed)
+
+        registry = self.registry
+        rows = self.index.query_point(fix.lat, fix.lon)
+        # same search-radius distance as the candidate ``distance`` of the batch pipeline
+        d_object = distance_ft_array(registry.lat[rows], registry.lon[rows], fix.lat, fix.lon,
+                                     default="haversine") if len(rows) else np.zeros(0)
+        near = d_object <= self.index.radius_ft[rows]
+        rows, d_object = rows[near], d_object[near]
+        if self.is_intersection:
+            return self._update_intersections(fix, point, prev, heading, acc, rows, d_object)
+
+        ids = registry.ids[rows]
+        target = np.stack([registry.lat[rows], registry.lon[rows]], axis=-1)
+        sd = registry.sight_distance_ft[rows]
+        heading_ok = heading_within(heading, registry.bearing[rows], self.bearing_buffer_angle)
+        d = distance_ft_array(fix.lat, fix.lon, target[:, 0], target[:, 1])
+        s = d - sd
+
+        state, self._state = self._state, {}
+        events = []
+        for k in range(len(rows)):
+            key = (int(ids[k]), -1)
+            self._state[key] = (s[k], d_object[k])
+            if key not in state or prev is None or not heading_ok[k]:
+                continue
+            s_prev, d_object_prev = state[key]
+            if s_prev >= 0 > s[k] and fix.time - self._fired.get(key[0], -math.inf) >= self.time_buffer:
+                events.append((k, s_prev, d_object_prev))
+        if not events:
+            return np.zeros(0, dtype=LIVE_EVENT_DTYPE)
+
+        k = np.array([e[0] for e in events])
+        s_prev = np.array([e[1] for e in events])
+        t_prev, _, _, speed_prev = prev
+        out = np.zeros(len(k), dtype=LIVE_EVENT_DTYPE)
+        out["point"] = point - 1
+        out["id"] = ids[k]
+        out["leg"] = -1
+        out["distance"] = [e[2] for e in events]
+        out["sight_distance"] = sd[k]
+        out["time"] = t_prev + time_to_sight_distance(s_prev, speed_prev * MS_TO_FTPS, acc)
+        out["crossing_time"] = crossing_time(t_prev, fix.time, s_prev, s[k])
+        out["error"] = np.abs(s[k])
+        for id_num in out["id"]:
+            self._fired[int(id_num)] = fix.time
+        return out
+
+    def _update_intersections(self, fix, point, prev, heading, acc, rows, d_object) -> np.ndarray:
+        """ fire the approaches of the previous fix completed by this fix, then remember
+        the approaches of this fix
+
+        The previous fix is the candidate point of ``detect_intersection_crossings`` and
+        this fix its look-ahead point, so the same three-point rule applies.
+        """
+        registry = self.registry
+        events = self._intersection_events(fix, point, prev, acc)
+
+        leg, _ = classify_approach_leg(heading, registry.bearing[rows])
+        target = registry.sb_target[rows, leg]
+        sd = np.round(registry.sd[rows, leg])
+        d = distance_ft_array(fix.lat, fix.lon, target[:, 0], target[:, 1])
+        d_center = distance_ft_array(fix.lat, fix.lon, registry.lat[rows], registry.lon[rows])
+        if prev is None:
+            s_before = np.full(len(rows), np.nan)
+            approaching = np.zeros(len(rows), dtype=bool)
+        else:
+            _, lat0, lon0, _ = prev
+            s_before = distance_ft_array(lat0, lon0, target[:, 0], target[:, 1]) - sd
+            # approaching as in find_approach_candidates: closer to the center than before
+            approaching = d_center < distance_ft_array(lat0, lon0, registry.lat[rows], registry.lon[rows])
+        self._state = {(int(registry.ids[rows[k]]), int(leg[k])): (rows[k], s_before[k], d[k], d_center[k], d_object[k])
+                       for k in np.flatnonzero(approaching)}
+        return events
+
+    def _intersection_events(self, fix, point, prev, acc) -> np.ndarray:
+        if not self._state:
+            return np.zeros(0, dtype=LIVE_EVENT_DTYPE)
+        registry = self.registry
+        keys = list(self._state)
+        values = list(self._state.values())
+        row = np.array([v[0] for v in values])
+        leg = np.array([key[1] for key in keys])
+        s0 = np.array([v[1] for v in values])
+        d1 = np.array([v[2] for v in values])
+        sd = np.round(registry.sd[row, leg])
+        target = registry.sb_target[row, leg]
+        d2 = distance_ft_array(fix.lat, fix.lon, target[:, 0], target[:, 1])
+        s1, s2 = d1 - sd, d2 - sd
+        fired = (s0 >= 0) & (s1 >= 0) & (s2 <= 0) & (d2 <= d1)
+        if not fired.any():
+            return np.zeros(0, dtype=LIVE_EVENT_DTYPE)
+
+        k = np.flatnonzero(fired)
+        d_center = np.array([values[j][3] for j in k]) - sd[k]
+        t_prev, _, _, speed_prev = prev
+        out = np.zeros(len(k), dtype=LIVE_EVENT_DTYPE)
+        out["point"] = point - 1
+        out["id"] = registry.ids[row[k]]
+        out["leg"] = leg[k]
+        out["distance"] = [values[j][4] for j in k]
+        out["sight_distance"] = sd[k]
+        # the kinematic shift is measured to the intersection center, as in the batch table
+        out["time"] = t_prev + time_to_sight_distance(d_center, speed_prev * MS_TO_FTPS, acc)
+        out["crossing_time"] = crossing_time(t_prev, fix.time, s1[k], s2[k])
+        out["error"] = np.abs(s1[k])
+        return out
+
+
+async def live_events(lines: AsyncIterator[str], detector: LiveApproachDetector) -> AsyncIterator[np.void]:
+    """ parse NMEA lines as they arrive and yield each sight-distance event
+    (``LIVE_EVENT_DTYPE`` row) as soon as the fix that completes it is processed
+    """
+    async for line in lines:
+        received = time.perf_counter()
+        fix = parse_nmea(line)
+        if fix is None:
+            continue
+        events = detector.update(fix)
+        if len(events):
+            events["latency_ms"] = (time.perf_counter() - received) * 1000.0
+            for event in events:
+                yield event
+
+
+async def _print_live(lines, detector) -> list:
+    latencies = []
+    registry = detector.registry
+    async for e in live_events(lines, detector):
+        latencies.append(float(e["latency_ms"]))
+        obj = registry.get(int(e["id"]))
+        name = obj.get_name() if detector.is_intersection else obj.print_detail_info()
+        leg = f".{int(e['leg'])}" if detector.is_intersection else ""
+        click.echo(f"{datetime.fromtimestamp(float(e['time']), tz=timezone.utc):%H:%M:%S.%f} "
+                   f"#{int(e['id'])}{leg} {name} at {e['sight_distance']:g} ft "
+                   f"({e['latency_ms']:.2f} ms)")
+    return latencies
+
+
+@click.command("live")
+@click.argument("inventory", type=click.Path(exists=True))
+@click.option("--replay", type=click.Path(exists=True, dir_okay=False), help="Recorded NMEA file to replay")
+@click.option("--speed", type=float, default=1.0, show_default=True,
+              help="Replay rate in multiples of real time, 0 for as fast as possible")
+@click.option("--tcp", help="HOST:PORT of an NMEA over TCP feed")
+@click.option("--serial", "device", help="Serial device with an NMEA feed, e.g. /dev/ttyUSB0")
+@click.option("--layer", help="Layer of a multi-layer inventory such as a GeoPackage")
+def live(inventory, replay, speed, tcp, device, layer):
+    """Report sight-distance events of a live NMEA GPS stream as they happen."""
+    if sum(x is not None for x in (replay, tcp, device)) != 1:
+        raise click.UsageError("give exactly one of --replay, --tcp or --serial")
+    if replay:
+        lines = replay_lines(replay, speed)
+    elif tcp:
+        host, _, port = tcp.rpartition(":")
+        lines = tcp_lines(host or "localhost", int(port))
+    else:
+        lines = serial_lines(device)
+    detector = LiveApproachDetector(load_fleet_inventory(inventory, layer=layer))
+    latencies = asyncio.run(_print_live(lines, detector))
+    if latencies:
+        click.echo(f"{detector.fixes} fixes, {len(latencies)} events, latency median "
+                   f"{statistics.median(latencies):.2f} ms, max {max(latencies):.2f} ms")
+    else:
+        click.echo(f"{detector.fixes} fixes, no events")
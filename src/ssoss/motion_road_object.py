@@ -11,39 +11,61 @@ import gpxpy.geo as gpxgeo
 import numpy as np
 import pandas as pd
 
+from ssoss.distance import active_backend, distance_ft, distance_ft_array
+from ssoss.kinematics import classify_approach_leg
 from ssoss.static_road_object import StaticRoadObject, Intersection
 
 
 
 class GPXPoint:
     """class for GPX points to calculate necessary distances and positions to other objects
+
+    A GPXPoint is either standalone (neighbours linked with set_prev_gpx_point /
+    set_next_gpx_point) or a view of one row of a TrackArray, where neighbours,
+    cumulative distance and approach lists resolve through the track by index.
     """
 
-    def __init__(self, id_num: int, t, p: geopy.Point, spd: float):
+    __slots__ = (
+        "id", "t", "dt", "p", "spd",
+        "prev_gpx_point", "next_gpx_point", "bearing",
+        "intersection_approach_list", "generic_so_approach_list", "generic_so_list",
+        "cumulative_distance", "_track",
+    )
+
+    # constants for unit conversions
+    MStoMPH = 2.23694
+    FTPStoMPH = 0.681818
+    MPHtoFTPS = 1 / FTPStoMPH
+    MStoFTPS = MStoMPH * MPHtoFTPS
+    veh_gap = 0.0
+
+    # search buffer (feet) beyond a generic static object's sight distance in backflow
+    GENERIC_SO_BUFFER_FT = 150.0
+
+    def __init__(self, id_num: int, t, p: geopy.Point, spd: float, track=None):
         """
 
         :param id_num: count number of point in GPX file
-        :param t: timestamp of gpx point
+        :param t: timestamp of gpx point, ISO 8601 string or seconds since epoch (UTC)
         :param pt: geopy point, longitude and latitude of point
         :param spd: speed in ft/sec at that point
+        :param track: TrackArray this point is a view of (None for standalone points)
         """
-        # constants for unit conversions
-        self.MStoMPH = 2.23694
-        self.FTPStoMPH = 0.681818
-        self.MPHtoFTPS = 1 / self.FTPStoMPH
-        self.MStoFTPS = self.MStoMPH * self.MPHtoFTPS
-        self.veh_gap = 0.0
-        
-
         # initial variables from GPX file
         self.id = id_num
-        t_temp = (dateutil.parser.isoparse(t))
-        if t_temp.tzinfo is None:
-            t_temp = t_temp.replace(tzinfo=timezone.utc)
-        self.dt = t_temp
-        self.t = t_temp.timestamp()
+        if isinstance(t, (int, float, np.floating)):
+            # epoch seconds from the columnar GPX reader, skip string parsing
+            self.dt = None
+            self.t = float(t)
+        else:
+            t_temp = (dateutil.parser.isoparse(t))
+            if t_temp.tzinfo is None:
+                t_temp = t_temp.replace(tzinfo=timezone.utc)
+            self.dt = t_temp
+            self.t = t_temp.timestamp()
         self.p = geopy.Point(p[0], p[1])  # elevation not supported
         self.spd = spd
+        self._track = track
 
         # calculated variables from backflow function
         self.prev_gpx_point = None  # GPX Class Object
@@ -63,30 +85,83 @@ class GPXPoint:
         return self.t
 
     def get_datetime(self) -> datetime:
+        """ timezone-aware datetime, in the track's local timezone for points of a TrackArray
+        """
+        if self.dt is None:
+            tz = self._track.tzinfo if self._track is not None and self._track.tzinfo is not None else timezone.utc
+            self.dt = datetime.fromtimestamp(self.t, tz=tz)
         return self.dt
 
     def get_prev_timedelta(self) -> float:
-        return self.t - self.prev_gpx_point.get_timestamp()
+        if self._track is not None:
+            return self.t - float(self._track.time[self.id - 1])
+        return self.t - self.get_prev_gpx_point().get_timestamp()
 
     def get_next_timedelta(self) -> float:
-        return self.next_gpx_point.get_timestamp() - self.t
+        if self._track is not None:
+            return float(self._track.time[self.id + 1]) - self.t
+        return self.get_next_gpx_point().get_timestamp() - self.t
 
     def get_location(self) -> geopy.Point:
         return self.p
-    
+
     def get_generic_so_approach_list(self):
+        if self.generic_so_approach_list is None and self._track is not None:
+            return self._track.approach_list(self.id, "generic_so")
         return self.generic_so_approach_list
 
     def get_intersection_approach_list(self):
+        if self.intersection_approach_list is None and self._track is not None:
+            return self._track.approach_list(self.id, "intersection")
         return self.intersection_approach_list
 
-    def distance_to(self, p1) -> geopy.distance:
-        return geopy.distance.distance(p1, self.p).ft
-    
+    def set_generic_so_approach_list(self, approach_list):
+        self.generic_so_approach_list = approach_list
+
+    def set_intersection_approach_list(self, approach_list):
+        self.intersection_approach_list = approach_list
+
+    def _projection(self):
+        """ LocalENU plane of the track when projected mode is on, else None """
+        return self._track.projection if self._track is not None else None
+
+    def _en(self, i=None):
+        i = self.id if i is None else i
+        return self._track.east[i], self._track.north[i]
+
+    def distance_to(self, p1) -> float:
+        projection = self._projection()
+        if projection is not None:
+            return projection.distance_ft(self._en(), projection.forward_point(p1))
+        return distance_ft(p1, self.p)
+
+    def distance_to_object(self, sro, leg: int = -1) -> float:
+        """ distance (feet) to the stop bar of ``sro`` on ``leg``, or to its location when
+        ``leg`` is -1 or the leg has no stop bar
+
+        Track views read and fill the track's per-run distance cache keyed by
+        (point index, object id, leg, backend).
+        """
+        if leg >= 0 and not sro.sb_line_available(leg):
+            leg = -1
+        if leg < 0:
+            compute = lambda: self.distance_to(sro.get_location())
+        else:
+            compute = lambda: self.distance_to(sro.get_location_sb(leg))
+        if self._track is None:
+            return compute()
+        so_type = "intersection" if isinstance(sro, Intersection) else "generic_so"
+        backend = "projected" if self._projection() is not None else active_backend("geodesic")
+        return self._track.distance_cache(so_type).get((self.id, sro.get_id_num(), leg, backend), compute)
+
     def distance_to_line(self, p1, p2) -> float:
-        a = geopy.distance.distance(p1, p2).ft
-        b = geopy.distance.distance(p1, self.get_location()).ft
-        c = geopy.distance.distance(p2, self.get_location()).ft
+        projection = self._projection()
+        if projection is not None:
+            return projection.distance_to_line_ft(
+                self._en(), projection.forward_point(p1), projection.forward_point(p2))
+        a = distance_ft(p1, p2)
+        b = distance_ft(p1, self.get_location())
+        c = distance_ft(p2, self.get_location())
         if a is not None and b is not None and c is not None:
             s = (a + b + c) / 2
             dist_to_sb = 2. * math.sqrt(abs(s * (s -a) * (s - b) * (s - c))) / a
@@ -94,16 +169,25 @@ class GPXPoint:
         else:
             return 0
 
-    def get_dist_between_points(self, p1, p2) -> geopy.distance:
-        return geopy.distance.distance(p1, p2).ft
-    
-    def get_dist_to_prev_point(self) -> geopy.distance:
-        return geopy.distance.distance(self.prev_gpx_point.get_location(), self.p).ft
-    
-    def get_dist_to_next_point(self) -> geopy.distance:
-        return geopy.distance.distance(self.p, self.next_gpx_point.get_location()).ft
+    def get_dist_between_points(self, p1, p2) -> float:
+        projection = self._projection()
+        if projection is not None:
+            return projection.distance_ft(projection.forward_point(p1), projection.forward_point(p2))
+        return distance_ft(p1, p2)
+
+    def get_dist_to_prev_point(self) -> float:
+        if self._projection() is not None and self.prev_gpx_point is None:
+            return self._projection().distance_ft(self._en(self.id - 1), self._en())
+        return distance_ft(self.get_prev_gpx_point().get_location(), self.p)
+
+    def get_dist_to_next_point(self) -> float:
+        if self._projection() is not None and self.next_gpx_point is None:
+            return self._projection().distance_ft(self._en(), self._en(self.id + 1))
+        return distance_ft(self.p, self.get_next_gpx_point().get_location())
 
     def get_cumulative_distance(self):
+        if self._track is not None:
+            return float(self._track.cumulative_distance[self.id])
         return self.cumulative_distance  # Feet
 
     def get_speed(self, units="ft_per_sec") -> float:
@@ -117,9 +201,13 @@ class GPXPoint:
         return speed
 
     def get_prev_gpx_point(self):
+        if self.prev_gpx_point is None and self._track is not None and self.id > 0:
+            return self._track.point(self.id - 1)
         return self.prev_gpx_point  # GPX Point Object
 
     def get_next_gpx_point(self):
+        if self.next_gpx_point is None and self._track is not None and self.id < self._track.last_index():
+            return self._track.point(self.id + 1)
         return self.next_gpx_point  # GPX Point Object
 
     def set_prev_gpx_point(self, o):
@@ -129,11 +217,13 @@ class GPXPoint:
         self.next_gpx_point = o
 
     def set_cumulative_distance(self, d):
+        if self._track is not None:
+            self._track.cumulative_distance[self.id] = d
         self.cumulative_distance = d
 
     def is_intersection_in_next_point(self, i, b) -> bool:
         out_bool = False
-        next_intersection_appr_list = self.next_gpx_point.get_intersection_approach_list()
+        next_intersection_appr_list = self.get_next_gpx_point().get_intersection_approach_list()
 
         if next_intersection_appr_list:
             id_list, b_index, dist, appr = zip(*next_intersection_appr_list)
@@ -143,19 +233,25 @@ class GPXPoint:
         return out_bool
 
     def approaching(self, sro: StaticRoadObject) -> bool:
-        if self.prev_gpx_point is None:
+        p_prev = self.get_prev_gpx_point()
+        if p_prev is None:
             return False
-        elif self.distance_to(sro.get_location()) < self.prev_gpx_point.distance_to(sro.get_location()):
+        elif self.distance_to_object(sro) < p_prev.distance_to_object(sro):
             return True
         else:
             return False
 
     def get_bearing(self) -> float:
-        if self.prev_gpx_point is None:
+        if self._track is not None:
+            # precomputed by the kinematics stage
+            self.bearing = float(self._track.bearing[self.id])
+            return self.bearing
+        p_prev = self.get_prev_gpx_point()
+        if p_prev is None:
             return 0
         else:
-            prev_lat = self.prev_gpx_point.get_location().latitude
-            prev_lon = self.prev_gpx_point.get_location().longitude
+            prev_lat = p_prev.get_location().latitude
+            prev_lon = p_prev.get_location().longitude
             cur_lat = self.get_location().latitude
             cur_lon = self.get_location().longitude
 
@@ -178,30 +274,12 @@ class GPXPoint:
                "False" index_out returns strings:  "NB","EB", "SB", "WB".
         """
 
-        pt_to_intersection_diff = [
-            self.calc_bearing_diff(intersection.get_bearing(0)),
-            self.calc_bearing_diff(intersection.get_bearing(1)),
-            self.calc_bearing_diff(intersection.get_bearing(2)),
-            self.calc_bearing_diff(intersection.get_bearing(3))
-        ]
-
-        approach_leg_index = np.argmin(pt_to_intersection_diff)
-        approach_leg_string = ""
-
         if intersection is None:
             return None
-        elif index_out:
-            return int(approach_leg_index)
-        else:
-            if approach_leg_index == 0:
-                approach_leg_string = "NB"
-            elif approach_leg_index == 1:
-                approach_leg_string = "EB"
-            elif approach_leg_index == 2:
-                approach_leg_string = "SB"
-            elif approach_leg_index == 3:
-                approach_leg_string = "WB"
-            return approach_leg_string
+        leg, _ = classify_approach_leg(self.get_bearing(), intersection.get_bearingT())
+        if index_out:
+            return int(leg)
+        return Intersection.get_bearing_str(int(leg))
 
     def t_to_approach_simple(self, approaching_intersection:Intersection, b_index: int) -> float:
         
@@ -209,9 +287,9 @@ class GPXPoint:
         approach_i_sb_pt2 = approaching_intersection.stop_bar_d[b_index][1]
         
         if (not approaching_intersection.all_sb_line_available()):
-            d = self.distance_to(approaching_intersection.get_location()) - approaching_intersection.get_sd(b_index)
+            d = self.distance_to_object(approaching_intersection) - approaching_intersection.get_sd(b_index)
         else:
-            d = self.distance_to(approaching_intersection.get_location()) \
+            d = self.distance_to_object(approaching_intersection) \
                   - approaching_intersection.get_sd(b_index)              
         
         
@@ -222,7 +300,7 @@ class GPXPoint:
     
     def t_to_generic_so_simple(self, generic_so) -> float:
         generic_so_dist = generic_so.get_sd()
-        d = self.distance_to(generic_so.get_location()) - generic_so_dist
+        d = self.distance_to_object(generic_so) - generic_so_dist
 
         if self.get_speed() > 0:
             return d / self.get_speed()
@@ -232,6 +310,8 @@ class GPXPoint:
     def acceleration(self) -> float:
         """ acceleration calculation between two GPX points"""
 
+        if self._track is not None:
+            return float(self._track.acceleration[self.id])
         if self.get_next_gpx_point() is not None and self.get_next_timedelta is not None:
             t_delta = self.get_next_timedelta()
             v_initial = self.get_speed()
@@ -242,7 +322,7 @@ class GPXPoint:
         
     def t_to_generic_so_acc(self, generic_so) -> float:
         generic_so_dist = generic_so.get_sd()
-        d_sd = d_sd_simple = self.distance_to(generic_so.get_location()) - generic_so_dist
+        d_sd = d_sd_simple = self.distance_to_object(generic_so) - generic_so_dist
         
         # radical: sqrt(v^2 - 4 * acc * d_sd)
         if self.get_speed()**2 > 4 * self.acceleration() * d_sd:
@@ -268,12 +348,12 @@ class GPXPoint:
         approach_i_sb_pt1 = approaching_intersection.stop_bar_d[b_index][0]
         approach_i_sb_pt2 = approaching_intersection.stop_bar_d[b_index][1]
         
-        d_sd_simple = self.distance_to(approaching_intersection.get_location()) - approach_i_sd
+        d_sd_simple = self.distance_to_object(approaching_intersection) - approach_i_sd
 
         if (not approaching_intersection.all_sb_line_available()):
-            d_sd = self.distance_to(approaching_intersection.get_location()) - approach_i_sd
+            d_sd = self.distance_to_object(approaching_intersection) - approach_i_sd
         else:
-            d_sd = self.distance_to(approaching_intersection.get_location()) - approach_i_sd
+            d_sd = self.distance_to_object(approaching_intersection) - approach_i_sd
             print(f"t_to_approach, d_sd_simple:{d_sd_simple}, d_sd_hd{d_sd}")
             
 
@@ -293,32 +373,36 @@ class GPXPoint:
             t_acc_neg = (-self.get_speed() - radical) / denominator
             return min(abs(t_acc_neg), abs(t_acc_pos))
 
-    def backflow(self, sro_df: pd.DataFrame, so_type):
-        """Vectorised computation of nearby static objects."""
+    def backflow(self, sro_df: pd.DataFrame, so_type, index=None):
+        """Vectorised computation of nearby static objects.
 
-        def _haversine_feet(lat1, lon1, lat2, lon2):
-            lat1 = np.radians(lat1)
-            lon1 = np.radians(lon1)
-            lat2 = np.radians(lat2)
-            lon2 = np.radians(lon2)
-            dlat = lat2 - lat1
-            dlon = lon2 - lon1
-            a = np.sin(dlat / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
-            return 2 * gpxgeo.EARTH_RADIUS * np.arcsin(np.sqrt(a)) * 3.28084
+        :param index: optional StaticObjectIndex over the same objects; when given only
+            objects in the grid cells around this point are distance checked
+        """
+
+        if index is not None:
+            near = index.query_point(self.p.latitude, self.p.longitude)
+            objects = index.objects[near]
+            lat = index.lat[near]
+            lon = index.lon[near]
+            radius = index.radius_ft[near]
+        else:
+            objects = sro_df[f"{so_type}_obj"].to_numpy()
+            lat = np.array([o.get_location().latitude for o in objects])
+            lon = np.array([o.get_location().longitude for o in objects])
+            if so_type == "intersection":
+                radius = np.array([i.get_sd("max") for i in objects], dtype=float)
+            else:
+                radius = np.array([g.get_sd() for g in objects], dtype=float) + self.GENERIC_SO_BUFFER_FT
 
         if so_type == "intersection":
-            intersections = sro_df["intersection_obj"].to_numpy()
-            if len(intersections) == 0:
+            if len(objects) == 0:
                 self.intersection_approach_list = []
                 return
 
-            lat = np.array([i.get_location().latitude for i in intersections])
-            lon = np.array([i.get_location().longitude for i in intersections])
-            sd_max = np.array([i.get_sd("max") for i in intersections], dtype=float)
-
-            dist = _haversine_feet(lat, lon, self.p.latitude, self.p.longitude)
-            mask = dist <= sd_max
-            selected = intersections[mask]
+            dist = distance_ft_array(lat, lon, self.p.latitude, self.p.longitude, default="haversine")
+            mask = dist <= radius
+            selected = objects[mask]
             dist = dist[mask]
 
             results = [(
@@ -333,19 +417,13 @@ class GPXPoint:
             self.intersection_approach_list = list(filter(lambda x: x[3], temp_sort_approaching))
 
         elif so_type == "generic_so":
-            generics = sro_df["generic_so_obj"].to_numpy()
-            if len(generics) == 0:
+            if len(objects) == 0:
                 self.generic_so_approach_list = []
                 return
 
-            lat = np.array([g.get_location().latitude for g in generics])
-            lon = np.array([g.get_location().longitude for g in generics])
-            sd = np.array([g.get_sd() for g in generics], dtype=float)
-
-            dist = _haversine_feet(lat, lon, self.p.latitude, self.p.longitude)
-            buffer_dist = 150.0
-            mask = dist <= sd + buffer_dist
-            selected = generics[mask]
+            dist = distance_ft_array(lat, lon, self.p.latitude, self.p.longitude, default="haversine")
+            mask = dist <= radius
+            selected = objects[mask]
             dist = dist[mask]
 
             results = [(
@@ -395,18 +473,18 @@ class GPXPoint:
         
         if not approaching_intersection.sb_line_available(b_index):
             """using center point of intersection"""
-            d0 = p_prev.distance_to(approaching_intersection.get_location()) 
-            d1 = self.distance_to(approaching_intersection.get_location())
+            d0 = p_prev.distance_to_object(approaching_intersection) 
+            d1 = self.distance_to_object(approaching_intersection)
             if p_next is not None:
-                d2 = p_next.distance_to(approaching_intersection.get_location())
+                d2 = p_next.distance_to_object(approaching_intersection)
             else:
                 d2 = 0
         else:
             """using stop bar at intersection information"""
-            d0 = p_prev.distance_to(approaching_intersection.get_location_sb(b_index)) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
-            d1 = self.distance_to(approaching_intersection.get_location_sb(b_index)) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
+            d0 = p_prev.distance_to_object(approaching_intersection, b_index) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
+            d1 = self.distance_to_object(approaching_intersection, b_index) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
             if p_next is not None:
-                d2 = p_next.distance_to(approaching_intersection.get_location_sb(b_index)) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
+                d2 = p_next.distance_to_object(approaching_intersection, b_index) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
             else:
                 d2 = 0
  
@@ -428,10 +506,10 @@ class GPXPoint:
 
         approach_generic_so_sd = approaching_generic_so.get_sd()
 
-        d0 = p_prev.distance_to(approaching_generic_so.get_location())
-        d1 = self.distance_to(approaching_generic_so.get_location())
+        d0 = p_prev.distance_to_object(approaching_generic_so)
+        d1 = self.distance_to_object(approaching_generic_so)
         if p_next is not None:
-            d2 = p_next.distance_to(approaching_generic_so.get_location())
+            d2 = p_next.distance_to_object(approaching_generic_so)
         else:
             d2 = 0
         h_flag = self.three_pt_approach(d0, d1, d2, approach_generic_so_sd)
@@ -448,15 +526,15 @@ class GPXPoint:
         approach_i_sb_pt2 = approaching_intersection.stop_bar_d[b_index][1]
 
         if not approaching_intersection.sb_line_available(b_index):
-            d1 = abs(self.distance_to(approaching_intersection.get_location()))
+            d1 = abs(self.distance_to_object(approaching_intersection))
             if p_next is not None:
-                d2 = abs(p_next.distance_to(approaching_intersection.get_location()))
+                d2 = abs(p_next.distance_to_object(approaching_intersection))
             else:
                 d2 = 0
         else:
-            d1 = abs(self.distance_to(approaching_intersection.get_location_sb(b_index))) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
+            d1 = abs(self.distance_to_object(approaching_intersection, b_index)) #+ approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
             if p_next is not None:
-                d2 = abs(p_next.distance_to(approaching_intersection.get_location_sb(b_index)))# + approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
+                d2 = abs(p_next.distance_to_object(approaching_intersection, b_index))# + approaching_intersection.center_to_sb_distance(b_index) + self.veh_gap
             else:
                 d2 = 0
 
@@ -470,8 +548,8 @@ class GPXPoint:
         p_prev = self.get_prev_gpx_point()
         approach_generic_so_sd = approaching_intersection.get_sd(b_index)
 
-        d0 = p_prev.distance_to(approaching_intersection.get_location())
-        d1 = self.distance_to(approaching_intersection.get_location())
+        d0 = p_prev.distance_to_object(approaching_intersection)
+        d1 = self.distance_to_object(approaching_intersection)
 
         if d0 >= approach_generic_so_sd >= d1:
                 ret_flag = True
@@ -483,9 +561,9 @@ class GPXPoint:
         p_next = self.get_next_gpx_point()
         approach_generic_so_sd = approaching_generic_so.get_sd()
 
-        d1 = abs(self.distance_to(approaching_generic_so.get_location()))
+        d1 = abs(self.distance_to_object(approaching_generic_so))
         if p_next is not None:
-            d2 = abs(p_next.distance_to(approaching_generic_so.get_location()))
+            d2 = abs(p_next.distance_to_object(approaching_generic_so))
         else:
             d2 = 0
 
@@ -500,8 +578,8 @@ class GPXPoint:
         p_next = self.get_next_gpx_point()
         gso_sd = approaching_generic_so.get_sd()
 
-        d1 = self.distance_to(approaching_generic_so.get_location()) - gso_sd
-        d2 = p_next.distance_to(approaching_generic_so.get_location()) + gso_sd
+        d1 = self.distance_to_object(approaching_generic_so) - gso_sd
+        d2 = p_next.distance_to_object(approaching_generic_so) + gso_sd
         d_to_next_pt = self.get_dist_to_next_point()
 
         if d1 < d_to_next_pt:
@@ -0,0 +1,100 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.crossing_detector import EVENT_DTYPE, detect_generic_crossings, detect_intersection_crossings
+from ssoss.distance import get_backend, set_backend
+from ssoss.track_cache import CANDIDATE_DTYPE
+
+# points shared with each neighbouring shard so prev/next heuristics see the same
+# neighbours as the serial path (they only look one point either way)
+HALO_POINTS = 2
+# tracks shorter than this per worker are not worth the process start-up cost
+MIN_SHARD_POINTS = 2000
+
+
+def shard_bounds(n: int, shards: int, halo: int = HALO_POINTS) -> List[Tuple[int, int, int, int]]:
+    """ split ``n`` track points into contiguous time windows
+
+    :return: (lo, hi, core_lo, core_hi) per shard; points ``lo:hi`` are loaded, results
+        are kept only for the core points ``core_lo:core_hi``, which tile ``0:n`` exactly
+    """
+    shards = max(1, min(shards, n))
+    edges = np.linspace(0, n, shards + 1).astype(int)
+    return [(int(max(0, a - halo)), int(min(n, b + halo)), int(a), int(b))
+            for a, b in zip(edges[:-1], edges[1:]) if b > a]
+
+
+def _shard_count(n: int, workers: int, min_shard_points: Optional[int]) -> int:
+    if min_shard_points is None:
+        min_shard_points = MIN_SHARD_POINTS
+    return max(1, min(workers, n // max(min_shard_points, 1)))
+
+
+def _candidates_shard(job) -> np.ndarray:
+    track, lo, core_lo, core_hi, index, so_type = job
+    candidates = find_approach_candidates(track, index, so_type)
+    candidates["point"] += lo
+    keep = (candidates["point"] >= core_lo) & (candidates["point"] < core_hi)
+    return candidates[keep]
+
+
+def _events_shard(job) -> np.ndarray:
+    track, lo, core_lo, core_hi, candidates, objects, so_type, bearing_buffer_angle = job
+    candidates = candidates.copy()
+    candidates["point"] -= lo
+    if so_type == "intersection":
+        events = detect_intersection_crossings(track, candidates, objects)
+    else:
+        events = detect_generic_crossings(track, candidates, objects, bearing_buffer_angle)
+    events["point"] += lo
+    keep = (events["point"] >= core_lo) & (events["point"] < core_hi)
+    return events[keep]
+
+
+def _run(fn, jobs, workers: int, dtype) -> np.ndarray:
+    if len(jobs) == 1:
+        results = [fn(jobs[0])]
+    else:
+        # workers inherit the distance backend even when processes are spawned
+        with ProcessPoolExecutor(max_workers=workers, initializer=set_backend,
+                                 initargs=(get_backend(),)) as pool:
+            # map keeps shard order, so the merge is deterministic
+            results = list(pool.map(fn, jobs))
+    results = [r for r in results if len(r)]
+    if not results:
+        return np.zeros(0, dtype=dtype)
+    return np.concatenate(results)
+
+
+def parallel_approach_candidates(track, index, so_type: str, workers: int,
+                                 min_shard_points: Optional[int] = None) -> np.ndarray:
+    """ find_approach_candidates over time shards of the track in a process pool
+
+    Gives the same candidate table as the serial call.
+    """
+    shards = shard_bounds(len(track), _shard_count(len(track), workers, min_shard_points))
+    jobs = [(track.slice(lo, hi), lo, core_lo, core_hi, index, so_type)
+            for lo, hi, core_lo, core_hi in shards]
+    return _run(_candidates_shard, jobs, workers, CANDIDATE_DTYPE)
+
+
+def parallel_crossings(track, candidates, objects, so_type: str, workers: int,
+                       bearing_buffer_angle: Optional[float] = None,
+                       min_shard_points: Optional[int] = None) -> np.ndarray:
+    """ detect_intersection_crossings / detect_generic_crossings over time shards
+
+    Gives the same event table as the serial call.
+    """
+    shards = shard_bounds(len(track), _shard_count(len(track), workers, min_shard_points))
+    points = candidates["point"]
+    jobs = []
+    for lo, hi, core_lo, core_hi in shards:
+        rows = candidates[(points >= lo) & (points < hi)]
+        jobs.append((track.slice(lo, hi), lo, core_lo, core_hi, rows, objects, so_type, bearing_buffer_angle))
+    return _run(_events_shard, jobs, workers, EVENT_DTYPE)
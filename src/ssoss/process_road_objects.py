@@ -1,7 +1,8 @@
 # !/usr/bin/env python
 # coding: utf-8
 
-import csv, math
+import functools
+import math
 import textwrap
 import statistics
 from datetime import datetime, timezone
@@ -10,41 +11,102 @@ from pathlib import Path
 
 
 from geopy import Point
-from geopy.distance import geodesic, Distance
-
-import gpxpy
-import gpxpy.gpx
+from geopy.distance import Distance
 
+import numpy as np
 import pandas as pd
-import lxml
-from lxml import etree
-from tqdm import tqdm
 from timezonefinder import TimezoneFinder
 
 from ssoss.static_road_object import Intersection, GenericStaticObject
 from ssoss.motion_road_object import GPXPoint
+from ssoss.gpx_reader import GPXColumns, read_gpx, sniff_gpx_version, gpx_stem
+from ssoss.track_cache import CANDIDATE_DTYPE, TrackCache, AnnotationCache, annotation_key, file_digest
+from ssoss.spatial_index import StaticObjectIndex
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.distance import BACKENDS, DISTANCE_CACHE_SIZE, distance_m, get_backend as get_distance_backend, use_backend
+from ssoss.crossing_detector import cluster_events, detect_intersection_crossings, detect_generic_crossings
+from ssoss.linear_reference import intersection_events, generic_events
+from ssoss.parallel import parallel_approach_candidates, parallel_crossings
+from ssoss.projection import LocalENU
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry
+from ssoss.ingest import read_static_objects as ingest_static_objects
+from ssoss.index_file import IndexFile, is_index_file
+from ssoss.tiles import TiledInventory, is_tiled_inventory
+from ssoss.track_array import TrackArray
+from ssoss.kinematics import derive_speed
+
+
+def _with_distance_backend(method):
+    """ runs a ProcessRoadObjects method with the instance's distance backend selected,
+    restoring the process-wide setting afterwards
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with use_backend(self.distance_backend):
+            return method(self, *args, **kwargs)
+    return wrapper
 
 
 class ProcessRoadObjects:
 
+    # generic static object sighting filters used by generic_so_checks
+    GENERIC_SO_BEARING_BUFFER = 50  # degrees
+    GENERIC_SO_TIME_BUFFER = 3  # seconds, sightings of an object closer than this are one pass
+
+    # sight-distance event engines: per-point three-point heuristic or linear referencing
+    EVENT_ENGINES = ("heuristic", "linear_reference")
+    # largest lateral distance (feet) from the track for an object to be projected onto it
+    LINEAR_REFERENCE_MAX_OFFSET_FT = 100.0
+
     def __init__(self,
                  gpx_filestring: str = "",
                  #signals_filestring: str = "",
                  generic_static_object_filestring: str = "",
-                 use_pickle: bool = True
+                 use_pickle: bool = True,
+                 event_engine: str = "heuristic",
+                 workers: int = 1,
+                 distance_backend: str = None,
+                 projected: bool = False,
+                 distance_cache_size: int = DISTANCE_CACHE_SIZE,
+                 static_object_layer=None,
+                 static_objects=None,
                  ):
         """ Class to process Road Object files. Using January 1st 1970 as time epoc
 
         :gpx_filepath: as string, full directory and filename of gpx file
         :signals_filepath: as string, full directory and filename of sign or signal CSV file
-        generic_static_object_filestring: as string, full directory and filename of generic SO CSV file
+        generic_static_object_filestring: as string, full directory and filename of generic SO or
+            intersection CSV file, a GeoJSON / GeoPackage layer of either, an index file built by
+            ``ssoss index build`` (see ssoss.index_file), or a tiled inventory directory (see
+            ssoss.tiles) of which only the tiles near the GPX track are read
+        event_engine: "heuristic" annotates every point and checks approaches point by point,
+            "linear_reference" projects each object onto the track once instead
+        workers: processes used for the annotation and event stages (1 runs serially)
+        distance_backend: "geodesic", "local" or "haversine" for every distance call of this
+            instance (see ssoss.distance), None uses the setting current at construction; it
+            is selected only while the instance's methods run
+        projected: reproject the track and static objects once into a local East-North plane
+            at the track centroid so distances, stop bar offsets and headings are planar
+        distance_cache_size: point-to-object distances kept in the track's LRU cache shared
+            by the GPXPoint approach heuristics
+        static_object_layer: layer name or index in a multi-layer static object file (GeoPackage)
+        static_objects: IntersectionRegistry or GenericObjectRegistry already loaded, used
+            instead of reading generic_static_object_filestring (see ssoss.fleet)
         """
-
-        self.intersection_load = None
-        self.intersection_listDF = None
-
-        self.generic_so_load = None  #id, generic_SO object list
-        self.generic_so_listDF = None # data frame of generic_SO object list
+        if event_engine not in self.EVENT_ENGINES:
+            raise ValueError(f"event_engine must be one of {self.EVENT_ENGINES}")
+        self.event_engine = event_engine
+        self.workers = max(1, int(workers))
+        if distance_backend is not None and distance_backend not in BACKENDS:
+            raise ValueError(f"distance backend must be one of {BACKENDS}")
+        self.distance_backend = distance_backend if distance_backend is not None else get_distance_backend()
+        self.projected = bool(projected)
+        self.projection = None
+        self.distance_cache_size = distance_cache_size
+
+        # columnar static object stores, objects are built lazily by id
+        self.intersection_registry = None
+        self.generic_so_registry = None
 
         self.date_format = "%m-%d-%Y--%H-%M-%S.%f-%Z"
         self.pretty_datetime_format = "%y-%m-%d %H:%M:%S"
@@ -58,13 +120,19 @@ class ProcessRoadObjects:
         #    self.intersection_filename = Path(signals_filestring)
         if generic_static_object_filestring:
             self.generic_so_filename = Path(generic_static_object_filestring)
-        self.gpx_filename = Path(gpx_filestring).stem
-        self.pickle_file = ''
+        self.gpx_filename = gpx_stem(gpx_filestring) if gpx_filestring else ""
+        self.cache_file = None
+        self.gpx_digest = None
+        # file_digest of the inventory of each loaded kind ("intersection", "generic_so")
+        self.so_digests = {}
+        self.tiled_inventory = None
+        # AnnotationCache per loaded kind, each keyed on the digest of its own inventory
+        self.annotation_caches = {}
         self.gpx_file = ''
         self.csv_file = None
         self.gpxDF = ''
-        self.gpx_listDF = None
-        self.gDF_pickle_file = None
+        self.track = None  # TrackArray of loaded GPX points
+        self._gpx_listDF = None
 
         self.sum_time_gap = 0.0
         self.sum_total_points = 0.0
@@ -72,7 +140,7 @@ class ProcessRoadObjects:
         self.intersection_approaches = 0
         self.generic_so_approaches = 0
 
-        # store whether to load/save pickled GPX data
+        # store whether to load/save the content-hashed GPX track cache
         self.use_pickle = use_pickle
 
         # scafold directory structure if not present
@@ -83,23 +151,24 @@ class ProcessRoadObjects:
 
         """
         if signals_filestring:
-            all_intersections_df = self.load_intersection_csv(self.intersection_filename)
+            self.read_intersection_csv(self.intersection_filename)
         """
-        if generic_static_object_filestring:
-            # if filestring file has 7 rows, load_generic_so_csv, else load_intersection_csv
-            with open(self.generic_so_filename, 'r') as f:
-                reader = csv.reader(f)
-                so_file_columns = len(next(reader))
-            if so_file_columns == 7:
-                self.static_object_type = "generic static object"
-                all_generic_so_df = self.load_generic_so_csv(self.generic_so_filename)
-            elif so_file_columns == 13 or so_file_columns == 29:
-                self.static_object_type = "intersection"
-                all_intersections_df = self.load_intersection_csv(self.generic_so_filename)
-            else:
-                raise ValueError("generic static object .csv file must have 7, 13 or 29 columns. Check documentation.")
-        if self.gpx_filename:
-            gpx_df = self.load_gpx_to_obj_df(self.gpx_filename, use_pickle=self.use_pickle)
+        with use_backend(self.distance_backend):
+            if static_objects is not None:
+                self.set_static_objects(static_objects)
+            elif generic_static_object_filestring:
+                if is_index_file(self.generic_so_filename):
+                    self.read_index_file(self.generic_so_filename)
+                elif is_tiled_inventory(self.generic_so_filename):
+                    # tiles are read once the track's bounding box is known
+                    self.tiled_inventory = TiledInventory(self.generic_so_filename)
+                    if not self.gpx_filename:
+                        self.read_inventory_tiles()
+                else:
+                    # 7 columns are generic static objects, 13 or 29 are intersections
+                    self.read_static_objects(self.generic_so_filename, layer=static_object_layer)
+            if self.gpx_filename:
+                gpx_df = self.load_gpx_to_obj_df(self.gpx_filename, use_pickle=self.use_pickle)
 
 
     @staticmethod
@@ -108,7 +177,7 @@ class ProcessRoadObjects:
         Calculates Meters Per Second speed between two point and time objects
         """
         # dist = geo.distance(point1.latitude, point1.longitude, point2.latitude, point2.longitude)
-        dist = geodesic(point1, point2).meters
+        dist = distance_m(point1, point2)
         time = (t2 - t1).total_seconds()  # timedelta converted to float
 
         if time > 0:
@@ -120,11 +189,39 @@ class ProcessRoadObjects:
         else:
             return 0.0
 
+    @property
+    def intersection_listDF(self) -> pd.DataFrame:
+        """ id / Intersection object DataFrame view of the registry (builds every object)
+        """
+        return self._registry_df(self.intersection_registry, "intersection_obj")
+
+    @intersection_listDF.setter
+    def intersection_listDF(self, df: pd.DataFrame) -> None:
+        self.intersection_registry = (
+            None if df is None else IntersectionRegistry.from_objects(df["intersection_obj"]))
+
+    @property
+    def generic_so_listDF(self) -> pd.DataFrame:
+        """ id / GenericStaticObject DataFrame view of the registry (builds every object)
+        """
+        return self._registry_df(self.generic_so_registry, "generic_so_obj")
+
+    @generic_so_listDF.setter
+    def generic_so_listDF(self, df: pd.DataFrame) -> None:
+        self.generic_so_registry = (
+            None if df is None else GenericObjectRegistry.from_objects(df["generic_so_obj"]))
+
+    @staticmethod
+    def _registry_df(registry, column):
+        if registry is None:
+            return None
+        return pd.DataFrame({"id": registry.ids, column: registry.objects()})
+
     def get_intersection_object_by_id(self, intersection_id):
-        return self.intersection_listDF.iloc[intersection_id-1, 1]
+        return self.intersection_registry.get(intersection_id)
     
     def get_generic_so_object_by_id(self, id):
-        return self.generic_so_listDF.iloc[id-1, 1]
+        return self.generic_so_registry.get(id)
     
     def get_static_object_type(self):
         return self.static_object_type
@@ -175,387 +272,378 @@ class ProcessRoadObjects:
             label = f'{i_compass_bearing} approach of {i_name_one} and {i_name_two} (#{sro_id}) at ~{i_sd} ft on {date_time}'
             return label
 
-    def load_generic_so_csv(self, generic_so_filename: str) -> pd.DataFrame:
-        """ Loads CSV file into Generic Static Object Class DataFrame
+    def load_generic_so_csv(self, generic_so_filename: str) -> None:
+        """ Loads CSV file into the Generic Static Object registry (see read_generic_so_csv)
+        """
+        self.read_generic_so_csv(generic_so_filename)
+
+    def read_generic_so_csv(self, generic_so_filename: str) -> GenericObjectRegistry:
+        """ Loads CSV file into a columnar Generic Static Object registry
         :param generic_so_filename: name of CSV file for loading (leave off .csv)
             Format: #,Street Name,latitude,longitude,direction,object type, distance
-        :return: dataframe of generic static objects in each row
-        """
-
-        csv_generic_so_file = Path(self.in_dir_path, generic_so_filename)
-        self.generic_so_load = {"id": [], "generic_so_obj": []}
-
-        with open(csv_generic_so_file, "r") as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter=",")
-            next(csv_reader, None)  # skip the header
-            line_count = 0
-            for row in csv_reader:
-                try:
-                    self.generic_so_load["id"].append(int(row[0]))
-                    self.generic_so_load["generic_so_obj"].append(GenericStaticObject(
-                        id_num = int(row[0]),
-                        street_name = str(row[1]),
-                        pt = Point(float(row[2]),float(row[3])),
-                        bearing = row[4],
-                        description = str(row[5]),
-                        distance_ft = float(row[6])            
-                    ))
-                except:
-                    print("Check intersection input file formatting.\n"
-                          "Input should be:\n"
-                          "#,Street Name,Latitude, Longitude, Bearing (NB,EB,SB,WB), Description, Distance (in feet)\n"
-                          )
-                line_count += 1
-            self.generic_so_listDF = pd.DataFrame(self.generic_so_load)
-            print(
-                f"Processed {line_count} lines of CSV file")
-            print(
-                f"for a total of {len(self.generic_so_listDF.index)} Generic Static Object(s)")
-            
+        :return: registry of generic static objects, one row per valid CSV row
+        """
+        return self.read_static_objects(generic_so_filename, kind="generic_so")
 
     def load_intersection_csv(self, intersection_filename: str) -> pd.DataFrame:
-        """ Loads CSV file into Intersection Class DataFrame
+        """ Loads CSV file into the Intersection registry (see read_intersection_csv)
+
+        :return: dataframe of intersections objects in each row, built from the registry
+        """
+        self.read_intersection_csv(intersection_filename)
+        return self.intersection_listDF
+
+    def read_intersection_csv(self, intersection_filename: str) -> IntersectionRegistry:
+        """ Loads CSV file into a columnar Intersection registry
 
         :param intersection_filename: name of CSV file for loading (leave off .csv)
             CSV Format: #,name1(N/S),name2(E/W),latitude,longitude,spd_N,spd_E,spd_S,spd_W,bearing_N,bearing_E,bearing_S,bearing_W,
-        :return: dataframe of intersections objects in each row
-        """
-
-        csv_intersection_file = Path(self.in_dir_path, intersection_filename)
-        self.intersection_load = {"id": [], "intersection_obj": []}
-        with open(csv_intersection_file, "r") as csv_file:
-            csv_reader = csv.reader(csv_file, delimiter=",")
-            next(csv_reader, None)  # skip the header
-            line_count = 0
-            count_sb_i = 0
-            for row in csv_reader:
-                columns_in_row = len(row)
-                if columns_in_row == 13:
-                    self.intersection_load["id"].append(int(row[0]))
-                    self.intersection_load["intersection_obj"].append(
-                        Intersection(
-                            int(row[0]),
-                            tuple((str(row[1]), str(row[2]))),
-                            Point(float(row[3]), float(row[4])),
-                            spd=tuple(
-                                (
-                                    int(row[5]),
-                                    int(row[6]),
-                                    int(row[7]),
-                                    int(row[8]),
-                                )
-                            ),
-                            bearing=tuple(
-                                (
-                                    float(row[9]),
-                                    float(row[10]),
-                                    float(row[11]),
-                                    float(row[12]),
-                                )
-                            ),
-                        )
-                    )
-                elif columns_in_row == 29:
-                    nb_sb_pts = eb_sb_pts = sb_sb_pts = wb_sb_pts = False
-                    if (row[13] and row[14] and
-                        row[15] and row[16]) != "": nb_sb_pts = True
-                    if (row[17] and row[18] and
-                        row[19] and row[20]) != "": eb_sb_pts = True
-                    if (row[21] and row[22] and
-                        row[23] and row[24]) != "": sb_sb_pts = True
-                    if (row[25] and row[26] and
-                        row[27] and row[28]) != "": wb_sb_pts = True
-
-                    self.intersection_load["id"].append(int(row[0]))
-                    temp_i = Intersection(
-                        int(row[0]),
-                        tuple((str(row[1]), str(row[2]))),
-                        Point(float(row[3]), float(row[4])),
-                        spd=tuple(
-                            (
-                                int(row[5]),
-                                int(row[6]),
-                                int(row[7]),
-                                int(row[8]),
-                            )
-                        ),
-                        bearing=tuple(
-                            (
-                                float(row[9]),
-                                float(row[10]),
-                                float(row[11]),
-                                float(row[12]),
-                            )
-                        ),
-                        stop_bar_nb=tuple((Point(row[13], row[14]), Point(row[15], row[16]))),
-                        stop_bar_eb=tuple((Point(row[17], row[18]), Point(row[19], row[20]))),
-                        stop_bar_sb=tuple((Point(row[21], row[22]), Point(row[23], row[24]))),
-                        stop_bar_wb=tuple((Point(row[25], row[26]), Point(row[27], row[28]))),
-                    )
-                    temp_i.set_sb_pts_bools((nb_sb_pts,eb_sb_pts,sb_sb_pts,wb_sb_pts))
-                    self.intersection_load["intersection_obj"].append(temp_i)
-                    
-                    if temp_i.all_sb_line_available(): count_sb_i += 1
-
-                    
-                else:
-                    print("Check intersection input file formatting.\n"
-                          "Input should be:\n"
-                          "#,Street Name1, Steet Name2, Latitude, Longitude, Speed Limit_NB, SL_EB, SL_SB, SL_WB, Bearing_NB, B_EB, B_SB, B_WB\n"
-                          "Optional additional input for stop bar lines after bearing\n"
-                          "NB_Left_StopBar_Latitude, NB_Left_StopBarLongitude, NB_Right_StopBar_Latitude, NB_Left_StopBar_Longitude\n"
-                          "Same for EB Stop Bar, SB Stop Bar, and WB Stop Bar\n"
-                          )
-                line_count += 1
-            self.intersection_listDF = pd.DataFrame(self.intersection_load)
+        :return: registry of intersections, one row per valid CSV row
+        """
+        return self.read_static_objects(intersection_filename, kind="intersection")
+
+    @_with_distance_backend
+    def read_static_objects(self, filename, kind: str = None, layer=None):
+        """ Loads a static object inventory (CSV, GeoJSON, GeoPackage) into its registry
+
+        Every row is validated and all bad rows are reported together before the
+        valid ones are loaded (see ssoss.ingest).
+
+        :param kind: "intersection" or "generic_so", detected from the columns when None
+        :param layer: layer of a multi-layer file such as a GeoPackage
+        :return: intersection or generic static object registry
+        """
+        so_file = Path(self.in_dir_path, filename)
+        so_digest = file_digest(so_file)
+        result = ingest_static_objects(so_file, kind=kind, layer=layer)
+        if result.errors:
+            print(f"Check {result.kind} input file formatting.\n{result.report()}")
+        registry = self.set_static_objects(result.registry, so_digest)
+        if result.kind == "intersection":
+            count_sb_i = int(registry.sb_available.all(axis=1).sum())
             print(
-                f"Processed {line_count} lines of CSV file for a total of {len(self.intersection_listDF.index)} intersections, \n \
+                f"Processed {result.rows_read} rows of {so_file.name} for a total of {len(registry)} intersections, \n \
                 and of those {count_sb_i} with stop bar information."
             )
-        return self.intersection_listDF
+        else:
+            print(f"Processed {result.rows_read} rows of {so_file.name}")
+            print(f"for a total of {len(registry)} Generic Static Object(s)")
+        return registry
 
-    def set_gpx_ver(self):
-        gpx_string = etree.tostring(etree.parse(self.gpx_file), encoding=str)
-        gpx_ver_10 = gpx_string.find("http://www.topografix.com/GPX/1/0")
-        gpx_ver_11 = gpx_string.find("http://www.topografix.com/GPX/1/1")
-        if gpx_ver_10 < 0 and gpx_ver_11 > 0:
-            self.gpx_ver = "1.1"
-            return self.gpx_ver
+    def set_static_objects(self, registry, so_digest=None):
+        """ Uses an already loaded intersection or generic static object registry
+
+        :param so_digest: digest of the inventory it was read from, kept on the registry as
+            ``source_digest`` to key annotation caches
+        :return: the registry
+        """
+        if so_digest is not None:
+            registry.source_digest = so_digest
+        if isinstance(registry, IntersectionRegistry):
+            self.static_object_type = "intersection"
+            self.intersection_registry = registry
+            self.so_digests["intersection"] = registry.source_digest
         else:
-            self.gpx_ver = "1.0"
-            return self.gpx_ver
+            self.static_object_type = "generic static object"
+            self.generic_so_registry = registry
+            self.so_digests["generic_so"] = registry.source_digest
+        return registry
+
+    @_with_distance_backend
+    def read_index_file(self, index_filename):
+        """ Loads a prebuilt index file into its registry by memory-mapping its columns
+
+        When the inventory the file was built from has changed since, that inventory is
+        read instead.
+
+        :return: intersection or generic static object registry
+        """
+        index_file = IndexFile(Path(self.in_dir_path, index_filename))
+        if index_file.is_stale():
+            print(f"{index_file.path} is older than {index_file.source_path}, reading that instead. "
+                  f"Rebuild with: ssoss index build {index_file.source_path}")
+            return self.read_static_objects(index_file.source_path)
+        # same key as reading the source, so annotation caches carry over
+        registry = self.set_static_objects(index_file.registry(), index_file.source_digest)
+        print(f"Mapped {len(registry)} static objects from {index_file.path.name}")
+        return registry
+
+    @_with_distance_backend
+    def read_inventory_tiles(self, lat=None, lon=None):
+        """ Loads the tiles of ``self.tiled_inventory`` near a track into the registry
+
+        :param lat, lon: track coordinates, every tile is read when None
+        :return: intersection or generic static object registry
+        """
+        inventory = self.tiled_inventory
+        tiles = sorted(inventory.tiles) if lat is None else inventory.tiles_for_track(lat, lon)
+        result = inventory.read(tiles)
+        registry = self.set_static_objects(result.registry, inventory.digest(tiles))
+        print(f"Read {len(tiles)} of {len(inventory.tiles)} inventory tiles: "
+              f"{len(registry)} of {len(inventory)} static objects")
+        return registry
+
+    def set_gpx_ver(self):
+        self.gpx_ver = sniff_gpx_version(self.gpx_file)
+        return self.gpx_ver
+
+    def resolve_gpx_file(self, gpx_filename: str) -> Path:
+        """ path of .gpx file, falling back to a gzip compressed .gpx.gz file
+        """
+        gpx_file = self.in_dir_path / self.in_gpx_dir_path / (gpx_filename + ".gpx")
+        gz_file = gpx_file.with_name(gpx_file.name + ".gz")
+        if not gpx_file.is_file() and gz_file.is_file():
+            return gz_file
+        return gpx_file
+
+    @property
+    def gpx_listDF(self) -> pd.DataFrame:
+        """ DataFrame with one GPXPoint per row (column "gpx_pt"), kept for backward compatibility.
+
+        Built on first access from ``self.track``; prefer the TrackArray columns for new code.
+        """
+        if self._gpx_listDF is None and self.track is not None:
+            self._gpx_listDF = pd.DataFrame({"gpx_pt": list(self.track.points())})
+        return self._gpx_listDF
+
+    @gpx_listDF.setter
+    def gpx_listDF(self, gpx_df: pd.DataFrame) -> None:
+        self._gpx_listDF = gpx_df
+        self.track = None if gpx_df is None else TrackArray.from_points(gpx_df.iloc[:, 0])
 
-    def load_gpx_to_obj_df(self, gpx_filename: str, gpx_ver = "1.0", use_pickle=True) -> pd.DataFrame:
-        """ Loads GPX file into point objects and returns a dataframe of all the points
+    @_with_distance_backend
+    def load_gpx_to_obj_df(self, gpx_filename: str, gpx_ver = "1.0", use_pickle=True) -> TrackArray:
+        """ Loads GPX file into a TrackArray of points and returns it
+
+        :param use_pickle: when True, load/save the content-hashed track cache in ./out/cache
         """
         self.gpx_filename = gpx_filename
         self.gpx_ver = gpx_ver
-        self.gpx_file = self.in_dir_path / self.in_gpx_dir_path / (gpx_filename + ".gpx")
-        self.pickle_file = self.out_dir_path / (gpx_filename + ".pkl")
+        self.gpx_file = self.resolve_gpx_file(gpx_filename)
         self.csv_file = self.out_dir_path / (gpx_filename + ".csv")
-        gpx_load = {"gpx_pt": []}
 
-        # initialize starting variables if GPX v1.1 needs speed calcs
-        pnt1 = Point()
-        t1 = None
+        gpx_cols = None
+        self.annotation_caches = {}
+        if use_pickle:
+            track_cache = TrackCache(self.out_dir_path / "cache", gpx_filename)
+            gpx_digest = self.gpx_digest = file_digest(self.gpx_file)
+            self.cache_file = track_cache.entry_path(gpx_digest)
+            gpx_cols = track_cache.load(gpx_digest)
+            if gpx_cols is not None:
+                print(
+                    f"Loaded track cache {self.cache_file} with {len(gpx_cols)} points"
+                )
 
-        if use_pickle and Path(self.pickle_file).is_file():
-            self.gpx_listDF = pd.read_pickle(self.pickle_file)
-            print(
-                f"Loaded Pickle file {self.pickle_file} into Dataframe with {self.gpx_listDF.last_valid_index()} rows"
-            )
-            if self.intersection_listDF is not None:
-                self.update_gpx_points(so_type="intersection")
-            if self.generic_so_listDF is not None:
-                self.update_gpx_points(so_type="generic_so")
-            self.gpx_summary()
-            return self.gpx_listDF
-        else:
+        if gpx_cols is None:
             print(
                 f"Using GPX file: {self.gpx_file}"
             )
+            gpx_cols = self.read_gpx_columns(self.gpx_file)
+            if use_pickle:
+                track_cache.save(gpx_digest, gpx_cols)
+                pd.DataFrame({"t": gpx_cols.time, "lat": gpx_cols.lat, "lon": gpx_cols.lon,
+                              "spd": gpx_cols.speed}).to_csv(self.csv_file)
+        self.gpx_ver = gpx_cols.version
+        if self.tiled_inventory is not None:
+            self.read_inventory_tiles(gpx_cols.lat, gpx_cols.lon)
+        if use_pickle:
+            self.annotation_caches = self.open_annotation_caches(gpx_filename, gpx_digest)
+
+        pt_count = len(gpx_cols)
+        self.track = TrackArray.from_columns(gpx_cols)  # includes vectorized kinematics
+        self.track.distance_cache_size = self.distance_cache_size
+        self._gpx_listDF = None
+        if self.projected and pt_count:
+            self.project_track()
+        self.sum_time_gap = float(self.track.time[-1] - self.track.time[0]) if pt_count else 0.0
+        print(
+            f"Processing {pt_count} points of GPX file."
+        )
+        # linear referencing works from the objects' side and needs no per-point annotations
+        if self.event_engine == "heuristic":
+            if self.intersection_registry is not None:
+                self.update_gpx_points(so_type = "intersection")
+            if self.generic_so_registry is not None:
+                self.update_gpx_points(so_type = "generic_so")
+        self.gpx_summary()
+        return self.track
 
-        self.gpx_ver = self.set_gpx_ver()
-        gpx_file_ref = open(self.gpx_file, "r")
+    def open_annotation_caches(self, gpx_filename: str, gpx_digest: str) -> dict:
+        """ AnnotationCache of every loaded static object kind with a known inventory digest,
+        so editing one inventory only misses the cache of its own kind
+        """
+        params = self.annotation_params()
+        return {
+            so_type: AnnotationCache(self.out_dir_path / "cache", gpx_filename,
+                                     annotation_key(gpx_digest, so_digest, params))
+            for so_type, so_digest in self.so_digests.items() if so_digest is not None
+        }
+
+    def project_track(self) -> LocalENU:
+        """ reproject the track and loaded static objects once into a LocalENU plane at the
+        track centroid, after which their distance and heading methods use planar kernels
+        """
+        self.projection = LocalENU.from_points(self.track.lat, self.track.lon)
+        self.track.project(self.projection)
+        for registry in (self.intersection_registry, self.generic_so_registry):
+            if registry is not None:
+                registry.set_projection(self.projection)
+        return self.projection
+
+    def distance_cache_stats(self) -> dict:
+        """ hit/miss counters of the point-to-object distance cache for this run
+        """
+        if self.track is None:
+            return {"hits": 0, "misses": 0, "evictions": 0, "size": 0, "hit_rate": 0.0}
+        return self.track.distance_cache_stats()
 
-        gpx = gpxpy.parse(gpx_file_ref, version=self.gpx_ver)
+    def read_gpx_columns(self, gpx_file) -> GPXColumns:
+        """ Parse GPX file into columns with local-timezone timestamps and speed filled in
+        """
+        gpx_cols = read_gpx(gpx_file)
 
         # determine timezone from first point
         tz_name = "UTC"
-        if gpx.tracks and gpx.tracks[0].segments and gpx.tracks[0].segments[0].points:
-            first = gpx.tracks[0].segments[0].points[0]
+        if len(gpx_cols) > 0:
             finder = TimezoneFinder()
-            tz_guess = finder.timezone_at(lng=first.longitude, lat=first.latitude)
+            tz_guess = finder.timezone_at(lng=gpx_cols.lon[0], lat=gpx_cols.lat[0])
             if tz_guess:
                 tz_name = tz_guess
-        tzinfo = ZoneInfo(tz_name)
-
-        pt_count = 0
-        for track in gpx.tracks:
-            for segment in track.segments:
-                for point in segment.points:
-                    if self.gpx_ver == "1.1":
-                        extra_data = {}
-                        if len(point.extensions) > 0:
-                            extension_data = {
-                                lxml.etree.QName(child).localname: float(child.text)
-                                for child in point.extensions[0]
-                            }
-                            for k, v in extension_data.items():
-                                extra_data[k] = v
-                            if point.speed is not None:
-                                point.speed = extra_data["speed"]
-
-                    p = Point(
-                        latitude=point.latitude,
-                        longitude=point.longitude,
-                    )
-
-                    # convert timestamp to local timezone
-                    local_time = point.time
-                    if local_time.tzinfo is None:
-                        local_time = local_time.replace(tzinfo=tzinfo)
-                    else:
-                        local_time = local_time.astimezone(tzinfo)
-
-                    if point.speed is not None:
-                        pass    # GPX v1.0 includes speed in track, v1.1 can include in extension data
-                    elif point.speed is None:  # GPX v1.1 speed calculation
-                        if pt_count == 0:
-                            point.speed = 0
-                            t1 = local_time
-                            pnt1 = p
-                        else:
-                            pnt0 = pnt1
-                            pnt1 = p
-                            t0 = t1
-                            t1 = local_time
-
-                            point.speed = self.speed_calc(pnt0, pnt1, t0, t1)
-
-                    gpx_load["gpx_pt"].append(
-                        GPXPoint(
-                            pt_count,
-                            local_time.isoformat(),
-                            tuple(p),  # tuple of point, lat and lon
-                            point.speed
-                                 )
-                    )
-                    pt_count += 1
-
-        self.gpx_listDF = pd.DataFrame(gpx_load)
-        if use_pickle:
-            self.gpx_listDF.to_pickle(self.pickle_file)
-            self.gpx_listDF.to_csv(self.csv_file)
-        print(
-            f"Processing {pt_count} points of GPX file."
-        )
-        if self.intersection_listDF is not None:
-            self.update_gpx_points(so_type = "intersection")
-        if self.generic_so_listDF is not None:
-            self.update_gpx_points(so_type = "generic_so")
-        self.gpx_summary()
-        return self.gpx_listDF
+        gpx_cols.localize(ZoneInfo(tz_name))
+        gpx_cols.timezone = tz_name
+
+        # GPX v1.0 includes speed in track, otherwise calculate from previous point
+        missing = np.isnan(gpx_cols.speed)
+        if missing.any():
+            gpx_cols.speed[missing] = derive_speed(gpx_cols.time, gpx_cols.lat, gpx_cols.lon)[missing]
+        return gpx_cols
 
+    @_with_distance_backend
     def update_gpx_points(self, so_type):
         """
-        updates gpx_prev_point and gpx_next_point as objects after the initial points
-        are loaded
+        annotates every point of the track with approaching static objects of ``so_type``
         """
-        # simplify variable names
-        last_index = self.gpx_listDF.last_valid_index()
-        gpx_df = self.gpx_listDF
-        cuml_d = 0.0
+        track = self.track
+        annotation_cache = self.annotation_caches.get(so_type)
+
+        if annotation_cache is not None:
+            candidates = annotation_cache.load_candidates(so_type)
+            if candidates is not None:
+                print(f"Loaded {len(candidates)} cached {so_type} approach annotations")
+                track.set_candidates(so_type, candidates)
+                return
+
+        # grid index built once per run so each block of points only checks nearby objects
+        index = self.build_static_index(so_type)
+        if self.workers > 1:
+            candidates = parallel_approach_candidates(track, index, so_type, self.workers)
+        else:
+            candidates = find_approach_candidates(track, index, so_type)
+        print(f"Found {len(candidates)} {so_type} approach annotations")
+        track.set_candidates(so_type, candidates)
 
-        # edge cases
-        gpx_df.iloc[0, 0].set_next_gpx_point(gpx_df.iloc[1, 0])
+        if annotation_cache is not None:
+            annotation_cache.save_candidates(so_type, track.candidates(so_type))
 
+    def build_static_index(self, so_type) -> StaticObjectIndex:
+        """
+        grid index over loaded static objects of ``so_type`` with their backflow search radius
+        (max sight distance for intersections, sight distance plus buffer for generic objects),
+        built once per registry unless it came prebuilt from an index file
+        """
+        if so_type == "intersection":
+            registry = self.intersection_registry
+        else:
+            registry = self.generic_so_registry
+        if registry.spatial_index is None:
+            registry.spatial_index = StaticObjectIndex(registry.lat, registry.lon, registry.search_radius_ft(),
+                                                       objects=registry, ids=registry.ids)
+        return registry.spatial_index
+
+    def annotation_params(self) -> dict:
+        """ algorithm parameters that change approach annotations or sighting events
+        """
+        return {
+            "intersection_sd_table": {str(k): v for k, v in Intersection.SPD_SD.items()},
+            "generic_so_buffer_ft": GPXPoint.GENERIC_SO_BUFFER_FT,
+            "generic_so_bearing_buffer": self.GENERIC_SO_BEARING_BUFFER,
+            "generic_so_time_buffer": self.GENERIC_SO_TIME_BUFFER,
+            "generic_so_dedup": "time_window_clusters",
+            "event_engine": self.event_engine,
+            "linear_reference_max_offset_ft": self.LINEAR_REFERENCE_MAX_OFFSET_FT,
+            "distance_backend": self.distance_backend,
+            "projected": self.projected,
+        }
 
-        for i in range(1, last_index):  # populate prev_gpx_points
-            gpx_df.iloc[i, 0].set_prev_gpx_point(gpx_df.iloc[i-1, 0])
-        for i in range(last_index-1, 0, -1):  # reversed range to populate next_gpx_points
-            gpx_df.iloc[i, 0].set_next_gpx_point(gpx_df.iloc[i+1, 0])
+    def get_start_timestamp(self):
+        return float(self.track.time[0])
 
-        # edge cases
-        gpx_df.iloc[0, 0].set_next_gpx_point(gpx_df.iloc[1, 0])
-        gpx_df.iloc[last_index, 0].set_prev_gpx_point(gpx_df.iloc[last_index - 1, 0])
+    def get_end_timestamp(self):
+        return float(self.track.time[-1])
 
-        # repopulate prev_gpx_point objects so next_gpx_points are not NONE
-        for i in range(1, last_index+1):
-            current_gpx_pt = gpx_df.iloc[i, 0]
-            current_gpx_pt.set_prev_gpx_point(gpx_df.iloc[i-1, 0])
-            self.sum_time_gap += current_gpx_pt.get_prev_timedelta()
-            cuml_d += current_gpx_pt.distance_to(current_gpx_pt.get_prev_gpx_point().get_location())
-            current_gpx_pt.set_cumulative_distance(cuml_d)
+    @_with_distance_backend
+    def detect_events(self, so_type) -> np.ndarray:
+        """
+        sight-distance events of the loaded track for the ``so_type`` static objects with the
+        selected event engine, before generic sightings are reduced to one per pass
 
-        # edge cases again
-        gpx_df.iloc[0, 0].set_next_gpx_point(gpx_df.iloc[1, 0])
+        :return: event table (``EVENT_DTYPE``)
+        """
+        if so_type == "intersection":
+            registry = self.intersection_registry
+        else:
+            registry = self.generic_so_registry
 
-        # display progress bar for calculating time-consuming/unoptimized backflow function
-        for i in tqdm(range(len(gpx_df.index))):
+        if self.event_engine == "linear_reference":
             if so_type == "intersection":
-                gpx_df.iloc[i, 0].backflow(self.intersection_listDF, "intersection")
-            elif so_type == "generic_so":
-                gpx_df.iloc[i, 0].backflow(self.generic_so_listDF, "generic_so")
-
-    def get_start_timestamp(self):
-        return self.gpx_listDF.iloc[0, 0].get_timestamp()
-
-    def get_end_timestamp(self):
-        last_index = self.gpx_listDF.last_valid_index()
-        return self.gpx_listDF.iloc[last_index, 0].get_timestamp()
-    
+                events, _ = intersection_events(self.track, registry, self.LINEAR_REFERENCE_MAX_OFFSET_FT)
+            else:
+                events, _ = generic_events(self.track, registry, self.LINEAR_REFERENCE_MAX_OFFSET_FT,
+                                           self.GENERIC_SO_BEARING_BUFFER)
+            return events
+
+        candidates = self.track.candidates(so_type)
+        if candidates is None:
+            candidates = np.zeros(0, dtype=CANDIDATE_DTYPE)
+        if so_type == "intersection":
+            if self.workers > 1:
+                return parallel_crossings(self.track, candidates, registry, "intersection", self.workers)
+            return detect_intersection_crossings(self.track, candidates, registry)
+        if self.workers > 1:
+            return parallel_crossings(self.track, candidates, registry, "generic_so", self.workers,
+                                      bearing_buffer_angle=self.GENERIC_SO_BEARING_BUFFER)
+        return detect_generic_crossings(self.track, candidates, registry, self.GENERIC_SO_BEARING_BUFFER)
+
+    @_with_distance_backend
     def generic_so_checks(self):
         """
         perform generic distance check on static road object
         """
-        gpx_df = self.gpx_listDF
-        all_generic_so = self.generic_so_listDF
-        generic_so_desc = []
-        generic_so_ts = []
-        generic_so_error = []
-        bearing_buffer_angle = 50
-        time_buffer = 3
-
-        for point in range(len(gpx_df.index)):
-            generic_so_info = gpx_df.iloc[point, 0].get_generic_so_approach_list()
-          
-            if generic_so_info:
-                p = gpx_df.iloc[point, 0]
-                generic_so_id, dist, approaching_bool = zip(*generic_so_info)
-                for item in range(len(list(generic_so_id))):
-                    sro_id = int(list(generic_so_id)[item])
-                    d_current = list(dist)[item]
-
-                    approach_generic_so = all_generic_so.iloc[sro_id-1, 1]  # shift by 1 for generic_so dataframe (starting at 0, not 1)
-                    approach_generic_so_sight_distance = approach_generic_so.get_sd()
-      
-                    if p.calc_bearing_diff(approach_generic_so.get_bearing()) < bearing_buffer_angle:
-                        print(
-                            f"Generic Object #{sro_id} at {approach_generic_so_sight_distance} ft at {p.get_timestamp()}"
-                        )
-                        prev_current_b4_next = p.generic_so_prev_and_current_before_next(approach_generic_so)
-                        next_less_than_current = p.generic_so_next_less_than_current(approach_generic_so)  
-                        neg_dist = p.distance_to(approach_generic_so.get_location()) - approach_generic_so_sight_distance
-                        #if prev_current_b4_next and next_less_than_current:
-                        filtered_sightings = p.generic_so_single_filter(approach_generic_so)
-                
-                        if filtered_sightings[0] and (neg_dist < 0):
-                            t_acc = p.t_to_generic_so_acc(approach_generic_so)
-                            print(
-                                f"Generic Object #{sro_id} at {approach_generic_so_sight_distance} ft acc shift by {t_acc} with error {filtered_sightings[1]} ft"
-                            )
-                
-                            t_shift_acc = p.get_timestamp() + t_acc
-                            if approach_generic_so.print_detail_info() in generic_so_desc:
-                                index_item = generic_so_desc.index(approach_generic_so.print_detail_info())
-                                if t_shift_acc-time_buffer < generic_so_ts[index_item] < t_shift_acc + time_buffer:
-                                    if filtered_sightings[1] < generic_so_error[index_item]:
-                                        # remove
-                                        del generic_so_desc[index_item]
-                                        del generic_so_ts[index_item]
-                                        del generic_so_error[index_item]
-                                        # append
-                                        generic_so_desc.append(approach_generic_so.print_detail_info())
-                                        generic_so_ts.append(t_shift_acc)
-                                        generic_so_error.append(filtered_sightings[1])
-                            else:
-                                generic_so_desc.append(approach_generic_so.print_detail_info())
-                                #generic_so_sights.append(self.generic_so_description(sro_id, approach_generic_so_sight_distance, t_shift_acc))
-                                generic_so_ts.append(t_shift_acc)
-                                generic_so_error.append(filtered_sightings[1])
-        
-     
+        annotation_cache = self.annotation_caches.get("generic_so")
+        if annotation_cache is not None:
+            cached = annotation_cache.load_events("generic_so")
+            if cached is not None:
+                self.generic_so_approaches = len(cached)
+                return cached
+
+        all_generic_so = self.generic_so_registry
+        events = self.detect_events("generic_so")
+        for e in events:
+            print(
+                f"Generic Object #{int(e['id'])} at {e['sight_distance']:g} ft acc shift by {float(e['time']) - self.track.time[e['point']]} with error {float(e['error'])} ft"
+            )
+
+        # one sighting per pass of each object, the one closest to its sight distance
+        events = cluster_events(events, self.GENERIC_SO_TIME_BUFFER)
+        generic_so_desc = [all_generic_so.get(int(e["id"])).print_detail_info() for e in events]
+        generic_so_ts = [float(t) for t in events["time"]]
         updated_desc = self.include_timestamp_to_description(generic_so_desc, generic_so_ts)
-        z = zip(updated_desc, generic_so_ts)  # create tuples with generic Static Object descriptions,timestamps and errors
-        id_ts_error = list(z)  # convert zip to list
-        time_sort = sorted(id_ts_error, key=lambda x: x[1])  # sort the list by timestamps
-        #id_sort = sorted(id_ts_error, key=lambda x: x[0])  # sort the list by id
-        #error_sort = sorted(id_ts_error, key=lambda x: x[2])  # sort the list by errors
-       
+        time_sort = list(zip(updated_desc, generic_so_ts))
+
         self.generic_so_approaches = len(time_sort)
+        if annotation_cache is not None:
+            annotation_cache.save_events("generic_so", time_sort)
         return time_sort
-    
 
     @staticmethod
     def include_timestamp_to_description(desc, ts):
@@ -566,49 +654,38 @@ class ProcessRoadObjects:
             desc[i] = desc[i] + "-" + str(round(ts[i],3))
         return desc
 
+    @_with_distance_backend
     def intersection_checks(self):
         """
         perform intersection sight distance checks.
         find timestamp of intersection approach sight distance locations
         check each GPX point
         """
-        gpx_df = self.gpx_listDF
-        all_intersections = self.intersection_listDF
+        annotation_cache = self.annotation_caches.get("intersection")
+        if annotation_cache is not None:
+            cached = annotation_cache.load_events("intersection")
+            if cached is not None:
+                self.intersection_approaches = len(cached)
+                return cached
+
         intersection_sd = []  # store intersection id & index in list
         intersection_ts = []  # store timestamps in list
 
-        for point in range(len(gpx_df.index)):
-            intersections_info = gpx_df.iloc[point, 0].get_intersection_approach_list()
-            if intersections_info:
-                p = gpx_df.iloc[point, 0]
-                intersection_id, bearing_index, dist, approach = zip(*intersections_info)
-                for item in range(len(list(intersection_id))):
-                    sro_id = int(list(intersection_id)[item])
-                    b_index = int(list(bearing_index)[item])
-                    d_current = list(dist)[item]
-
-                    approach_intersection = all_intersections.iloc[sro_id-1, 1]  
-                    approach_intersection_sight_distance = approach_intersection.get_sd(b_index)
-
-                    prev_current_b4_next = p.h_prev_and_current_before_next(approach_intersection, b_index)
-                    next_less_than_current = p.h_next_less_than_current(approach_intersection, b_index)
-                    simple_int_approach = p.simple_intersection_approach(approach_intersection, b_index)
-       
-                    if (prev_current_b4_next and next_less_than_current):
-                    #if simple_int_approach:
-                        t_acc = p.t_to_approach_acc(approach_intersection, b_index)
-                        print(
-                            f"Signal #{sro_id}.{b_index} at {approach_intersection_sight_distance} ft acc shift by {t_acc}"
-                        )
-
-                        t_shift_acc = p.get_timestamp() + t_acc
-                        intersection_sd.append(self.intersection_frame_description(sro_id, b_index, d_current, t_shift_acc))
-                        intersection_ts.append(t_shift_acc)
+        events = self.detect_events("intersection")
+        for e in events:
+            sro_id, b_index, t_shift_acc = int(e["id"]), int(e["leg"]), float(e["time"])
+            print(
+                f"Signal #{sro_id}.{b_index} at {e['sight_distance']:g} ft acc shift by {t_shift_acc - self.track.time[e['point']]}"
+            )
+            intersection_sd.append(self.intersection_frame_description(sro_id, b_index, float(e["distance"]), t_shift_acc))
+            intersection_ts.append(t_shift_acc)
 
         z = zip(intersection_sd, intersection_ts)  # create tuples with intersection descriptions and timestamps
         id_ts = list(z)  # convert zip to list
         ret = sorted(id_ts, key=lambda x: x[1])  # sort the list by timestamps
         self.intersection_approaches = len(ret)
+        if annotation_cache is not None:
+            annotation_cache.save_events("intersection", ret)
         return ret
 
 
@@ -634,23 +711,21 @@ class ProcessRoadObjects:
             return f'{round(Distance(feet=d_ft).miles, 2)} miles'
 
     def gpx_summary(self):
-        gpx_df = self.gpx_listDF
-        last_index = gpx_df.last_valid_index()
-        self.sum_total_points = last_index + 1  # pd dataframe starts at zero
+        track = self.track
+        last_index = track.last_index()
+        self.sum_total_points = last_index + 1  # track index starts at zero
         avg_time_gap = round(self.sum_time_gap / self.sum_total_points, 2)
         tot_sec = round(self.get_end_timestamp() - self.get_start_timestamp(), 2)
-        tot_distance = gpx_df.iloc[last_index, 0].get_cumulative_distance()
+        tot_distance = float(track.cumulative_distance[last_index])
 
         if self.sum_total_points > 0:
-            conv = gpx_df.iloc[0, 0].FTPStoMPH
-            spd_vals = [gpx_df.iloc[i, 0].get_speed() for i in range(self.sum_total_points)]
-            spd_mph = [s * conv for s in spd_vals]
+            conv = GPXPoint.FTPStoMPH
+            spd_mph = track.speed * GPXPoint.MStoFTPS * conv
             avg_speed = round((tot_distance / tot_sec) * conv, 2) if tot_sec > 0 else 0.0
-            max_speed = round(max(spd_mph), 2)
-            min_speed = round(min(spd_mph), 2)
+            max_speed = round(float(spd_mph.max()), 2)
+            min_speed = round(float(spd_mph.min()), 2)
             if self.sum_total_points > 1:
-                acc_vals = [gpx_df.iloc[i, 0].acceleration() for i in range(self.sum_total_points - 1)]
-                avg_acc = round(statistics.mean(acc_vals) * conv, 2)
+                avg_acc = round(float(track.acceleration[:last_index].mean()) * conv, 2)
             else:
                 avg_acc = 0.0
         else:
@@ -687,24 +762,23 @@ class ProcessRoadObjects:
     def avg_speed(spd1, spd2):
         return (spd1 + spd2) / 2
 
-    def get_speed_at_timestamp(self, ts):
-        point_list = self.gpx_listDF
-        last_point = len(point_list)-1
-        speed = None
-
-        #  boundary conditions
-        #  first point check
-        if ts < point_list.iloc[0, 0].get_timestamp():
+    def _bracket_index(self, ts):
+        """ index i of the first GPX point pair with time[i] <= ts <= time[i+1], None if outside track
+        """
+        track = self.track
+        if track is None or len(track) == 0:
             return None
-        #  last point check
-        if ts > point_list.iloc[last_point, 0].get_timestamp():
+        if ts < track.time[0] or ts > track.time[-1]:
             return None
+        i = int(np.searchsorted(track.time, ts, side="left")) - 1
+        return min(max(i, 0), max(len(track) - 2, 0))
 
-        for i in range(len(point_list)-1):
-            if point_list.iloc[i, 0].get_timestamp() <= ts <= point_list.iloc[i + 1, 0].get_timestamp():
-                speed = self.avg_speed(point_list.iloc[i, 0].get_speed(), point_list.iloc[i+1, 0].get_speed())
-                break
-        return speed
+    def get_speed_at_timestamp(self, ts):
+        i = self._bracket_index(ts)
+        if i is None or len(self.track) < 2:
+            return None
+        spd = self.track.speed * GPXPoint.MStoFTPS
+        return self.avg_speed(spd[i], spd[i + 1])
 
     def get_location_at_timestamp(self, ts):
         """Return a geopy ``Point`` interpolated for ``ts``.
@@ -721,40 +795,19 @@ class ProcessRoadObjects:
             range of the loaded GPX data.
         """
 
-        points = self.gpx_listDF
-        if points is None or len(points) == 0:
+        i = self._bracket_index(ts)
+        if i is None:
             return None
-
-        last_idx = len(points) - 1
-
-        # Boundary checks
-        first_ts = points.iloc[0, 0].get_timestamp()
-        last_ts = points.iloc[last_idx, 0].get_timestamp()
-        if ts < first_ts or ts > last_ts:
-            return None
-
-        # Locate the two surrounding points
-        for i in range(last_idx):
-            p0 = points.iloc[i, 0]
-            p1 = points.iloc[i + 1, 0]
-            t0 = p0.get_timestamp()
-            t1 = p1.get_timestamp()
-            if t0 <= ts <= t1:
-                if t1 == t0:
-                    return p0.get_location()
-
-                ratio = (ts - t0) / (t1 - t0)
-                lat = p0.get_location().latitude + ratio * (
-                    p1.get_location().latitude - p0.get_location().latitude
-                )
-                lon = p0.get_location().longitude + ratio * (
-                    p1.get_location().longitude - p0.get_location().longitude
-                )
-                return Point(lat, lon)
-
-        return None
-
-
-
-
-
+        track = self.track
+        if len(track) == 1:
+            return Point(track.lat[0], track.lon[0])
+
+        t0 = track.time[i]
+        t1 = track.time[i + 1]
+        if t1 == t0:
+            return Point(track.lat[i], track.lon[i])
+
+        ratio = (ts - t0) / (t1 - t0)
+        lat = track.lat[i] + ratio * (track.lat[i + 1] - track.lat[i])
+        lon = track.lon[i] + ratio * (track.lon[i + 1] - track.lon[i])
+        return Point(lat, lon)
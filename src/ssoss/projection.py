@@ -0,0 +1,93 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from typing import Tuple
+
+import numpy as np
+
+from ssoss.distance import distance_ft_array
+from ssoss.kinematics import M_TO_FT, WGS84_A, WGS84_E2
+
+
+class LocalENU:
+    """Local East-North-Up plane anchored at one point of a drive.
+
+    Geodetic coordinates go through WGS84 earth-centered coordinates and are rotated into
+    the anchor's East-North plane (Up is dropped).  Planar distance between two nearby
+    points is within about ``1.2e-6`` of the geodesic when they are 10 km from the anchor
+    and within ``3e-5`` at 50 km, so one projection per drive makes distances, stop bar
+    offsets and headings plain float arithmetic.
+
+    Projected points of static objects are cached by (lat, lon) so each is projected once.
+    """
+
+    def __init__(self, lat0: float, lon0: float):
+        self.lat0 = float(lat0)
+        self.lon0 = float(lon0)
+        phi, lam = np.radians(self.lat0), np.radians(self.lon0)
+        self._sin_phi, self._cos_phi = np.sin(phi), np.cos(phi)
+        self._sin_lam, self._cos_lam = np.sin(lam), np.cos(lam)
+        self._origin = self._ecef(self.lat0, self.lon0)
+        self._cache = {}
+
+    @classmethod
+    def from_points(cls, lat, lon) -> "LocalENU":
+        """ anchor at the centroid of the points (mean latitude and longitude) """
+        return cls(float(np.mean(lat)), float(np.mean(lon)))
+
+    @staticmethod
+    def _ecef(lat, lon):
+        phi = np.radians(np.asarray(lat, dtype=np.float64))
+        lam = np.radians(np.asarray(lon, dtype=np.float64))
+        n_radius = WGS84_A / np.sqrt(1 - WGS84_E2 * np.sin(phi) ** 2)
+        return (n_radius * np.cos(phi) * np.cos(lam),
+                n_radius * np.cos(phi) * np.sin(lam),
+                n_radius * (1 - WGS84_E2) * np.sin(phi))
+
+    def forward(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """ (east, north) meters from the anchor """
+        x, y, z = self._ecef(lat, lon)
+        dx, dy, dz = x - self._origin[0], y - self._origin[1], z - self._origin[2]
+        east = -self._sin_lam * dx + self._cos_lam * dy
+        north = (-self._sin_phi * self._cos_lam * dx - self._sin_phi * self._sin_lam * dy
+                 + self._cos_phi * dz)
+        return east, north
+
+    def forward_point(self, p) -> Tuple[float, float]:
+        """ cached (east, north) of a geopy Point or (lat, lon) pair """
+        key = (p.latitude, p.longitude) if hasattr(p, "latitude") else (p[0], p[1])
+        en = self._cache.get(key)
+        if en is None:
+            e, n = self.forward(*key)
+            en = self._cache[key] = (float(e), float(n))
+        return en
+
+    @staticmethod
+    def distance_ft(en1, en2) -> float:
+        return float(np.hypot(en1[0] - en2[0], en1[1] - en2[1])) * M_TO_FT
+
+    @staticmethod
+    def distance_to_line_ft(en, en1, en2) -> float:
+        """ perpendicular distance (feet) from ``en`` to the line through ``en1`` and ``en2`` """
+        de, dn = en2[0] - en1[0], en2[1] - en1[1]
+        length = np.hypot(de, dn)
+        if length == 0:
+            return float(np.hypot(en[0] - en1[0], en[1] - en1[1])) * M_TO_FT
+        cross = de * (en[1] - en1[1]) - dn * (en[0] - en1[0])
+        return float(abs(cross) / length) * M_TO_FT
+
+    @staticmethod
+    def course(east1, north1, east2, north2) -> np.ndarray:
+        """ heading from point 1 to point 2, degrees clockwise from grid north [0, 360) """
+        de = np.asarray(east2, dtype=np.float64) - np.asarray(east1, dtype=np.float64)
+        dn = np.asarray(north2, dtype=np.float64) - np.asarray(north1, dtype=np.float64)
+        return (np.degrees(np.arctan2(de, dn)) + 360.0) % 360.0
+
+
+def track_distance_ft(track, idx, lat, lon) -> np.ndarray:
+    """ distance (feet) from track points ``idx`` to ``lat``/``lon``, planar when the track is projected
+    """
+    if track.projection is not None:
+        east, north = track.projection.forward(lat, lon)
+        return np.hypot(track.east[idx] - east, track.north[idx] - north) * M_TO_FT
+    return distance_ft_array(track.lat[idx], track.lon[idx], lat, lon)
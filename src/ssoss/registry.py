@@ -0,0 +1,266 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, Optional
+
+import geopy
+import numpy as np
+
+from ssoss.distance import distance_ft_array
+from ssoss.motion_road_object import GPXPoint
+from ssoss.static_road_object import GenericStaticObject, Intersection, stop_bar_arrays
+
+COMPASS_BEARING = {"NB": 0.0, "EB": 90.0, "SB": 180.0, "WB": 270.0}
+
+
+class StaticObjectRegistry(ABC):
+    """Columnar store of static road objects with a hash index on their ids.
+
+    Every attribute lives in a NumPy column indexed by row; ``row(id)`` is a dict lookup
+    so ids can be sparse or unordered.  Dataclass objects are only built when asked for
+    (``get``, ``[row]``, iteration) and are cached, so a statewide inventory costs a few
+    arrays until the objects near a drive are needed.
+    """
+
+    def __init__(self, ids):
+        self.ids = np.asarray(ids, dtype=np.int64).reshape(-1)
+        self._row: Dict[int, int] = {int(i): r for r, i in enumerate(self.ids)}
+        if len(self._row) != len(self.ids):
+            raise ValueError("static object ids must be unique")
+        self._sorter = np.argsort(self.ids, kind="stable")
+        self._views: Dict[int, object] = {}
+        self.projection = None
+        # StaticObjectIndex over these rows, built on first use or loaded from an index file
+        self.spatial_index = None
+        # file_digest of the inventory these rows were read from, keys annotation caches
+        self.source_digest = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, object_id) -> bool:
+        return int(object_id) in self._row
+
+    def row(self, object_id) -> int:
+        """ row of ``object_id``, KeyError when unknown """
+        return self._row[int(object_id)]
+
+    def rows(self, object_ids) -> np.ndarray:
+        """ rows of an array of ids, KeyError when any is unknown """
+        object_ids = np.asarray(object_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            if object_ids.size:
+                raise KeyError(int(object_ids.flat[0]))
+            return np.zeros(object_ids.shape, dtype=np.int64)
+        sorted_ids = self.ids[self._sorter]
+        pos = np.minimum(np.searchsorted(sorted_ids, object_ids), len(sorted_ids) - 1)
+        missing = sorted_ids[pos] != object_ids
+        if missing.any():
+            raise KeyError(int(object_ids[missing].flat[0]))
+        return self._sorter[pos]
+
+    def get(self, object_id):
+        """ object with ``object_id`` """
+        return self[self.row(object_id)]
+
+    def __getitem__(self, rows):
+        """ object at ``rows`` (int) or an object array for an index array / mask """
+        if isinstance(rows, (int, np.integer)):
+            r = int(rows) % len(self.ids) if rows < 0 else int(rows)
+            view = self._views.get(r)
+            if view is None:
+                view = self._views[r] = self._materialize(r)
+                if self.projection is not None:
+                    view.set_projection(self.projection)
+            return view
+        rows = np.arange(len(self.ids))[rows]
+        out = np.empty(len(rows), dtype=object)
+        for k, r in enumerate(rows):
+            out[k] = self[int(r)]
+        return out
+
+    def __iter__(self):
+        for r in range(len(self.ids)):
+            yield self[r]
+
+    def objects(self) -> list:
+        """ every object in row order (materializes all of them) """
+        return list(self)
+
+    def set_projection(self, projection) -> None:
+        """ apply ``projection`` to built objects and to objects built later """
+        self.projection = projection
+        for view in self._views.values():
+            view.set_projection(projection)
+
+    @abstractmethod
+    def _materialize(self, r: int):
+        """ object of row ``r``, built from the columns """
+
+
+class IntersectionRegistry(StaticObjectRegistry):
+    """Intersections as columns.
+
+    Columns: ids, name (m, 2), lat, lon, spd (m, 4) posted speed per leg, sd (m, 4) sight
+    distance per leg, bearing (m, 4), stop_bar (m, 4, 2, 2) lat/lon of both stop bar
+    points per leg (NaN without one), sb_available (m, 4), and the precomputed approach
+    point ``sb_target`` (m, 4, 2) and center-to-stop-bar distance ``sb_offset_ft`` (m, 4).
+    """
+
+    def __init__(self, ids, name, lat, lon, spd, bearing, stop_bar=None, sb_available=None,
+                 sb_target=None, sb_offset_ft=None):
+        """
+        :param sb_target, sb_offset_ft: stop bar geometry already computed by the caller,
+            worked out from ``stop_bar`` when None
+        """
+        super().__init__(ids)
+        m = len(self.ids)
+        self.name = np.asarray(name, dtype=object).reshape(m, 2)
+        self.lat = np.asarray(lat, dtype=np.float64).reshape(m)
+        self.lon = np.asarray(lon, dtype=np.float64).reshape(m)
+        self.spd = np.asarray(spd, dtype=np.int64).reshape(m, 4)
+        self.bearing = np.asarray(bearing, dtype=np.float64).reshape(m, 4)
+        if stop_bar is None:
+            stop_bar = np.full((m, 4, 2, 2), np.nan)
+        self.stop_bar = np.asarray(stop_bar, dtype=np.float64).reshape(m, 4, 2, 2)
+        if sb_available is None:
+            sb_available = np.zeros((m, 4), dtype=bool)
+        self.sb_available = np.asarray(sb_available, dtype=bool).reshape(m, 4)
+
+        sd_of = np.vectorize(lambda s: Intersection.SPD_SD.get(int(s), 175), otypes=[np.float64])
+        self.sd = sd_of(self.spd) if m else np.zeros((0, 4))
+        if sb_target is None or sb_offset_ft is None:
+            self._precompute_stop_bars()
+        else:
+            self.sb_target = np.asarray(sb_target, dtype=np.float64).reshape(m, 4, 2)
+            self.sb_offset_ft = np.asarray(sb_offset_ft, dtype=np.float64).reshape(m, 4)
+
+    def _precompute_stop_bars(self) -> None:
+        """ nearest stop bar point and its distance from the center for every leg,
+        the same choice as Intersection.get_location_sb and center_to_sb_distance
+        """
+        m = len(self.ids)
+        self.sb_target = np.broadcast_to(np.stack([self.lat, self.lon], axis=-1)[:, None, :],
+                                         (m, 4, 2)).copy()
+        self.sb_offset_ft = np.zeros((m, 4))
+        r, b = np.nonzero(self.sb_available)
+        if len(r) == 0:
+            return
+        bar = self.stop_bar[r, b]
+        d = distance_ft_array(self.lat[r, None], self.lon[r, None], bar[:, :, 0], bar[:, :, 1],
+                              default="geodesic")
+        nearest = np.argmin(d, axis=1)
+        self.sb_target[r, b] = bar[np.arange(len(r)), nearest]
+        self.sb_offset_ft[r, b] = d[np.arange(len(r)), nearest]
+
+    @classmethod
+    def from_objects(cls, intersections: Iterable[Intersection]) -> "IntersectionRegistry":
+        """ registry over existing Intersection objects, which ``get`` returns as is """
+        objects = list(intersections)
+        m = len(objects)
+        target, offset, available = stop_bar_arrays(objects)
+        stop_bar = np.full((m, 4, 2, 2), np.nan)
+        for r, o in enumerate(objects):
+            for b in range(4):
+                if available[r, b]:
+                    stop_bar[r, b] = [(p.latitude, p.longitude) for p in o.stop_bar_d[b]]
+        registry = cls(
+            [o.get_id_num() for o in objects],
+            [tuple(o.name) for o in objects],
+            [o.get_location().latitude for o in objects],
+            [o.get_location().longitude for o in objects],
+            [o.spd for o in objects],
+            [o.get_bearingT() for o in objects],
+            stop_bar=stop_bar,
+            sb_available=available,
+            sb_target=target,
+            sb_offset_ft=offset,
+        )
+        registry._views = dict(enumerate(objects))
+        return registry
+
+    def search_radius_ft(self) -> np.ndarray:
+        """ backflow search radius, Intersection.get_sd("max") for every row """
+        return np.full(len(self.ids), Intersection.SPD_SD[60] * 1.5)
+
+    def _materialize(self, r: int) -> Intersection:
+        stop_bars = {}
+        for b, leg in enumerate(("nb", "eb", "sb", "wb")):
+            if self.sb_available[r, b]:
+                stop_bars[f"stop_bar_{leg}"] = tuple(geopy.Point(*p) for p in self.stop_bar[r, b])
+        intersection = Intersection(
+            int(self.ids[r]),
+            (str(self.name[r, 0]), str(self.name[r, 1])),
+            geopy.Point(self.lat[r], self.lon[r]),
+            spd=tuple(int(s) for s in self.spd[r]),
+            bearing=tuple(float(b) for b in self.bearing[r]),
+            **stop_bars,
+        )
+        if self.sb_available[r].any():
+            intersection.set_sb_pts_bools(tuple(bool(a) for a in self.sb_available[r]))
+        return intersection
+
+
+class GenericObjectRegistry(StaticObjectRegistry):
+    """Generic static objects as columns.
+
+    Columns: ids, street_name, lat, lon, bearing (degrees), description and
+    sight_distance_ft.
+    """
+
+    def __init__(self, ids, street_name, lat, lon, bearing, description, sight_distance_ft):
+        super().__init__(ids)
+        m = len(self.ids)
+        self.street_name = np.asarray(street_name, dtype=object).reshape(m)
+        self.lat = np.asarray(lat, dtype=np.float64).reshape(m)
+        self.lon = np.asarray(lon, dtype=np.float64).reshape(m)
+        self.bearing = np.array([compass_bearing(b) for b in bearing], dtype=np.float64).reshape(m)
+        self.description = np.asarray(description, dtype=object).reshape(m)
+        self.sight_distance_ft = np.asarray(sight_distance_ft, dtype=np.float64).reshape(m)
+
+    @classmethod
+    def from_objects(cls, generic_objects: Iterable[GenericStaticObject]) -> "GenericObjectRegistry":
+        """ registry over existing GenericStaticObject objects, which ``get`` returns as is """
+        objects = list(generic_objects)
+        registry = cls(
+            [o.get_id_num() for o in objects],
+            [o.get_name() for o in objects],
+            [o.get_location().latitude for o in objects],
+            [o.get_location().longitude for o in objects],
+            [o.get_bearing() for o in objects],
+            [o.get_description() for o in objects],
+            [o.get_sd() for o in objects],
+        )
+        registry._views = dict(enumerate(objects))
+        return registry
+
+    def search_radius_ft(self) -> np.ndarray:
+        """ backflow search radius, sight distance plus the generic object buffer """
+        return self.sight_distance_ft + GPXPoint.GENERIC_SO_BUFFER_FT
+
+    def _materialize(self, r: int) -> GenericStaticObject:
+        return GenericStaticObject(
+            id_num=int(self.ids[r]),
+            street_name=str(self.street_name[r]),
+            pt=geopy.Point(self.lat[r], self.lon[r]),
+            bearing=float(self.bearing[r]),
+            description=str(self.description[r]),
+            distance_ft=float(self.sight_distance_ft[r]),
+        )
+
+
+def compass_bearing(bearing) -> float:
+    """ degrees for "NB"/"EB"/"SB"/"WB" or a numeric bearing, as GenericStaticObject does """
+    if isinstance(bearing, str):
+        return COMPASS_BEARING[bearing]
+    return float(bearing)
+
+
+def as_registry(objects, so_type: str) -> Optional[StaticObjectRegistry]:
+    """ ``objects`` when already a registry, otherwise a registry over the object sequence """
+    if objects is None or isinstance(objects, StaticObjectRegistry):
+        return objects
+    if so_type == "intersection":
+        return IntersectionRegistry.from_objects(objects)
+    return GenericObjectRegistry.from_objects(objects)
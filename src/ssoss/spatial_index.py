@@ -0,0 +1,121 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from typing import Tuple
+
+import numpy as np
+
+FT_TO_M = 0.3048
+# smallest WGS84 radius of curvature (meridional, at the equator); dividing by it
+# gives cell sizes that are never smaller than the true angular search radius
+_MIN_EARTH_RADIUS_M = 6335439.0
+_KEY_OFFSET = np.int64(1 << 31)
+
+
+class StaticObjectIndex:
+    """Uniform lat/lon grid index over static road objects.
+
+    Objects are bucketed into square-ish cells at least as large as the largest search
+    radius, stored as a sorted array of cell keys with start offsets (CSR layout).  A
+    query only looks at the 3x3 block of cells around a point, so candidate cost scales
+    with local object density instead of inventory size.  Results are a superset of the
+    objects within each object's ``radius_ft``; callers apply the exact distance test.
+    """
+
+    def __init__(self, lat, lon, radius_ft, objects=None, ids=None):
+        """
+        :param lat: object latitudes (degrees)
+        :param lon: object longitudes (degrees)
+        :param radius_ft: search radius per object (feet) or a single radius for all
+        :param objects: optional sequence of objects or StaticObjectRegistry aligned with lat/lon
+        :param ids: optional object id numbers aligned with lat/lon
+        """
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        self.radius_ft = np.broadcast_to(np.asarray(radius_ft, dtype=np.float64), self.lat.shape).copy()
+        if objects is None or hasattr(objects, "rows"):
+            # a StaticObjectRegistry is kept as is so its objects are only built when used
+            self.objects = objects
+        else:
+            self.objects = np.asarray(objects, dtype=object)
+        self.ids = None if ids is None else np.asarray(ids, dtype=np.int64)
+
+        n = len(self.lat)
+        max_radius_m = float(self.radius_ft.max()) * FT_TO_M if n else 1.0
+        self.cell_lat = np.degrees(max(max_radius_m, 1.0) / _MIN_EARTH_RADIUS_M)
+        max_abs_lat = min(float(np.abs(self.lat).max()) + self.cell_lat, 89.0) if n else 0.0
+        self.cell_lon = self.cell_lat / np.cos(np.radians(max_abs_lat))
+
+        keys = self._keys(*self._cells(self.lat, self.lon))
+        self.order = np.argsort(keys, kind="stable")
+        sorted_keys = keys[self.order]
+        self.cell_keys, self.cell_start = np.unique(sorted_keys, return_index=True)
+        self.cell_end = np.append(self.cell_start[1:], n).astype(np.int64)
+
+    # arrays that make up a built index, see from_arrays
+    ARRAYS = ("lat", "lon", "radius_ft", "order", "cell_keys", "cell_start", "cell_end")
+
+    @classmethod
+    def from_arrays(cls, arrays: dict, cell_lat: float, cell_lon: float,
+                    objects=None, ids=None) -> "StaticObjectIndex":
+        """ index over arrays saved from a built one (possibly memory-mapped), without
+        re-sorting the cell keys
+        """
+        index = cls.__new__(cls)
+        for name in cls.ARRAYS:
+            setattr(index, name, arrays[name])
+        index.cell_lat = float(cell_lat)
+        index.cell_lon = float(cell_lon)
+        index.objects = objects
+        index.ids = None if ids is None else np.asarray(ids, dtype=np.int64)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.lat)
+
+    def _cells(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        iy = np.floor(np.asarray(lat, dtype=np.float64) / self.cell_lat).astype(np.int64)
+        ix = np.floor(np.asarray(lon, dtype=np.float64) / self.cell_lon).astype(np.int64)
+        return iy, ix
+
+    @staticmethod
+    def _keys(iy, ix) -> np.ndarray:
+        return ((iy + _KEY_OFFSET) << 32) | (ix + _KEY_OFFSET)
+
+    def query_pairs(self, lat, lon) -> Tuple[np.ndarray, np.ndarray]:
+        """ candidate (point index, object index) pairs for arrays of query points
+
+        :return: two int64 arrays of equal length, grouped by point index
+        """
+        lat = np.atleast_1d(np.asarray(lat, dtype=np.float64))
+        lon = np.atleast_1d(np.asarray(lon, dtype=np.float64))
+        if len(self.lat) == 0 or len(lat) == 0:
+            empty = np.array([], dtype=np.int64)
+            return empty, empty
+
+        iy, ix = self._cells(lat, lon)
+        offsets = np.array([-1, 0, 1], dtype=np.int64)
+        nkeys = self._keys(
+            (iy[:, None, None] + offsets[None, :, None]),
+            (ix[:, None, None] + offsets[None, None, :]),
+        ).reshape(len(lat), 9)
+
+        slot = np.searchsorted(self.cell_keys, nkeys)
+        slot_c = np.minimum(slot, len(self.cell_keys) - 1)
+        hit = self.cell_keys[slot_c] == nkeys
+        start = np.where(hit, self.cell_start[slot_c], 0)
+        count = np.where(hit, self.cell_end[slot_c] - self.cell_start[slot_c], 0)
+
+        counts = count.ravel()
+        total = int(counts.sum())
+        point_idx = np.repeat(np.repeat(np.arange(len(lat), dtype=np.int64), 9), counts)
+        # position within each (point, cell) run, added to that cell's start offset
+        run_start = np.repeat(np.cumsum(counts) - counts, counts)
+        within = np.arange(total, dtype=np.int64) - run_start
+        obj_idx = self.order[np.repeat(start.ravel(), counts) + within]
+        return point_idx, obj_idx
+
+    def query_point(self, lat: float, lon: float) -> np.ndarray:
+        """ candidate object indices near a single point
+        """
+        return np.sort(self.query_pairs(lat, lon)[1])
@@ -117,6 +117,7 @@ def args_static_obj_gpx_video(
     frame_extract=("", ""),
     extra_out=(True, False, True, False),
     autosync=False,
+    workers=1,
 ):
 
     sightings = ""
@@ -124,6 +125,7 @@ def args_static_obj_gpx_video(
         project = process_road_objects.ProcessRoadObjects(
             gpx_filestring=gpx_file.name,
             generic_static_object_filestring=generic_so_file.name,
+            workers=workers,
         )
         if project.get_static_object_type() == "intersection":
             sightings = project.intersection_checks()
@@ -213,6 +215,14 @@ def main(argv=None):
         type=argparse.FileType("r"),
     )
 
+    so_and_gpx_group.add_argument(
+        "--workers",
+        metavar="N",
+        help="number of processes for finding sightings (default 1)",
+        type=int,
+        default=1,
+    )
+
     # Video file arguments
     video_group.add_argument(
         "-v",
@@ -323,7 +333,8 @@ def main(argv=None):
                               vid_sync = sync_input,
                               frame_extract = frames,
                               extra_out = lb_gif_flags,
-                              autosync = args.autosync
+                              autosync = args.autosync,
+                              workers = args.workers
                               )
 
 
@@ -6,9 +6,10 @@ from dataclasses import dataclass, field
 from typing import Tuple, Union
 
 import geopy
-import geopy.distance
 import numpy as np
 
+from ssoss.distance import distance_ft
+
 
 @dataclass
 class StaticRoadObject:
@@ -25,6 +26,25 @@ class StaticRoadObject:
         self.obj_type = type(self)
         self.pt = geopy.Point(self.ctr_pt.latitude, self.ctr_pt.longitude)
 
+    # LocalENU plane set by set_projection, distances become planar when present
+    projection = None
+
+    def set_projection(self, projection) -> None:
+        """ measure distances in ``projection`` and project this object's points once """
+        self.projection = projection
+        for p in self._projected_points():
+            projection.forward_point(p)
+
+    def _projected_points(self):
+        return [self.pt]
+
+    def _distance_ft(self, p1, p2, cache_p2=True) -> float:
+        if self.projection is not None:
+            en2 = (self.projection.forward_point(p2) if cache_p2
+                   else self.projection.forward(p2.latitude, p2.longitude))
+            return self.projection.distance_ft(self.projection.forward_point(p1), en2)
+        return distance_ft(p1, p2)
+
     def get_id_num(self) -> int:
         return int(self.id_num)
 
@@ -69,6 +89,13 @@ class GenericStaticObject:
         else:
             self.bearing = float(self.bearing)
 
+    # LocalENU plane set by set_projection
+    projection = None
+
+    def set_projection(self, projection) -> None:
+        """ project this object's location once into ``projection`` """
+        self.projection = projection
+        projection.forward_point(self.pt)
 
     def get_id_num(self) -> int:
         return int(self.id_num)
@@ -127,10 +154,27 @@ class TrafficControlSign(StaticRoadObject):
     pass
 
 
+# CA-MUTCD intersection sight distance (ft) by approach posted speed (MPH)
+INTERSECTION_SPD_SD = {
+    -999: 0,
+    20: 175,
+    25: 215,
+    30: 270,
+    35: 325,
+    40: 390,
+    45: 460,
+    50: 540,
+    55: 625,
+    60: 715,
+}
+
+
 @dataclass
 class Intersection(StaticRoadObject):
     """Static road object representing an intersection."""
 
+    SPD_SD = INTERSECTION_SPD_SD
+
     spd: Tuple[int, int, int, int]
     bearing: Tuple[float, float, float, float]
     stop_bar_nb: Tuple[geopy.Point, geopy.Point] = (
@@ -158,20 +202,14 @@ class Intersection(StaticRoadObject):
         Tuple[geopy.Point, geopy.Point],
         Tuple[geopy.Point, geopy.Point],
     ] = field(init=False)
+    # per leg, precomputed when the stop bar bools are set: (lat, lon) of the approach
+    # point (nearest stop bar point, or the center without a stop bar) and the
+    # center-to-stop-bar distance in feet (0 without a stop bar)
+    sb_target: np.ndarray = field(init=False, repr=False, compare=False)
+    sb_offset_ft: np.ndarray = field(init=False, repr=False, compare=False)
 
     def __post_init__(self) -> None:
-        self.spd_sd = {
-            -999: 0,
-            20: 175,
-            25: 215,
-            30: 270,
-            35: 325,
-            40: 390,
-            45: 460,
-            50: 540,
-            55: 625,
-            60: 715,
-        }
+        self.spd_sd = dict(self.SPD_SD)
 
         self.sd = (
             self.spd_sd.get(self.spd[0], 175),
@@ -180,7 +218,6 @@ class Intersection(StaticRoadObject):
             self.spd_sd.get(self.spd[3], 175),
         )
 
-        self.stop_bar_bools = (False, False, False, False)
         self.stop_bar_d = (
             self.stop_bar_nb,
             self.stop_bar_eb,
@@ -189,6 +226,10 @@ class Intersection(StaticRoadObject):
         )
 
         super().__post_init__()
+        self.set_sb_pts_bools((False, False, False, False))
+
+    def _projected_points(self):
+        return [self.pt, self.ctr_pt] + [p for bar in self.stop_bar_d for p in bar if p is not False]
 
     # TODO: Convert this to dictionary from input file, not hard coded values
     # @staticmethod
@@ -267,9 +308,26 @@ class Intersection(StaticRoadObject):
         return str(f'{self.get_id_num()}-{self.get_name()}')
     
     def set_sb_pts_bools(self, t):
-        """ set stop bar bools with a tuple
+        """ set stop bar bools with a tuple and precompute the stop bar geometry
         """
         self.stop_bar_bools = t
+        self._precompute_stop_bars()
+
+    def _precompute_stop_bars(self) -> None:
+        """ nearest stop bar point and center offset of every leg with a stop bar, so the
+        approach heuristics and event engines do not rerun the geodesics per call
+        """
+        self._sb_nearest = [None, None, None, None]
+        self.sb_target = np.tile([self.ctr_pt.latitude, self.ctr_pt.longitude], (4, 1))
+        self.sb_offset_ft = np.zeros(4)
+        for b in range(4):
+            if not self.stop_bar_bools[b]:
+                continue
+            d = [distance_ft(self.ctr_pt, p) for p in self.stop_bar_d[b]]
+            nearest = self.stop_bar_d[b][int(np.argmin(d))]
+            self._sb_nearest[b] = nearest
+            self.sb_target[b] = (nearest.latitude, nearest.longitude)
+            self.sb_offset_ft[b] = min(d)
 
     def sb_line_available(self, bearing_index) -> bool:
         """ check if specific approach stopbar line is available to use
@@ -290,16 +348,20 @@ class Intersection(StaticRoadObject):
 
         The intersection center point is stored in ``ctr_pt``.
         """
+        if self._sb_nearest[bearing_index] is not None:
+            return float(self.sb_offset_ft[bearing_index])
         min_distance = min(
-            geopy.distance.distance(self.ctr_pt, self.stop_bar_d[bearing_index][0]).ft,
-            geopy.distance.distance(self.ctr_pt, self.stop_bar_d[bearing_index][1]).ft,
+            self._distance_ft(self.ctr_pt, self.stop_bar_d[bearing_index][0]),
+            self._distance_ft(self.ctr_pt, self.stop_bar_d[bearing_index][1]),
         )
         return min_distance
     
     def get_location_sb(self, bearing_index) -> geopy.Point:
+        if self._sb_nearest[bearing_index] is not None:
+            return self._sb_nearest[bearing_index]
         shortest_index = np.argmin(
-            [geopy.distance.distance(self.ctr_pt, self.stop_bar_d[bearing_index][0]).ft,
-            geopy.distance.distance(self.ctr_pt, self.stop_bar_d[bearing_index][1]).ft]
+            [self._distance_ft(self.ctr_pt, self.stop_bar_d[bearing_index][0]),
+            self._distance_ft(self.ctr_pt, self.stop_bar_d[bearing_index][1])]
         )
         return self.stop_bar_d[bearing_index][shortest_index]
 
@@ -315,24 +377,30 @@ class Intersection(StaticRoadObject):
 
         # length of stop bar
         if self.stop_bar_d[direction][0] is False or self.stop_bar_d[direction][1] is False:
-            dist_to_ctr = geopy.distance.distance(self.pt, dynamic_pt).ft
+            dist_to_ctr = self._distance_ft(self.pt, dynamic_pt, cache_p2=False)
             return dist_to_ctr
         else:
-            a = geopy.distance.distance(self.stop_bar_d[direction][0],
-                                    self.stop_bar_d[direction][1]).ft
+            a = self._distance_ft(self.stop_bar_d[direction][0],
+                                  self.stop_bar_d[direction][1])
 
         # if length of stop bar is zero, use center of intersection point.
             if a <= 0 or self.stop_bar_d is None:
-                dist_to_ctr = geopy.distance.distance(self.pt, dynamic_pt).ft
+                dist_to_ctr = self._distance_ft(self.pt, dynamic_pt, cache_p2=False)
                 return dist_to_ctr
+            elif self.projection is not None and dynamic_pt is not None:
+                forward = self.projection.forward
+                return self.projection.distance_to_line_ft(
+                    forward(dynamic_pt.latitude, dynamic_pt.longitude),
+                    self.projection.forward_point(self.stop_bar_d[direction][0]),
+                    self.projection.forward_point(self.stop_bar_d[direction][1]))
             else:
                 if dynamic_pt is None:
                     pass
                 else:
                     # distance from dynamic point to inside lane stop bar point
-                    b = geopy.distance.distance(self.stop_bar_d[direction][0], dynamic_pt).ft
+                    b = distance_ft(self.stop_bar_d[direction][0], dynamic_pt)
                     # distance from dynamic point to outside lane stop bar point
-                    c = geopy.distance.distance(self.stop_bar_d[direction][1], dynamic_pt).ft
+                    c = distance_ft(self.stop_bar_d[direction][1], dynamic_pt)
 
             # calculate perpendicular distance between stop bar and dynamic object
             if a is not None and b is not None and c is not None:
@@ -344,6 +412,20 @@ class Intersection(StaticRoadObject):
                 return 0
 
 
+def stop_bar_arrays(intersections) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """ precomputed stop bar geometry of ``intersections`` stacked for the event engines
+
+    :return: approach point (m, 4, 2) lat/lon, center-to-stop-bar offset (m, 4) feet and
+        stop bar availability (m, 4) bool, indexed by intersection row and leg
+    """
+    intersections = list(intersections)
+    m = len(intersections)
+    target = np.array([i.sb_target for i in intersections], dtype=np.float64).reshape(m, 4, 2)
+    offset = np.array([i.sb_offset_ft for i in intersections], dtype=np.float64).reshape(m, 4)
+    available = np.array([i.stop_bar_bools for i in intersections], dtype=bool).reshape(m, 4)
+    return target, offset, available
+
+
 def main():
     print("Initialize and Load Static Road Object File")
     print("Copy CSV file into ./in/ folder, where ./ is the current directory")
@@ -0,0 +1,215 @@
+# !/usr/bin/env python
+# coding: utf-8
+"""Geohash-tiled static object inventories.
+
+A tiled inventory is a directory holding one CSV per geohash cell, in the same
+positional format as the single-file inventories (see ssoss.ingest), plus a
+``tiles.json`` manifest with the object kind, the geohash precision, the largest
+search radius and a count and content hash per tile.  A drive only reads the tiles
+that intersect its bounding box buffered by that search radius, so a statewide
+inventory loads as quickly as the few cells a track passes through.
+"""
+
+import hashlib
+import json
+from pathlib import Path
+from typing import List, Optional
+
+import click
+import numpy as np
+import pandas as pd
+
+from ssoss.ingest import (GENERIC_COLUMNS, INTERSECTION_COLUMNS, LEGS, IngestResult,
+                          read_static_objects)
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry
+from ssoss.track_cache import file_digest
+
+MANIFEST = "tiles.json"
+TILE_FORMAT_VERSION = 1
+DEFAULT_PRECISION = 5  # ~4.9 km x 4.9 km cells
+GEOHASH_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+FT_PER_DEGREE_LAT = 364_000.0  # approximate, only used to buffer bounding boxes
+
+
+def _bits(precision: int):
+    """ (lat bits, lon bits) of a geohash with ``precision`` characters """
+    total = 5 * precision
+    return total // 2, total - total // 2
+
+
+def _cell_indices(lat, lon, precision: int):
+    lat_bits, lon_bits = _bits(precision)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    i_lat = np.clip(np.floor((lat + 90.0) / 180.0 * (1 << lat_bits)), 0, (1 << lat_bits) - 1)
+    i_lon = np.clip(np.floor((lon + 180.0) / 360.0 * (1 << lon_bits)), 0, (1 << lon_bits) - 1)
+    return i_lat.astype(np.uint64), i_lon.astype(np.uint64)
+
+
+def _encode_cells(i_lat, i_lon, precision: int) -> np.ndarray:
+    """ geohash strings of integer cell indices, bits interleaved starting with longitude """
+    lat_bits, lon_bits = _bits(precision)
+    total = 5 * precision
+    i_lat = np.asarray(i_lat, dtype=np.uint64)
+    i_lon = np.asarray(i_lon, dtype=np.uint64)
+    code = np.zeros(i_lat.shape, dtype=np.uint64)
+    for j in range(lon_bits):
+        bit = (i_lon >> np.uint64(lon_bits - 1 - j)) & np.uint64(1)
+        code |= bit << np.uint64(total - 1 - 2 * j)
+    for j in range(lat_bits):
+        bit = (i_lat >> np.uint64(lat_bits - 1 - j)) & np.uint64(1)
+        code |= bit << np.uint64(total - 2 - 2 * j)
+    shifts = np.uint64(5) * np.arange(precision - 1, -1, -1, dtype=np.uint64)
+    digits = ((code.reshape(-1, 1) >> shifts) & np.uint64(31)).astype(np.int64)
+    alphabet = np.frombuffer(GEOHASH_BASE32.encode(), dtype=np.uint8)
+    chars = np.ascontiguousarray(alphabet[digits])
+    return chars.view(f"S{precision}").reshape(code.shape).astype(str)
+
+
+def geohash(lat, lon, precision: int = DEFAULT_PRECISION) -> np.ndarray:
+    """ geohash of every lat/lon pair """
+    i_lat, i_lon = _cell_indices(lat, lon, precision)
+    return _encode_cells(i_lat, i_lon, precision)
+
+
+def geohashes_in_bounds(lat_min, lon_min, lat_max, lon_max,
+                        precision: int = DEFAULT_PRECISION) -> np.ndarray:
+    """ every geohash cell intersecting the bounding box """
+    lat_lo, lon_lo = _cell_indices(lat_min, lon_min, precision)
+    lat_hi, lon_hi = _cell_indices(lat_max, lon_max, precision)
+    i_lat, i_lon = np.meshgrid(np.arange(lat_lo, lat_hi + 1, dtype=np.uint64),
+                               np.arange(lon_lo, lon_hi + 1, dtype=np.uint64), indexing="ij")
+    return _encode_cells(i_lat.ravel(), i_lon.ravel(), precision)
+
+
+def _registry_table(registry) -> pd.DataFrame:
+    """ registry rows in the positional CSV layout read by ssoss.ingest """
+    if isinstance(registry, IntersectionRegistry):
+        stop_bar = np.where(registry.sb_available[:, :, None, None], registry.stop_bar, np.nan)
+        columns = [registry.ids, registry.name[:, 0], registry.name[:, 1], registry.lat, registry.lon]
+        columns += [registry.spd[:, b] for b in range(len(LEGS))]
+        columns += [registry.bearing[:, b] for b in range(len(LEGS))]
+        columns += list(stop_bar.reshape(len(registry), -1).T)
+        names = INTERSECTION_COLUMNS
+    else:
+        columns = [registry.ids, registry.street_name, registry.lat, registry.lon, registry.bearing,
+                   registry.description, registry.sight_distance_ft]
+        names = GENERIC_COLUMNS
+    return pd.DataFrame(dict(zip(names, columns)))
+
+
+def write_tiled_inventory(source, out_dir, precision: int = DEFAULT_PRECISION,
+                          kind: Optional[str] = None, layer=None) -> IngestResult:
+    """ split a static object inventory into geohash tiles under ``out_dir``
+
+    Bad rows are left out (see the returned result's report); old tiles in
+    ``out_dir`` are replaced.
+
+    :param source: inventory file (CSV, GeoJSON, GeoPackage) or an existing registry
+    """
+    if isinstance(source, (IntersectionRegistry, GenericObjectRegistry)):
+        kind = "intersection" if isinstance(source, IntersectionRegistry) else "generic_so"
+        result = IngestResult(kind, source, len(source))
+    else:
+        result = read_static_objects(source, kind=kind, layer=layer)
+    registry = result.registry
+
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for old in out_dir.glob("*.csv"):
+        old.unlink()
+
+    table = _registry_table(registry)
+    cells = geohash(registry.lat, registry.lon, precision) if len(registry) else np.zeros(0, dtype=str)
+    tiles = {}
+    for cell in sorted(set(cells.tolist())):
+        path = out_dir / f"{cell}.csv"
+        table[cells == cell].to_csv(path, index=False)
+        tiles[cell] = {"count": int(np.sum(cells == cell)), "digest": file_digest(path)}
+
+    search_radius = registry.search_radius_ft()
+    manifest = {
+        "format_version": TILE_FORMAT_VERSION,
+        "kind": result.kind,
+        "precision": precision,
+        "search_radius_ft": float(search_radius.max()) if len(search_radius) else 0.0,
+        "tiles": tiles,
+    }
+    (out_dir / MANIFEST).write_text(json.dumps(manifest, indent=1))
+    return result
+
+
+def is_tiled_inventory(path) -> bool:
+    """ True for a tiled inventory directory or its manifest file """
+    path = Path(path)
+    return (path.is_dir() and (path / MANIFEST).is_file()) or path.name == MANIFEST
+
+
+class TiledInventory:
+    """Reader for a directory written by ``write_tiled_inventory``."""
+
+    def __init__(self, path):
+        path = Path(path)
+        self.root = path.parent if path.name == MANIFEST else path
+        manifest = json.loads((self.root / MANIFEST).read_text())
+        if manifest.get("format_version") != TILE_FORMAT_VERSION:
+            raise ValueError(f"{self.root} is not a version {TILE_FORMAT_VERSION} tiled inventory")
+        self.kind = manifest["kind"]
+        self.precision = int(manifest["precision"])
+        self.search_radius_ft = float(manifest["search_radius_ft"])
+        self.tiles = manifest["tiles"]
+
+    def __len__(self) -> int:
+        return sum(t["count"] for t in self.tiles.values())
+
+    def tiles_for_bounds(self, lat_min, lon_min, lat_max, lon_max) -> List[str]:
+        """ stored tiles intersecting the bounding box """
+        cells = geohashes_in_bounds(lat_min, lon_min, lat_max, lon_max, self.precision)
+        return sorted(set(cells.tolist()) & set(self.tiles))
+
+    def tiles_for_track(self, lat, lon, buffer_ft: Optional[float] = None) -> List[str]:
+        """ stored tiles intersecting the track's bounding box grown by ``buffer_ft``
+        (the inventory's largest search radius when None)
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        if lat.size == 0:
+            return []
+        buffer_ft = self.search_radius_ft if buffer_ft is None else buffer_ft
+        d_lat = buffer_ft / FT_PER_DEGREE_LAT
+        cos_lat = max(np.cos(np.radians(min(np.abs(lat).max() + d_lat, 89.0))), 1e-6)
+        d_lon = d_lat / cos_lat
+        return self.tiles_for_bounds(lat.min() - d_lat, lon.min() - d_lon,
+                                     lat.max() + d_lat, lon.max() + d_lon)
+
+    def digest(self, tiles: List[str]) -> str:
+        """ content hash of a set of tiles, used to key the annotation cache """
+        h = hashlib.blake2b(digest_size=20)
+        h.update(f"{self.kind}:{self.precision}".encode())
+        for cell in sorted(tiles):
+            h.update(f"{cell}:{self.tiles[cell]['digest']}".encode())
+        return h.hexdigest()
+
+    def read(self, tiles: Optional[List[str]] = None) -> IngestResult:
+        """ registry of the objects in ``tiles`` (every tile when None) """
+        tiles = sorted(self.tiles) if tiles is None else tiles
+        return read_static_objects([self.root / f"{cell}.csv" for cell in tiles], kind=self.kind)
+
+    def read_for_track(self, lat, lon, buffer_ft: Optional[float] = None) -> IngestResult:
+        """ registry of the objects near a track, see tiles_for_track """
+        return self.read(self.tiles_for_track(lat, lon, buffer_ft))
+
+
+@click.command("build-tiles")
+@click.argument("inventory", type=click.Path(exists=True, dir_okay=False))
+@click.option("--output-dir", type=click.Path(file_okay=False), required=True)
+@click.option("--precision", type=click.IntRange(1, 12), default=DEFAULT_PRECISION, show_default=True,
+              help="Geohash characters per tile")
+@click.option("--layer", help="Layer of a multi-layer inventory such as a GeoPackage")
+def build_tiles(inventory, output_dir, precision, layer):
+    """Split a static object inventory into geohash tiles read per drive."""
+    result = write_tiled_inventory(inventory, output_dir, precision=precision, layer=layer)
+    if result.errors:
+        click.echo(result.report(), err=True)
+    click.echo(f"Wrote {len(result.registry)} {result.kind} objects to "
+               f"{len(TiledInventory(output_dir).tiles)} tiles in {output_dir}")
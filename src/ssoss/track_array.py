@@ -0,0 +1,205 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+from typing import Dict, Optional
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+from ssoss.distance import DISTANCE_CACHE_SIZE, DistanceCache
+from ssoss.gpx_reader import GPXColumns
+from ssoss.kinematics import compute_kinematics
+from ssoss.motion_road_object import GPXPoint
+from ssoss.track_cache import CANDIDATE_DTYPE
+
+
+class TrackArray:
+    """Struct-of-arrays storage for a GPX track.
+
+    Every per-point value lives in a contiguous NumPy column and neighbours are found
+    by index (``i - 1``/``i + 1``) instead of object pointers.  ``point(i)`` returns a
+    lightweight :class:`~ssoss.motion_road_object.GPXPoint` view for code that still
+    works one point at a time.
+
+    Columns:
+        time: seconds since epoch (UTC)
+        lat, lon: degrees
+        speed: meters/sec
+        bearing: degrees clockwise from north, from previous point (0 for first point)
+        cumulative_distance: feet from first point
+        acceleration: ft/sec^2 towards next point (0 for last point)
+
+    After ``project(projection)`` the track also has ``east``/``north`` columns (meters in
+    a :class:`~ssoss.projection.LocalENU` plane) and ``bearing`` holds planar headings.
+    """
+
+    COLUMNS = ("time", "lat", "lon", "speed", "bearing", "cumulative_distance", "acceleration")
+
+    def __init__(self, time, lat, lon, speed,
+                 bearing=None, cumulative_distance=None, acceleration=None):
+        self.time = np.ascontiguousarray(time, dtype=np.float64)
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        self.speed = np.ascontiguousarray(speed, dtype=np.float64)
+
+        # derived columns are computed in one vectorized pass unless supplied
+        compute_kinematics(self)
+        if bearing is not None:
+            self.bearing = np.array(bearing, dtype=np.float64)
+        if cumulative_distance is not None:
+            self.cumulative_distance = np.array(cumulative_distance, dtype=np.float64)
+        if acceleration is not None:
+            self.acceleration = np.array(acceleration, dtype=np.float64)
+
+        self.projection = None
+        self.east = None
+        self.north = None
+        # local timezone of the track, used for GPXPoint datetimes (None for UTC)
+        self.tzinfo = None
+
+        # columnar approach candidates per static object type, sorted by point
+        self._candidates: Dict[str, np.ndarray] = {}
+        self._candidate_bounds: Dict[str, np.ndarray] = {}
+
+        # point-to-object distances shared by the GPXPoint heuristics, per object type
+        self.distance_cache_size = None
+        self._distance_caches: Dict[str, DistanceCache] = {}
+
+    @classmethod
+    def from_columns(cls, gpx_cols: GPXColumns) -> "TrackArray":
+        track = cls(gpx_cols.time, gpx_cols.lat, gpx_cols.lon, gpx_cols.speed)
+        track.tzinfo = ZoneInfo(gpx_cols.timezone)
+        return track
+
+    @classmethod
+    def from_points(cls, points) -> "TrackArray":
+        """ build a track from a sequence of standalone GPXPoint objects
+        """
+        points = list(points)
+        track = cls(
+            [p.get_timestamp() for p in points],
+            [p.get_location().latitude for p in points],
+            [p.get_location().longitude for p in points],
+            [p.spd for p in points],
+        )
+        for so_type, getter in (("intersection", "get_intersection_approach_list"),
+                                ("generic_so", "get_generic_so_approach_list")):
+            if any(getattr(p, getter)() is not None for p in points):
+                track.set_candidates(so_type, candidates_from_lists(
+                    [getattr(p, getter)() for p in points], so_type))
+        return track
+
+    def __len__(self) -> int:
+        return len(self.time)
+
+    def slice(self, lo: int, hi: int) -> "TrackArray":
+        """ copy of points ``lo`` to ``hi - 1`` keeping the derived columns of the full track
+
+        Bearing and acceleration depend on neighbouring points, so they are carried over
+        rather than recomputed at the slice edges.  Approach candidates are not copied.
+        """
+        sliced = TrackArray(
+            self.time[lo:hi], self.lat[lo:hi], self.lon[lo:hi], self.speed[lo:hi],
+            bearing=self.bearing[lo:hi],
+            cumulative_distance=self.cumulative_distance[lo:hi],
+            acceleration=self.acceleration[lo:hi],
+        )
+        sliced.tzinfo = self.tzinfo
+        if self.projection is not None:
+            sliced.projection = self.projection
+            sliced.east = self.east[lo:hi].copy()
+            sliced.north = self.north[lo:hi].copy()
+        return sliced
+
+    def project(self, projection) -> None:
+        """ add ``east``/``north`` columns in ``projection`` and recompute bearing on the plane
+        """
+        self.projection = projection
+        self._distance_caches.clear()
+        self.east, self.north = projection.forward(self.lat, self.lon)
+        if len(self.time) > 1:
+            self.bearing[1:] = projection.course(self.east[:-1], self.north[:-1],
+                                                 self.east[1:], self.north[1:])
+
+    def distance_cache(self, so_type: str) -> DistanceCache:
+        """ LRU cache of distances from this track's points to static objects of ``so_type``
+        """
+        cache = self._distance_caches.get(so_type)
+        if cache is None:
+            cache = self._distance_caches[so_type] = DistanceCache(
+                self.distance_cache_size or DISTANCE_CACHE_SIZE)
+        return cache
+
+    def distance_cache_stats(self) -> dict:
+        """ hit/miss counters of the distance caches summed over object types
+        """
+        stats = {"hits": 0, "misses": 0, "evictions": 0, "size": 0}
+        for cache in self._distance_caches.values():
+            for key in stats:
+                stats[key] += cache.stats()[key]
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def last_index(self) -> int:
+        return len(self.time) - 1
+
+    def point(self, i: int):
+        """ GPXPoint view of point ``i``, neighbours resolve through this track
+        """
+        if i < 0:
+            i += len(self.time)
+        return GPXPoint(i, self.time[i], (self.lat[i], self.lon[i]), self.speed[i], track=self)
+
+    def points(self):
+        for i in range(len(self.time)):
+            yield self.point(i)
+
+    def set_candidates(self, so_type: str, candidates: np.ndarray) -> None:
+        """ store the columnar approach candidate table (``CANDIDATE_DTYPE``) for ``so_type``
+        """
+        candidates = np.asarray(candidates, dtype=CANDIDATE_DTYPE)
+        if len(candidates) and np.any(np.diff(candidates["point"]) < 0):
+            candidates = candidates[np.argsort(candidates["point"], kind="stable")]
+        self._candidates[so_type] = candidates
+        self._candidate_bounds[so_type] = np.searchsorted(
+            candidates["point"], np.arange(len(self.time) + 1))
+
+    def candidates(self, so_type: str) -> Optional[np.ndarray]:
+        return self._candidates.get(so_type)
+
+    def candidate_points(self, so_type: str) -> np.ndarray:
+        """ indices of points that have at least one approach candidate
+        """
+        if so_type not in self._candidates:
+            return np.array([], dtype=np.int64)
+        return np.unique(self._candidates[so_type]["point"])
+
+    def approach_list(self, i: int, so_type: str):
+        """ approach tuples for point ``i`` in the same layout GPXPoint.backflow produces
+
+        intersection: (id, leg, distance, approaching), generic_so: (id, distance, approaching)
+        """
+        if so_type not in self._candidates:
+            return None
+        bounds = self._candidate_bounds[so_type]
+        rows = self._candidates[so_type][bounds[i]:bounds[i + 1]]
+        if so_type == "intersection":
+            return [(int(r["id"]), int(r["leg"]), float(r["distance"]), bool(r["approaching"]))
+                    for r in rows]
+        return [(int(r["id"]), float(r["distance"]), bool(r["approaching"])) for r in rows]
+
+
+def candidates_from_lists(approach_lists, so_type: str) -> np.ndarray:
+    """ convert per-point approach lists into one columnar candidate table
+    """
+    rows = []
+    for i, approach_list in enumerate(approach_lists):
+        for item in (approach_list or []):
+            if so_type == "intersection":
+                sro_id, leg, d, appr = item
+            else:
+                sro_id, d, appr = item
+                leg = -1
+            rows.append((i, sro_id, leg, d, appr))
+    return np.array(rows, dtype=CANDIDATE_DTYPE)
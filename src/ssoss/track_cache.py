@@ -0,0 +1,169 @@
+# !/usr/bin/env python
+# coding: utf-8
+
+import hashlib
+import json
+import shutil
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from ssoss.gpx_reader import GPXColumns
+
+# bump when the cached columns or their meaning change so old caches are ignored
+TRACK_CACHE_SCHEMA_VERSION = 2
+
+_BASE_COLUMNS = ("time", "lat", "lon", "speed", "ele")
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """ content hash (blake2b hex) of a file, used to key on-disk caches
+    """
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class TrackCache:
+    """On-disk cache of processed GPX columns keyed by GPX content hash.
+
+    Each entry is a directory of flat ``.npy`` arrays (one per column) plus a small
+    ``meta.json``.  The directory name holds the GPX digest and schema version, so an
+    edited GPX file or a schema change never matches an old entry.  Columns are
+    loaded memory-mapped.
+    """
+
+    def __init__(self, cache_dir, gpx_stem: str):
+        """
+        :param cache_dir: directory where cache entries are written (typ. ./out/cache)
+        :param gpx_stem: GPX filename without suffix, used to name and prune entries
+        """
+        self.cache_dir = Path(cache_dir)
+        self.gpx_stem = gpx_stem
+
+    def entry_path(self, digest: str) -> Path:
+        return self.cache_dir / f"{self.gpx_stem}.{digest[:16]}.v{TRACK_CACHE_SCHEMA_VERSION}"
+
+    def load(self, digest: str) -> Optional[GPXColumns]:
+        """ memory-map cached columns for ``digest`` or return None on a miss
+        """
+        entry = self.entry_path(digest)
+        meta_file = entry / "meta.json"
+        if not meta_file.is_file():
+            return None
+        try:
+            meta = json.loads(meta_file.read_text())
+            if meta.get("schema") != TRACK_CACHE_SCHEMA_VERSION or meta.get("digest") != digest:
+                return None
+            cols = {name: np.load(entry / f"{name}.npy", mmap_mode="r") for name in _BASE_COLUMNS}
+            extensions = {name: np.load(entry / f"ext_{name}.npy", mmap_mode="r")
+                          for name in meta.get("extensions", [])}
+        except (OSError, ValueError):
+            return None
+        return GPXColumns(extensions=extensions, version=meta["gpx_ver"], timezone=meta["timezone"], **cols)
+
+    def save(self, digest: str, gpx_cols: GPXColumns) -> Path:
+        """ write ``gpx_cols`` for ``digest`` and remove stale entries of the same GPX file
+        """
+        self.cache_dir.mkdir(exist_ok=True, parents=True)
+        entry = self.entry_path(digest)
+        tmp = entry.with_name(entry.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        for name in _BASE_COLUMNS:
+            np.save(tmp / f"{name}.npy", np.ascontiguousarray(getattr(gpx_cols, name), dtype=np.float64))
+        for name, col in gpx_cols.extensions.items():
+            np.save(tmp / f"ext_{name}.npy", np.ascontiguousarray(col, dtype=np.float64))
+        meta = {
+            "schema": TRACK_CACHE_SCHEMA_VERSION,
+            "digest": digest,
+            "gpx_ver": gpx_cols.version,
+            "timezone": gpx_cols.timezone,
+            "points": len(gpx_cols),
+            "extensions": sorted(gpx_cols.extensions),
+        }
+        (tmp / "meta.json").write_text(json.dumps(meta, indent=1))
+
+        for old in self.cache_dir.glob(f"{self.gpx_stem}.*.v*"):
+            if old.is_dir() and old != tmp and old.name.rsplit(".", 2)[0] == self.gpx_stem:
+                shutil.rmtree(old, ignore_errors=True)
+        tmp.rename(entry)
+        return entry
+
+
+# bump when backflow annotations or approach heuristics change meaning
+ANNOTATION_CACHE_SCHEMA_VERSION = 1
+
+CANDIDATE_DTYPE = np.dtype([
+    ("point", np.int64),
+    ("id", np.int64),
+    ("leg", np.int8),
+    ("distance", np.float64),
+    ("approaching", np.bool_),
+])
+
+
+def annotation_key(gpx_digest: str, so_digest: str, params: dict) -> str:
+    """ combined hash of GPX content, static object file content and algorithm parameters
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(json.dumps({
+        "schema": ANNOTATION_CACHE_SCHEMA_VERSION,
+        "gpx": gpx_digest,
+        "static_objects": so_digest,
+        "params": params,
+    }, sort_keys=True).encode())
+    return h.hexdigest()
+
+
+class AnnotationCache:
+    """On-disk cache of per-point approach candidates and final sighting events.
+
+    Entries are keyed by :func:`annotation_key`, so a change to the GPX file, the static
+    object CSV or any algorithm parameter misses the cache.  Candidates are stored as a
+    single structured array (``CANDIDATE_DTYPE``) and events as JSON lists of
+    ``(description, timestamp)`` pairs per check type.
+    """
+
+    def __init__(self, cache_dir, gpx_stem: str, key: str):
+        self.cache_dir = Path(cache_dir)
+        self.gpx_stem = gpx_stem
+        self.key = key
+        self.entry = self.cache_dir / f"{gpx_stem}.{key[:16]}.annotations.v{ANNOTATION_CACHE_SCHEMA_VERSION}"
+
+    def load_candidates(self, so_type: str) -> Optional[np.ndarray]:
+        candidate_file = self.entry / f"{so_type}_candidates.npy"
+        if not candidate_file.is_file():
+            return None
+        try:
+            candidates = np.load(candidate_file, mmap_mode="r")
+        except (OSError, ValueError):
+            return None
+        if candidates.dtype != CANDIDATE_DTYPE:
+            return None
+        return candidates
+
+    def save_candidates(self, so_type: str, candidates: np.ndarray) -> None:
+        self.entry.mkdir(exist_ok=True, parents=True)
+        tmp = self.entry / f"{so_type}_candidates.tmp.npy"
+        np.save(tmp, np.asarray(candidates, dtype=CANDIDATE_DTYPE))
+        tmp.replace(self.entry / f"{so_type}_candidates.npy")
+
+    def load_events(self, check_type: str) -> Optional[list]:
+        events_file = self.entry / f"{check_type}_events.json"
+        if not events_file.is_file():
+            return None
+        try:
+            return [tuple(e) for e in json.loads(events_file.read_text())]
+        except (OSError, ValueError):
+            return None
+
+    def save_events(self, check_type: str, events: list) -> None:
+        self.entry.mkdir(exist_ok=True, parents=True)
+        tmp = self.entry / f"{check_type}_events.json.tmp"
+        tmp.write_text(json.dumps([list(e) for e in events], indent=1))
+        tmp.replace(self.entry / f"{check_type}_events.json")
@@ -0,0 +1,78 @@
+"""Synthetic tracks, indexes and input files shared by the test modules."""
+
+import sys
+import csv
+import pathlib
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.spatial_index import StaticObjectIndex
+from ssoss.track_array import TrackArray
+
+T0 = 1681581600.0  # 2023-04-15T18:00:00Z, the first write_gpx fix
+
+
+def random_walk_track(n=120, seed=3):
+    # drifting north-east, one point per second
+    rng = np.random.default_rng(seed)
+    lat = 37.78 + np.cumsum(rng.normal(1e-4, 5e-5, n))
+    lon = -122.41 + np.cumsum(rng.normal(5e-5, 5e-5, n))
+    return TrackArray(np.arange(n, dtype=float), lat, lon, np.full(n, 10.0))
+
+
+def l_shaped_track(seed=5):
+    # northbound then eastbound with varying speed, one point per second
+    rng = np.random.default_rng(seed)
+    speed = 12 + 3 * np.sin(np.arange(200) / 15) + rng.normal(0, 0.2, 200)
+    step = speed / 111_000
+    lat = np.concatenate([np.cumsum(step[:120]), np.full(80, step[:120].sum())])
+    lon = np.concatenate([np.zeros(120), np.cumsum(step[120:])])
+    return TrackArray(np.arange(200, dtype=float), lat, lon, speed)
+
+
+def square_loop_track(n=400, seed=9):
+    # square loop, one point per second
+    rng = np.random.default_rng(seed)
+    step = (10 + rng.normal(0, 0.5, n)) / 111_000
+    heading = np.repeat([0.0, 90.0, 180.0, 270.0], n // 4)
+    lat = np.cumsum(step * np.cos(np.radians(heading)))
+    lon = np.cumsum(step * np.sin(np.radians(heading)))
+    return TrackArray(np.arange(n, dtype=float), lat, lon, step * 111_000)
+
+
+def make_index(objects, radius):
+    return StaticObjectIndex(
+        [o.get_location().latitude for o in objects],
+        [o.get_location().longitude for o in objects],
+        radius, objects=objects, ids=[o.get_id_num() for o in objects],
+    )
+
+
+# a row of intersections every 400 m along 37.79 N
+CORRIDOR_INTERSECTIONS = [[k + 1, "Main", f"{k + 1}th", 37.79, -122.42 + k * 0.0045, 25, 30, 35, 30, 0, 90, 180, 270]
+                          for k in range(6)]
+
+
+def write_intersections(path, rows=CORRIDOR_INTERSECTIONS):
+    """ intersection CSV of ``rows``, with 29 columns when any row has stop bars and 13 otherwise """
+    width = max((len(row) for row in rows), default=13)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["#"] + [f"c{k}" for k in range(width - 1)])
+        writer.writerows(rows)
+
+
+def write_gpx(path, lon_start, lon_step, n=260):
+    # GPX 1.0 track along 37.79001 N at constant speed, one point per second from T0
+    base = datetime.fromtimestamp(T0, tz=timezone.utc)
+    rows = []
+    for i in range(n):
+        t = (base + timedelta(seconds=i)).strftime("%Y-%m-%dT%H:%M:%SZ")
+        rows.append(f'<trkpt lat="37.79001" lon="{lon_start + i * lon_step:.8f}"><ele>10</ele>'
+                    f'<time>{t}</time><speed>{abs(lon_step) * 88_000:.3f}</speed></trkpt>')
+    path.write_text('<?xml version="1.0" encoding="UTF-8"?>\n'
+                    '<gpx version="1.0" creator="t" xmlns="http://www.topografix.com/GPX/1/0">\n'
+                    '<trk><trkseg>\n' + "\n".join(rows) + "\n</trkseg></trk></gpx>\n")
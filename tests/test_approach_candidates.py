@@ -0,0 +1,78 @@
+import sys
+import pathlib
+import unittest
+
+import geopy
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.motion_road_object import GPXPoint
+from ssoss.static_road_object import Intersection, GenericStaticObject
+from ssoss.track_array import candidates_from_lists
+from tests.factories import make_index, random_walk_track
+
+
+def make_objects(track):
+    rng = np.random.default_rng(4)
+    lat = rng.uniform(track.lat.min(), track.lat.max(), 25)
+    lon = rng.uniform(track.lon.min(), track.lon.max(), 25)
+    intersections = [
+        Intersection(i + 1, ("A", "B"), geopy.Point(a, b), spd=(25, 30, 35, 40),
+                     bearing=tuple(rng.uniform(0, 360, 4)))
+        for i, (a, b) in enumerate(zip(lat, lon))
+    ]
+    generics = [
+        GenericStaticObject(i + 1, "A", geopy.Point(a, b), float(rng.uniform(0, 360)), "Stop",
+                            float(rng.uniform(100, 500)))
+        for i, (a, b) in enumerate(zip(lat, lon))
+    ]
+    return intersections, generics
+
+
+class TestFindApproachCandidates(unittest.TestCase):
+    def setUp(self):
+        self.track = random_walk_track()
+        self.intersections, self.generics = make_objects(self.track)
+
+    def per_point(self, objects, so_type):
+        sro_df = pd.DataFrame({f"{so_type}_obj": objects})
+        lists = []
+        for i in range(len(self.track)):
+            p = self.track.point(i)
+            p.backflow(sro_df, so_type)
+            lists.append(p.get_intersection_approach_list() if so_type == "intersection"
+                         else p.get_generic_so_approach_list())
+        return candidates_from_lists(lists, so_type)
+
+    def assert_tables_equal(self, a, b):
+        self.assertEqual(len(a), len(b))
+        for name in ("point", "id", "leg", "approaching"):
+            np.testing.assert_array_equal(a[name], b[name])
+        np.testing.assert_allclose(a["distance"], b["distance"], rtol=1e-12)
+
+    def test_intersections_match_per_point_backflow(self):
+        expected = self.per_point(self.intersections, "intersection")
+        self.assertGreater(len(expected), 0)
+        index = make_index(self.intersections, [i.get_sd("max") for i in self.intersections])
+        self.assert_tables_equal(find_approach_candidates(self.track, index, "intersection"), expected)
+        self.assert_tables_equal(
+            find_approach_candidates(self.track, index, "intersection", use_index=False, block_size=7),
+            expected)
+
+    def test_generics_match_per_point_backflow(self):
+        expected = self.per_point(self.generics, "generic_so")
+        self.assertGreater(len(expected), 0)
+        index = make_index(self.generics, [g.get_sd() + GPXPoint.GENERIC_SO_BUFFER_FT for g in self.generics])
+        self.assert_tables_equal(find_approach_candidates(self.track, index, "generic_so", block_size=5),
+                                 expected)
+
+    def test_empty_inventory(self):
+        index = make_index([], [])
+        self.assertEqual(len(find_approach_candidates(self.track, index, "intersection")), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import sys
+import pathlib
+import unittest
+from unittest import mock
+
+import geopy
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss import crossing_detector
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.crossing_detector import (
+    EVENT_DTYPE,
+    cluster_events,
+    detect_generic_crossings,
+    detect_intersection_crossings,
+    time_to_sight_distance,
+)
+from ssoss.distance import distance_ft_array, local_error_ft
+from ssoss.motion_road_object import GPXPoint
+from ssoss.registry import as_registry
+from ssoss.static_road_object import Intersection, GenericStaticObject
+from ssoss.track_array import TrackArray
+from ssoss.track_cache import CANDIDATE_DTYPE
+from tests.factories import l_shaped_track, make_index
+
+
+class TestCrossingDetector(unittest.TestCase):
+    def setUp(self):
+        self.track = l_shaped_track()
+        corner = self.track.lat[-1]
+        self.intersections = [
+            Intersection(1, ("A", "B"), geopy.Point(0.0045, 0.0), spd=(25, 25, 25, 25), bearing=(0, 90, 180, 270)),
+            Intersection(2, ("C", "D"), geopy.Point(corner, 0.0), spd=(35, 40, 35, 40), bearing=(0, 90, 180, 270)),
+            Intersection(3, ("E", "F"), geopy.Point(corner, 0.004), spd=(45, 30, 45, 30), bearing=(0, 90, 180, 270)),
+        ]
+        self.generics = [
+            GenericStaticObject(1, "A", geopy.Point(0.005, 0.0), "NB", "Stop", 200.0),
+            GenericStaticObject(2, "B", geopy.Point(corner, 0.003), "EB", "Yield", 150.0),
+            GenericStaticObject(3, "C", geopy.Point(corner, 0.003), "WB", "Yield", 150.0),
+        ]
+
+    def test_intersection_events_match_three_point_heuristic(self):
+        index = make_index(self.intersections, [i.get_sd("max") for i in self.intersections])
+        candidates = find_approach_candidates(self.track, index, "intersection")
+        expected = []
+        for c in candidates:
+            p = self.track.point(int(c["point"]))
+            inter = self.intersections[c["id"] - 1]
+            b = int(c["leg"])
+            if p.h_prev_and_current_before_next(inter, b) and p.h_next_less_than_current(inter, b):
+                expected.append((int(c["id"]), b, p.get_timestamp() + p.t_to_approach_acc(inter, b)))
+
+        events = detect_intersection_crossings(self.track, candidates, self.intersections)
+        self.assertEqual(len(events), 3)
+        self.assertEqual([(int(e["id"]), int(e["leg"])) for e in events], [(i, b) for i, b, _ in expected])
+        np.testing.assert_allclose(events["time"], [t for _, _, t in expected], atol=1e-6)
+        # linear crossing falls between the point and the next one
+        self.assertTrue(np.all(events["crossing_time"] >= self.track.time[events["point"]]))
+        self.assertTrue(np.all(events["crossing_time"] <= self.track.time[events["point"] + 1]))
+
+    def test_generic_events_match_single_filter(self):
+        index = make_index(self.generics, [g.get_sd() + GPXPoint.GENERIC_SO_BUFFER_FT for g in self.generics])
+        candidates = find_approach_candidates(self.track, index, "generic_so")
+        expected = []
+        for c in candidates:
+            p = self.track.point(int(c["point"]))
+            so = self.generics[c["id"] - 1]
+            if p.calc_bearing_diff(so.get_bearing()) < 50:
+                captured, error = p.generic_so_single_filter(so)
+                if captured and p.distance_to(so.get_location()) - so.get_sd() < 0:
+                    expected.append((int(c["id"]), p.get_timestamp() + p.t_to_generic_so_acc(so), error))
+
+        events = detect_generic_crossings(self.track, candidates, self.generics, 50)
+        self.assertGreater(len(events), 0)
+        self.assertNotIn(3, events["id"])
+        self.assertEqual(events["id"].tolist(), [i for i, _, _ in expected])
+        np.testing.assert_allclose(events["time"], [t for _, t, _ in expected], atol=1e-6)
+        np.testing.assert_allclose(events["error"], [e for _, _, e in expected], atol=1e-6)
+
+    def test_ties_within_local_error_are_rechecked(self):
+        # northbound onto intersection 1, the middle point 0.0025 ft outside the sight
+        # distance: beyond 1e-3 ft but within the local backend's 1 mm error bound
+        inter = self.intersections[0]
+        sd = float(np.round(as_registry([inter], "intersection").sd[0, 0]))
+        offset_ft = 0.0025
+        self.assertLess(offset_ft, local_error_ft(sd))
+        lat = inter.get_location().latitude - np.array([sd + 50.0, sd + offset_ft, sd - 50.0]) / 364_000
+        for _ in range(3):
+            d = distance_ft_array(lat, 0.0, inter.get_location().latitude, 0.0, default="local")
+            lat -= (np.array([sd + 50.0, sd + offset_ft, sd - 50.0]) - d) / 364_000
+        track = TrackArray(np.arange(3.0), lat, np.zeros(3), np.full(3, 15.0))
+        candidates = np.zeros(1, dtype=CANDIDATE_DTYPE)
+        candidates[0] = (1, 1, 0, sd, True)
+
+        with mock.patch.object(crossing_detector, "_geodesic_ft", wraps=crossing_detector._geodesic_ft) as geodesic:
+            events = detect_intersection_crossings(track, candidates, [inter])
+        self.assertEqual(geodesic.call_count, 3)
+        self.assertEqual(len(events), 1)
+
+    def test_time_to_sight_distance_branches(self):
+        # constant speed, inside sight distance and accelerating cases
+        t = time_to_sight_distance([100.0, -20.0, 10.0], [20.0, 20.0, 20.0], [0.0, 2.0, 2.0])
+        self.assertAlmostEqual(t[0], 5.0)
+        self.assertAlmostEqual(t[1], -1.0)
+        radical = np.sqrt(20.0 ** 2 - 4 * 2.0 * 10.0)
+        self.assertAlmostEqual(t[2], min(abs((-20 - radical) / 4), abs((-20 + radical) / 4)))
+        self.assertEqual(time_to_sight_distance(50.0, 0.0, 0.0), 0.0)
+
+
+class TestClusterEvents(unittest.TestCase):
+    def test_lowest_error_per_pass(self):
+        # object 5 is passed twice, its first pass fires three times
+        rows = [(5, 10.0, 4.0), (7, 11.0, 2.0), (5, 11.5, 1.0), (5, 13.0, 3.0),
+                (5, 120.0, 6.0), (5, 121.0, 6.0), (7, 16.0, 1.0)]
+        events = np.zeros(len(rows), dtype=EVENT_DTYPE)
+        events["id"], events["time"], events["error"] = zip(*rows)
+        events["leg"] = -1
+        kept = cluster_events(events, 3.0)
+        self.assertEqual(list(zip(kept["id"].tolist(), kept["time"].tolist())),
+                         [(7, 11.0), (5, 11.5), (7, 16.0), (5, 120.0)])
+        self.assertEqual(len(cluster_events(events[:0], 3.0)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
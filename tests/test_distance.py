@@ -0,0 +1,151 @@
+import sys
+import pathlib
+import unittest
+
+import geopy
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss import distance
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.crossing_detector import detect_intersection_crossings
+from ssoss.motion_road_object import GPXPoint
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.static_road_object import Intersection
+from ssoss.track_array import TrackArray
+from tests.factories import make_index
+
+
+class TestDistanceBackends(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        self.lat1 = rng.uniform(-60, 60, 200)
+        self.lon1 = rng.uniform(-180, 180, 200)
+        bearing = np.radians(rng.uniform(0, 360, 200))
+        offset = rng.uniform(1, 300, 200)  # meters
+        self.lat2 = self.lat1 + offset * np.cos(bearing) / 111_000
+        self.lon2 = self.lon1 + offset * np.sin(bearing) / (111_000 * np.cos(np.radians(self.lat1)))
+        self.exact = np.array([geodesic((a, b), (c, d)).meters
+                               for a, b, c, d in zip(self.lat1, self.lon1, self.lat2, self.lon2)])
+
+    def tearDown(self):
+        distance.set_backend(None)
+
+    def test_error_bounds(self):
+        geo = distance.distance_m_array(self.lat1, self.lon1, self.lat2, self.lon2, backend="geodesic")
+        np.testing.assert_allclose(geo, self.exact, atol=1e-9)
+        local = distance.distance_m_array(self.lat1, self.lon1, self.lat2, self.lon2, backend="local")
+        np.testing.assert_allclose(local, self.exact, atol=1e-3)
+        hav = distance.distance_m_array(self.lat1, self.lon1, self.lat2, self.lon2, backend="haversine")
+        np.testing.assert_allclose(hav, self.exact, rtol=7e-3)
+
+    def test_local_error_bound(self):
+        # the documented bound holds from street scale out to 2 km
+        offset = np.geomspace(10, 2000, 200)
+        bearing = np.radians(np.linspace(0, 360, 200))
+        lat2 = self.lat1 + offset * np.cos(bearing) / 111_000
+        lon2 = self.lon1 + offset * np.sin(bearing) / (111_000 * np.cos(np.radians(self.lat1)))
+        local = distance.distance_ft_array(self.lat1, self.lon1, lat2, lon2, backend="local")
+        exact = np.array([geodesic((a, b), (c, d)).ft for a, b, c, d in zip(self.lat1, self.lon1, lat2, lon2)])
+        self.assertTrue(np.all(np.abs(local - exact) <= distance.local_error_ft(exact)))
+        self.assertAlmostEqual(distance.local_error_ft(2000 / 0.3048) * 0.3048, 0.064)
+
+    def test_scalar_accepts_points_and_tuples(self):
+        p1, p2 = geopy.Point(37.0, -122.0), (37.001, -122.001)
+        self.assertEqual(distance.distance_ft(p1, p2), geodesic(p1, p2).ft)
+        self.assertAlmostEqual(distance.distance_ft(p1, p2, backend="local"), geodesic(p1, p2).ft, places=3)
+
+    def test_one_setting_switches_call_sites(self):
+        p = GPXPoint(0, 0.0, (0.0, 0.0), 0.0)
+        target = geopy.Point(0.001, 0.0)
+        exact = p.distance_to(target)
+        with distance.use_backend("haversine"):
+            self.assertEqual(distance.get_backend(), "haversine")
+            self.assertNotAlmostEqual(p.distance_to(target), exact, places=2)
+            # array calls follow the setting regardless of their default
+            self.assertEqual(
+                distance.distance_m_array(0.0, 0.0, 0.001, 0.0, default="local"),
+                distance.haversine_m(0.0, 0.0, 0.001, 0.0))
+        self.assertIsNone(distance.get_backend())
+        self.assertEqual(p.distance_to(target), exact)
+
+    def test_rejects_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            distance.set_backend("manhattan")
+        with self.assertRaises(ValueError):
+            ProcessRoadObjects(distance_backend="manhattan")
+
+    def test_instance_backend_does_not_leak(self):
+        pro = ProcessRoadObjects(distance_backend="haversine")
+        self.assertEqual(pro.annotation_params()["distance_backend"], "haversine")
+        self.assertIsNone(distance.get_backend())
+        # a later instance without a backend keeps each call site's default
+        self.assertIsNone(ProcessRoadObjects().annotation_params()["distance_backend"])
+
+
+
+class TestDistanceCache(unittest.TestCase):
+    def test_lru_eviction_and_counters(self):
+        cache = distance.DistanceCache(maxsize=2)
+        self.assertEqual(cache.get((0, 1, -1), lambda: 1.0), 1.0)
+        self.assertEqual(cache.get((1, 1, -1), lambda: 2.0), 2.0)
+        self.assertEqual(cache.get((0, 1, -1), lambda: 99.0), 1.0)  # hit, now most recent
+        cache.get((2, 1, -1), lambda: 3.0)  # evicts (1, 1, -1)
+        self.assertEqual(cache.get((1, 1, -1), lambda: 4.0), 4.0)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["evictions"], stats["size"]), (1, 4, 2, 2))
+
+    def test_heuristics_share_cached_distances(self):
+        n = 20
+        lat = np.arange(n) * 9e-5
+        track = TrackArray(np.arange(n, dtype=float), lat, np.zeros(n), np.full(n, 10.0))
+        inter = Intersection(1, ("A", "B"), geopy.Point(lat[-1], 0.0), spd=(25, 25, 25, 25),
+                             bearing=(0, 90, 180, 270))
+        p = track.point(10)
+        uncached = GPXPoint(10, 10.0, (lat[10], 0.0), 10.0).distance_to(inter.get_location())
+        self.assertEqual(p.distance_to_object(inter), uncached)
+        p.h_prev_and_current_before_next(inter, 0)
+        p.h_next_less_than_current(inter, 0)
+        p.simple_intersection_approach(inter, 0)
+        p.t_to_approach_acc(inter, 0)
+        stats = track.distance_cache_stats()
+        # points 9, 10 and 11 to the intersection center are each computed once
+        self.assertEqual(stats["misses"], 3)
+        self.assertGreater(stats["hits"], 4)
+
+    def test_crossing_detector_reads_the_cache(self):
+        n = 60
+        lat = np.arange(n) * 9e-5
+        track = TrackArray(np.arange(n, dtype=float), lat, np.zeros(n), np.full(n, 10.0))
+        inter = Intersection(1, ("A", "B"), geopy.Point(lat[-1], 0.0), spd=(25, 25, 25, 25),
+                             bearing=(0, 90, 180, 270))
+        index = make_index([inter], [inter.get_sd("max")])
+        candidates = find_approach_candidates(track, index, "intersection")
+        events = detect_intersection_crossings(track, candidates, [inter])
+        self.assertEqual(len(events), 1)
+        stats = track.distance_cache_stats()
+        # the previous, current and next points of neighbouring candidates overlap
+        self.assertGreater(stats["hits"], stats["misses"])
+        self.assertLessEqual(stats["misses"], len(candidates) + 3)
+
+        # another backend misses instead of returning the cached distances
+        with distance.use_backend("haversine"):
+            haversine = detect_intersection_crossings(track, candidates, [inter])
+        self.assertNotEqual(float(haversine["crossing_time"][0]), float(events["crossing_time"][0]))
+        np.testing.assert_array_equal(detect_intersection_crossings(track, candidates, [inter]), events)
+
+    def test_bulk_lookup_matches_single_lookups(self):
+        cache = distance.DistanceCache(maxsize=3)
+        values = cache.get_many([(0, 1, -1, "local"), (1, 1, -1, "local"), (0, 1, -1, "local")],
+                                lambda k: np.array([10.0, 20.0])[: len(k)])
+        np.testing.assert_array_equal(values, [10.0, 20.0, 10.0])
+        self.assertEqual(cache.get((1, 1, -1, "local"), lambda: 99.0), 20.0)
+        self.assertEqual(cache.get((1, 1, -1, "geodesic"), lambda: 21.0), 21.0)
+        stats = cache.stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["size"]), (2, 3, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,18 @@
 import unittest
 import pathlib
 import sys
+import tempfile
 from datetime import datetime, timezone, timedelta
 
+import numpy as np
 import pandas as pd
 import geopy
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
-from ssoss.dynamic_road_object import DynamicRoadObject
+from ssoss.distance import distance_ft
+from ssoss.dynamic_road_object import DRIVE_LOG_DTYPE, DynamicRoadObject, write_drive_log
+from ssoss.static_road_object import Intersection
 
 
 class TestGetInfoAtTimestamp(unittest.TestCase):
@@ -45,5 +49,185 @@ class TestGetInfoAtTimestamp(unittest.TestCase):
         self.assertEqual(info[5], self.df["location"].iloc[-1])
 
 
+def _temp_dir(test) -> pathlib.Path:
+    tmpdir = tempfile.TemporaryDirectory()
+    test.addCleanup(tmpdir.cleanup)
+    return pathlib.Path(tmpdir.name)
+
+
+class RandomIntersectionsMixin:
+    """40 random intersections and a 120 point diagonal drive through them."""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        self.objects = [Intersection(i, ("A", "B"),
+                                     geopy.Point(37.77 + rng.uniform(0, 0.02), -122.42 + rng.uniform(0, 0.02)),
+                                     spd=(25, 30, 35, 40), bearing=(0, 90, 180, 270)) for i in range(40)]
+        self.sro_df = pd.DataFrame({"id": [o.get_id_num() for o in self.objects], "obj": self.objects})
+        self.points = [geopy.Point(37.77 + k * 1.2e-4, -122.42 + k * 1.1e-4) for k in range(120)]
+        base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        gpx_df = pd.DataFrame({"t": [base + timedelta(seconds=k) for k in range(120)],
+                               "geo_point": self.points, "spd": [10.0] * 120})
+        self.obj = DynamicRoadObject.__new__(DynamicRoadObject)
+        self.obj.sro_df = self.sro_df
+        self.obj.gpx_df = gpx_df
+        self.obj._sro_arrays = None
+        self.obj.nearest_table = None
+
+
+class TestNearestIntersections(RandomIntersectionsMixin, unittest.TestCase):
+    def test_matches_per_point_search(self):
+        before = self.sro_df.copy()
+        table = self.obj.nearest_intersections()
+        lo, hi = self.objects[0].get_sd("min"), self.objects[0].get_sd("max")
+        for i in range(1, len(self.points), 7):
+            d = [distance_ft(self.points[i], o.get_location()) for o in self.objects]
+            d_prev = [distance_ft(self.points[i - 1], o.get_location()) for o in self.objects]
+            in_range = [(d[k], k) for k in range(len(d)) if lo <= d[k] <= hi]
+            approaching = [(dk, k) for dk, k in in_range if dk <= d_prev[k]]
+            self.assertEqual(table["nearest"][i], min(in_range)[1] if in_range else -1)
+            self.assertEqual(table["approaching"][i], min(approaching)[1] if approaching else -1)
+        self.assertTrue((table["approaching"] >= 0).any())
+        self.assertTrue(self.sro_df.equals(before))
+
+    def test_current_point_list_is_a_sorted_copy(self):
+        self.obj.pt0, self.obj.pt1 = self.points[40], self.points[41]
+        closest = self.obj.get_closest_intersection(as_list=True)
+        self.assertNotIn("d", self.sro_df.columns)
+        self.assertTrue(closest["d"].is_monotonic_increasing)
+        self.assertEqual(self.obj.nearest_intersections()["nearest"][41], self.sro_df.index[
+            self.sro_df["obj"] == closest.iloc[0, 1]][0])
+
+
+class TestDriveLog(RandomIntersectionsMixin, unittest.TestCase):
+    def setUp(self):
+        super().setUp()
+        self.obj.MStoMPH = 2.23694
+        self.obj.gpx_df["spd"] = np.linspace(5.0, 15.0, len(self.points))
+        gpx_df = self.obj.gpx_df
+        self.obj.t1, self.obj.pnt1 = gpx_df.loc[1].t, gpx_df.loc[1].geo_point
+        self.obj.pt1 = self.obj.pnt1
+
+    def test_matches_per_point_log(self):
+        log = np.concatenate(list(self.obj.drive_log(chunk_size=16)))
+        expected = []
+        for i in range(2, self.obj.gpx_df.last_valid_index()):
+            self.obj.update_location_simple(i)
+            cai = self.obj.closest_approaching_intersection
+            if cai is not None:
+                leg = self.obj.approach_leg(cai)
+                expected.append((cai.get_id_num(), leg, self.obj.get_utc_timestamp(), self.obj.get_time_step(),
+                                 self.obj.get_spd(), cai.distance_to_sb(self.obj.pt1, leg) - cai.get_sd(leg),
+                                 self.obj.get_bearing(), self.obj.get_location()))
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(len(log), len(expected))
+        for row, (id_num, leg, ts, dt, spd, d, bearing, location) in zip(log, expected):
+            self.assertEqual((row["id"], row["appr_dir"], row["timestamp"], row["time_delta"]), (id_num, leg, ts, dt))
+            self.assertAlmostEqual(row["spd"], spd)
+            self.assertAlmostEqual(row["distance"], d, places=6)
+            self.assertAlmostEqual(row["bearing"], bearing, places=6)
+            self.assertEqual(row["approaching"], d > 0)
+        df = self.obj.drive_gpx_stop_bar("track", use_pickle_file=False, out_dir=_temp_dir(self))
+        self.assertEqual(df["location"].tolist(), [e[-1] for e in expected])
+        self.assertIn("time_delta", df.columns)
+
+    def test_streamed_csv(self):
+        path = _temp_dir(self) / "log.csv"
+        rows = write_drive_log(self.obj.drive_log(chunk_size=7), path)
+        df = pd.read_csv(path)
+        self.assertEqual(len(df), rows)
+        self.assertEqual(list(df.columns), list(DRIVE_LOG_DTYPE.names))
+        self.assertEqual(write_drive_log([], path), 0)
+        self.assertEqual(list(pd.read_csv(path).columns), list(DRIVE_LOG_DTYPE.names))
+
+
+def _seek_sd_reference(obj, df):
+    rows = []
+    for i in range(1, df.last_valid_index() - 3):
+        if df.spd.iloc[i] > 0.4 and df.spd.iloc[i + 1] > 0.4 and df.distance.iloc[i + 1] <= \
+                obj.get_itrsxn_obj_by_id(df.id.iloc[i]).get_sd(df.appr_dir.iloc[i + 1]) + \
+                df.time_delta.iloc[i] * df.spd.iloc[i] * obj.MPHtoFTPS:
+            if df.approaching.iloc[i - 1] and df.approaching.iloc[i] and \
+                    not df.approaching.iloc[i + 1] and not df.approaching.iloc[i + 2]:
+                t_adjust = obj.t_spd_adjust(df.distance.iloc[i], df.spd.iloc[i],
+                                            df.distance.iloc[i + 1], df.spd.iloc[i + 1])
+                if t_adjust <= df.time_delta.iloc[i]:
+                    rows.append((i, t_adjust))
+    return rows
+
+
+def _seek_sb_reference(obj, df):
+    rows = []
+    for i in range(1, df.last_valid_index() - 3):
+        approach_distance = obj.get_itrsxn_obj_by_id(df.id.iloc[i]).distance_to_sb(
+            geopy.Point(df.location.iloc[i + 1]), df.appr_dir.iloc[i + 1])
+        if df.spd.iloc[i] > 0.2 and df.spd.iloc[i + 1] > 0.2 \
+                and df.distance.iloc[i + 1] <= approach_distance <= df.distance.iloc[i]:
+            t_adjust = obj.t_spd_adjust(df.distance.iloc[i], df.spd.iloc[i],
+                                        df.distance.iloc[i + 1], df.spd.iloc[i + 1])
+            if t_adjust <= 1:
+                rows.append((i, t_adjust))
+    return rows
+
+
+class TestSeek(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.objects = []
+        for k in range(6):
+            center = geopy.Point(37.77 + k * 0.01, -122.42)
+            bar = (geopy.Point(center.latitude - 2e-4, center.longitude - 1e-4),
+                   geopy.Point(center.latitude - 2e-4, center.longitude + 1e-4))
+            o = Intersection(10 + k, ("A", "B"), center, spd=(25, 30, 35, 40), bearing=(0, 90, 180, 270),
+                             stop_bar_nb=bar)
+            if k % 2:
+                o.set_sb_pts_bools((True, False, False, False))
+            self.objects.append(o)
+        self.obj = DynamicRoadObject.__new__(DynamicRoadObject)
+        self.obj.sro_df = pd.DataFrame({"id": [o.get_id_num() for o in self.objects], "obj": self.objects})
+        self.obj._sro_arrays = None
+        self.obj.MPHtoFTPS = 1 / 0.681818
+        self.obj.out_file_path = _temp_dir(self)
+
+        n = 3000
+        k = np.repeat(np.arange(n // 50) % 6, 50)
+        distance = np.tile(np.linspace(600, -300, 50), n // 50) + rng.normal(0, 60, n)
+        lat = 37.77 + k * 0.01 - np.abs(distance) * 1e-6 - 3e-4
+        self.log = pd.DataFrame({
+            "id": 10 + k,
+            "appr_dir": rng.integers(0, 4, n),
+            "timestamp": 1.7e9 + np.arange(n, dtype=float),
+            "time_delta": np.ones(n),
+            "location": [geopy.Point(a, -122.42).format_decimal() for a in lat],
+            "spd": rng.uniform(0, 600, n),
+            "distance": distance,
+            "bearing": np.zeros(n),
+            "approaching": rng.random(n) < 0.7,
+        })
+
+    def _check(self, df, expected):
+        self.assertGreater(len(expected), 0)
+        self.assertEqual(list(df.columns), ["id", "appr_dir", "timestamp", "location", "spd", "distance",
+                                            "t_adjust", "string_desc"])
+        i = [e[0] for e in expected]
+        self.assertEqual(df["timestamp"].tolist(), self.log["timestamp"].iloc[i].tolist())
+        self.assertEqual(df["t_adjust"].tolist(), [e[1] for e in expected])
+        self.assertEqual(df["string_desc"].tolist(), [self.obj.get_info_by_id(self.log.id.iloc[j],
+                                                                              self.log.appr_dir.iloc[j])
+                                                      for j in i])
+
+    def test_seek_sd_matches_row_scan(self):
+        self._check(self.obj.seek_sd(self.log), _seek_sd_reference(self.obj, self.log))
+        self.assertTrue((self.obj.out_file_path / "approaching_intersections.csv").exists())
+
+    def test_seek_sb_matches_row_scan(self):
+        self._check(self.obj.seek_sb(self.log, csv_out=False), _seek_sb_reference(self.obj, self.log))
+
+    def test_batched_time_adjust(self):
+        d0, spd0, d1, spd1 = np.array([30.0, 5.0]), np.array([20.0, 40.0]), np.array([-10.0, -2.0]), np.array([25.0, 10.0])
+        np.testing.assert_array_equal(DynamicRoadObject.t_spd_adjust(d0, spd0, d1, spd1),
+                                      [DynamicRoadObject.t_spd_adjust(*v) for v in zip(d0, spd0, d1, spd1)])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,109 @@
+import sys
+import io
+import os
+import contextlib
+import pathlib
+import tempfile
+import unittest
+
+import pandas as pd
+from click.testing import CliRunner
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.cli import cli
+from ssoss.distance import get_backend
+from ssoss.fleet import METRIC_COLUMNS, load_fleet_inventory, process_fleet
+from ssoss.index_file import write_index_file
+from ssoss.process_road_objects import ProcessRoadObjects
+from tests.factories import write_gpx, write_intersections
+
+
+class TestFleet(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmpdir.name)
+        self.inventory = self.dir / "signals.csv"
+        write_intersections(self.inventory)
+        self.tracks = {"east": self.dir / "east.gpx", "west": self.dir / "west.gpx"}
+        write_gpx(self.tracks["east"], -122.4230, 1.2e-4)
+        write_gpx(self.tracks["west"], -122.3945, -1.0e-4)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def single_vehicle(self, gpx):
+        pro = ProcessRoadObjects(gpx_filestring=str(gpx), generic_static_object_filestring=str(self.inventory),
+                                 use_pickle=False)
+        return pro.intersection_checks()
+
+    def test_matches_single_vehicle_runs(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            expected = {v: self.single_vehicle(gpx) for v, gpx in self.tracks.items()}
+            for workers in (1, 2):
+                result = process_fleet(self.tracks, self.inventory, workers=workers, use_pickle=False)
+                self.assertEqual(result.workers, workers)
+                self.assertEqual(result.kind, "intersection")
+                for vehicle, rows in expected.items():
+                    self.assertGreater(len(rows), 0)
+                    events = result.events[result.events["vehicle"] == vehicle]
+                    self.assertEqual(list(zip(events["description"], events["time"])), rows)
+                    self.assertTrue((events["gpx"] == str(self.tracks[vehicle])).all())
+        self.assertEqual(list(result.metrics.columns), list(METRIC_COLUMNS))
+        self.assertEqual(result.metrics["points"].tolist(), [260, 260])
+        self.assertEqual(result.metrics["events"].tolist(), [len(expected["east"]), len(expected["west"])])
+        self.assertIn("fleet: 2 tracks", result.report())
+
+    def test_index_built_once_and_shared(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            registry = load_fleet_inventory(self.inventory)
+            index = registry.spatial_index
+            self.assertIsNotNone(index)
+            result = process_fleet([("a", self.tracks["east"]), ("a", self.tracks["west"])], registry,
+                                   use_pickle=False)
+        self.assertIs(registry.spatial_index, index)
+        self.assertEqual(result.events["vehicle"].unique().tolist(), ["a"])
+        with self.assertRaises(TypeError):
+            process_fleet(self.tracks, registry, workers=1, gpx_ver="1.1")
+
+    def test_inventory_loads_without_output_dirs(self):
+        cwd = self.dir / "cwd"
+        cwd.mkdir()
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(cwd)
+        index_path = self.dir / "signals.ssidx"
+        write_index_file(self.inventory, index_path)
+        with contextlib.redirect_stdout(io.StringIO()):
+            from_csv = load_fleet_inventory(self.inventory)
+            from_index = load_fleet_inventory(index_path)
+        self.assertEqual(list(cwd.iterdir()), [])
+        self.assertFalse((self.dir / "out").exists())
+        self.assertEqual(from_csv.ids.tolist(), from_index.ids.tolist())
+        self.assertEqual(from_csv.source_digest, from_index.source_digest)
+        self.assertIsNotNone(from_index.spatial_index)
+
+    def test_backend_is_scoped_to_the_run(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            pro = ProcessRoadObjects(gpx_filestring=str(self.tracks["east"]),
+                                     generic_static_object_filestring=str(self.inventory),
+                                     use_pickle=False, distance_backend="haversine")
+            expected = pro.intersection_checks()
+            for workers in (1, 2):
+                result = process_fleet(self.tracks, self.inventory, workers=workers,
+                                       use_pickle=False, distance_backend="haversine")
+                events = result.events[result.events["vehicle"] == "east"]
+                self.assertEqual(list(zip(events["description"], events["time"])), expected)
+                self.assertIsNone(get_backend())
+
+    def test_fleet_command(self):
+        out = self.dir / "events.csv"
+        metrics = self.dir / "metrics.csv"
+        result = CliRunner().invoke(cli, ["fleet", str(self.inventory), f"truck1={self.tracks['east']}",
+                                          str(self.tracks["west"]), "-o", str(out), "--metrics", str(metrics)])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(pd.read_csv(metrics)["vehicle"].tolist(), ["truck1", "west"])
+        self.assertEqual(sorted(pd.read_csv(out)["vehicle"].unique()), ["truck1", "west"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import sys
+import gzip
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss import gpx_reader
+from ssoss.gpx_reader import read_gpx, sniff_gpx_version, gpx_stem
+
+GPX_10 = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.0" creator="test" xmlns="http://www.topografix.com/GPX/1/0">
+<trk><trkseg>
+<trkpt lat="37.0" lon="-122.0"><ele>5</ele><time>2025-01-01T00:00:00Z</time><speed>1.5</speed></trkpt>
+<trkpt lat="37.001" lon="-122.001"><time>2025-01-01T00:00:01.500Z</time><speed>2.5</speed></trkpt>
+</trkseg></trk>
+</gpx>
+"""
+
+GPX_11 = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1"
+     xmlns:gpxtpx="http://www.garmin.com/xmlschemas/TrackPointExtension/v1">
+<trk><trkseg>
+<trkpt lat="37.0" lon="-122.0"><time>2025-01-01T00:00:00</time></trkpt>
+<trkpt lat="37.001" lon="-122.001"><time>2025-01-01T00:00:01</time>
+<extensions><gpxtpx:TrackPointExtension><gpxtpx:speed>3.25</gpxtpx:speed></gpxtpx:TrackPointExtension></extensions>
+</trkpt>
+</trkseg></trk>
+</gpx>
+"""
+
+GPX_11_MIXED = """<?xml version="1.0" encoding="UTF-8"?>
+<gpx version="1.1" creator="test" xmlns="http://www.topografix.com/GPX/1/1">
+<metadata><name>drive</name><time>2025-01-01T00:00:00Z</time></metadata>
+{waypoints}
+<rte><name>plan</name>{route}</rte>
+<trk><name>drive</name><trkseg>
+<trkpt lat="37.0" lon="-122.0"><time>2025-01-01T00:00:00Z</time></trkpt>
+<trkpt lat="37.001" lon="-122.001"><time>2025-01-01T00:00:01Z</time></trkpt>
+</trkseg></trk>
+</gpx>
+"""
+
+
+class TestReadGPX(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.dir = pathlib.Path(self.tmpdir.name)
+
+    def test_gpx_10_columns(self):
+        path = self.dir / "drive.gpx"
+        path.write_text(GPX_10)
+        cols = read_gpx(path)
+        self.assertEqual(cols.version, "1.0")
+        self.assertEqual(len(cols), 2)
+        t0 = datetime(2025, 1, 1, tzinfo=timezone.utc).timestamp()
+        np.testing.assert_allclose(cols.time, [t0, t0 + 1.5])
+        np.testing.assert_allclose(cols.speed, [1.5, 2.5])
+        np.testing.assert_allclose(cols.lat, [37.0, 37.001])
+        self.assertEqual(cols.ele[0], 5)
+        self.assertTrue(np.isnan(cols.ele[1]))
+        self.assertFalse(cols.naive_time)
+
+    def test_gpx_11_extensions_and_naive_time(self):
+        path = self.dir / "drive.gpx"
+        path.write_text(GPX_11)
+        self.assertEqual(sniff_gpx_version(path), "1.1")
+        cols = read_gpx(path)
+        self.assertEqual(cols.version, "1.1")
+        self.assertTrue(np.isnan(cols.speed).all())
+        self.assertTrue(np.isnan(cols.extensions["speed"][0]))
+        self.assertEqual(cols.extensions["speed"][1], 3.25)
+
+        self.assertTrue(cols.naive_time)
+        cols.localize(ZoneInfo("America/Los_Angeles"))
+        expected = datetime(2025, 1, 1, tzinfo=ZoneInfo("America/Los_Angeles")).timestamp()
+        self.assertEqual(cols.time[0], expected)
+
+    def test_other_elements_are_discarded(self):
+        path = self.dir / "drive.gpx"
+        path.write_text(GPX_11_MIXED.format(
+            waypoints="\n".join(f'<wpt lat="37.{k:04d}" lon="-122.0"><name>w{k}</name></wpt>' for k in range(500)),
+            route="".join(f'<rtept lat="37.{k:04d}" lon="-122.0"><ele>3</ele></rtept>' for k in range(500))))
+        contexts = []
+        etree_iterparse = gpx_reader.etree.iterparse
+
+        def iterparse(*args, **kwargs):
+            contexts.append(etree_iterparse(*args, **kwargs))
+            return contexts[-1]
+
+        with mock.patch.object(gpx_reader.etree, "iterparse", iterparse):
+            cols = read_gpx(path)
+        np.testing.assert_allclose(cols.lat, [37.0, 37.001])
+        # nothing of the document is left in the tree
+        self.assertEqual(len(contexts[0].root), 0)
+
+    def test_gzip_input(self):
+        path = self.dir / "drive.gpx.gz"
+        with gzip.open(path, "wt") as f:
+            f.write(GPX_10)
+        self.assertEqual(gpx_stem(str(path)), "drive")
+        cols = read_gpx(path)
+        np.testing.assert_allclose(cols.speed, [1.5, 2.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import sys
+import os
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+from click.testing import CliRunner
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.cli import cli
+from ssoss.index_file import IndexFile, is_index_file, write_index_file
+from ssoss.ingest import read_static_objects
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.spatial_index import StaticObjectIndex
+from tests.factories import write_intersections
+
+NB = [37.90482644, -122.0657089, 37.904873, -122.0655432]
+
+INTERSECTIONS = [
+    [7, "California", "Ygnacio", 37.904976, -122.065751, 35, 30, 35, 30, 341.04, 70.44, 161.04, 233] + NB + [""] * 12,
+    [3, "Main", "Newell", 37.8925, -122.0608, 25, 25, 25, 25, 0, 90, 180, 270] + [""] * 16,
+]
+
+
+class TestIndexFile(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmpdir.name)
+        self.source = self.dir / "signals.csv"
+        write_intersections(self.source, INTERSECTIONS)
+        self.index_path = self.dir / "signals.ssidx"
+        write_index_file(self.source, self.index_path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip_is_memory_mapped(self):
+        self.assertTrue(is_index_file(self.index_path))
+        self.assertFalse(is_index_file(self.source))
+        index_file = IndexFile(self.index_path)
+        self.assertIsInstance(index_file.array("registry.lat"), np.memmap)
+
+        mapped = index_file.registry()
+        original = read_static_objects(self.source).registry
+        for name in ("ids", "lat", "lon", "spd", "bearing", "sb_available", "sb_target", "sb_offset_ft"):
+            np.testing.assert_array_equal(getattr(mapped, name), getattr(original, name))
+        self.assertEqual(mapped.get(7).get_name(), "California+Ygnacio")
+
+        built = StaticObjectIndex(original.lat, original.lon, original.search_radius_ft())
+        lat, lon = [37.9049, 37.8926, 37.0], [-122.0657, -122.0609, -122.0]
+        for a, b in zip(mapped.spatial_index.query_pairs(lat, lon), built.query_pairs(lat, lon)):
+            np.testing.assert_array_equal(a, b)
+
+    def test_stale_index_reads_the_source(self):
+        pro = ProcessRoadObjects(generic_static_object_filestring=str(self.index_path))
+        self.assertIsNotNone(pro.intersection_registry.spatial_index)
+        self.assertIs(pro.build_static_index("intersection"), pro.intersection_registry.spatial_index)
+
+        # touching the source without changing it keeps the index current
+        os.utime(self.source, ns=(1, 1))
+        self.assertFalse(IndexFile(self.index_path).is_stale())
+
+        write_intersections(self.source, INTERSECTIONS + [
+            [9, "Oak", "Elm", 37.9, -122.06, 25, 25, 25, 25, 0, 90, 180, 270] + [""] * 16])
+        self.assertTrue(IndexFile(self.index_path).is_stale())
+        pro = ProcessRoadObjects(generic_static_object_filestring=str(self.index_path))
+        self.assertEqual(sorted(pro.intersection_registry.ids.tolist()), [3, 7, 9])
+
+    def test_index_build_command(self):
+        out = self.dir / "cli.ssidx"
+        result = CliRunner().invoke(cli, ["index", "build", str(self.source), "-o", str(out)])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertEqual(len(IndexFile(out).registry()), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,168 @@
+import sys
+import csv
+import json
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.ingest import IngestError, read_static_objects
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry
+
+SIGN_HEADER = ["#", "Street", "Latitude", "Longitude", "Direction", "Sign Type", "Distance"]
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+class TestCSVIngest(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmpdir.name)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_all_bad_rows_are_reported(self):
+        path = self.dir / "signs.csv"
+        write_csv(path, SIGN_HEADER, [
+            [1, "Newell Ave", 37.892, -122.060, "EB", "Bike Sign", 150],
+            [2, "Main St", "north", -122.061, "NB", "Stop", 200],
+            [3, "Oak St", 37.893, -122.062, "NE", "Yield", 250],
+            [4, "Elm St", 37.894, -122.063, 45.5, "Stop", 300],
+            [1, "Pine St", 37.895, -122.064, "SB", "Stop", 100],
+            ["x", "Ash St", 95.0, -122.065, "WB", "Stop", "far"],
+        ])
+        result = read_static_objects(path)
+
+        self.assertEqual(result.kind, "generic_so")
+        self.assertIsInstance(result.registry, GenericObjectRegistry)
+        self.assertEqual(result.rows_read, 6)
+        self.assertEqual(result.registry.ids.tolist(), [1, 4])
+        np.testing.assert_array_equal(result.registry.bearing, [90.0, 45.5])
+        # CSV line numbers, header is line 1
+        self.assertEqual(result.bad_rows, [3, 4, 6, 7])
+        messages = [m for row, m in result.errors if row == 7]
+        self.assertEqual(len(messages), 3)
+        self.assertIn("duplicate id 1", result.report())
+
+        with self.assertRaises(IngestError) as raised:
+            read_static_objects(path, strict=True)
+        self.assertEqual(len(raised.exception.result.errors), len(result.errors))
+
+    def test_each_value_parses_on_its_own(self):
+        path = self.dir / "signs.csv"
+        rows = [[1, "Main St", 37.892, -122.060, "EB", "Stop", "1_000"],
+                [2, "Oak St", 37.893, -122.061, "NB", "Stop", 200]]
+        write_csv(path, SIGN_HEADER, rows)
+        alone = read_static_objects(path)
+        write_csv(path, SIGN_HEADER, rows + [[3, "Elm St", 37.894, -122.062, "SB", "Stop", "x"]])
+        with_bad_row = read_static_objects(path)
+        self.assertEqual(alone.registry.sight_distance_ft.tolist(), [1000.0, 200.0])
+        self.assertEqual(with_bad_row.registry.sight_distance_ft.tolist(), [1000.0, 200.0])
+        self.assertEqual(with_bad_row.bad_rows, [4])
+
+    def test_non_finite_values_are_row_errors(self):
+        path = self.dir / "signs.csv"
+        write_csv(path, SIGN_HEADER, [
+            [1, "Main St", 37.892, -122.060, "EB", "Stop", 150],
+            [2, "Oak St", "inf", -122.061, "NB", "Stop", 200],
+            [3, "Elm St", 37.894, -122.062, "SB", "Stop", "1e400"],
+            [4, "Ash St", 37.895, -122.063, "-Infinity", "Stop", 250],
+        ])
+        result = read_static_objects(path)
+        self.assertEqual(result.registry.ids.tolist(), [1])
+        self.assertEqual(result.bad_rows, [3, 4, 5])
+        self.assertIn("distance_ft: '1e400' is not finite", result.report())
+
+    def test_intersection_stop_bars(self):
+        path = self.dir / "intersections.csv"
+        nb = [37.90482644, -122.0657089, 37.904873, -122.0655432]
+        write_csv(path, ["#"] + [f"c{k}" for k in range(28)], [
+            [1, "California", "Ygnacio", 37.904976, -122.065751, 35, 30, 35, 30, 341, 70, 161, 233]
+            + nb + [""] * 12,
+            [2, "A", "B", 37.8, -122.4, 25, 25.5, 25, 25, 0, 90, 180, 270] + [""] * 16,
+            [3, "C", "D", 37.8, -122.4, 25, 25, 25, 25, 0, 90, 180, 270] + ["bad"] + nb[1:] + [""] * 12,
+        ])
+        result = read_static_objects(path)
+
+        self.assertIsInstance(result.registry, IntersectionRegistry)
+        self.assertEqual(result.registry.ids.tolist(), [1])
+        self.assertEqual(result.registry.sb_available[0].tolist(), [True, False, False, False])
+        np.testing.assert_allclose(result.registry.stop_bar[0, 0].ravel(), nb)
+        self.assertEqual(result.bad_rows, [3, 4])
+
+    def test_ragged_rows_are_reported(self):
+        path = self.dir / "intersections.csv"
+        write_csv(path, ["#"] + [f"c{k}" for k in range(12)], [
+            [1, "A", "B", 37.8, -122.4, 25, 25, 25, 25, 0, 90, 180, 270],
+            [2, "C", "D", 37.8, -122.41, 25, 25, 25, 25, 0, 90, 180, 270, 37.8, -122.41],
+            [3, "E", "F", 37.8, -122.42, 25, 25, 25, 25, 0, 90, 180, 270],
+        ])
+        result = read_static_objects(path)
+        self.assertEqual(result.registry.ids.tolist(), [1, 3])
+        self.assertEqual(result.rows_read, 3)
+        self.assertEqual(result.errors, [(3, "15 fields, expected 13")])
+        self.assertEqual(read_static_objects([path]).errors, [(3, "intersections.csv: 15 fields, expected 13")])
+
+    def test_column_count_is_checked(self):
+        path = self.dir / "bad.csv"
+        write_csv(path, ["a", "b", "c"], [[1, 2, 3]])
+        with self.assertRaises(ValueError):
+            read_static_objects(path)
+
+
+class TestLayerIngest(unittest.TestCase):
+    def test_geojson_points(self):
+        features = [
+            {"type": "Feature", "geometry": {"type": "Point", "coordinates": [-122.06, 37.89]},
+             "properties": {"ID": 10, "street_name": "Newell Ave", "bearing": "EB",
+                            "description": "Bike Sign", "distance_ft": 150}},
+            {"type": "Feature",
+             "geometry": {"type": "LineString", "coordinates": [[-122.06, 37.89], [-122.07, 37.9]]},
+             "properties": {"ID": 11, "street_name": "Main St", "bearing": "NB",
+                            "description": "Stop", "distance_ft": 200}},
+        ]
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir, "signs.geojson")
+            path.write_text(json.dumps({"type": "FeatureCollection", "features": features}))
+            result = read_static_objects(path)
+
+        self.assertEqual(result.kind, "generic_so")
+        self.assertEqual(result.registry.ids.tolist(), [10])
+        self.assertEqual(result.errors, [(2, "geometry is not a point")])
+        obj = result.registry.get(10)
+        self.assertAlmostEqual(obj.get_location().latitude, 37.89)
+        self.assertEqual((obj.get_bearing(), obj.get_sd()), (90.0, 150.0))
+
+    def test_geopackage_intersections(self):
+        import geopandas as gpd
+        from shapely.geometry import Point
+
+        gdf = gpd.GeoDataFrame(
+            {"id": [1, 2], "name1": ["A", "C"], "name2": ["B", "D"],
+             "spd_nb": [25, 25], "spd_eb": [25, 25], "spd_sb": [30, 30], "spd_wb": [30, 30],
+             "bearing_nb": [0, 0], "bearing_eb": [90, 90], "bearing_sb": [180, 180], "bearing_wb": [270, 270]},
+            geometry=[Point(-122.4, 37.8), Point(-122.41, 37.81)], crs="EPSG:4326",
+        ).to_crs(3857)
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir, "inventory.gpkg")
+            gdf.to_file(path, layer="signals", driver="GPKG")
+            result = read_static_objects(path, layer="signals")
+
+        self.assertEqual(result.kind, "intersection")
+        self.assertEqual(result.errors, [])
+        np.testing.assert_allclose(result.registry.lat, [37.8, 37.81])
+        np.testing.assert_allclose(result.registry.lon, [-122.4, -122.41])
+        self.assertEqual(result.registry.get(2).get_name(), "C+D")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import sys
+import pathlib
+import unittest
+from datetime import datetime, timezone, timedelta
+
+import numpy as np
+import geopy
+import gpxpy.geo as gpxgeo
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.kinematics import (classify_approach_leg, derive_speed, heading_within, rhumb_course,
+                              segment_distance_m)
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.track_array import TrackArray
+
+
+class TestKinematics(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        n = 50
+        self.lat = 37.79 + np.cumsum(rng.normal(0, 1e-4, n))
+        self.lon = -122.41 + np.cumsum(rng.normal(0, 1e-4, n))
+        self.time = 1.7e9 + np.arange(n, dtype=float)
+
+    def test_segment_distance_matches_geodesic(self):
+        d = segment_distance_m(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])
+        expected = [geodesic((a, b), (c, e)).meters for a, b, c, e in
+                    zip(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])]
+        np.testing.assert_allclose(d, expected, atol=1e-6)
+
+    def test_course_matches_gpxpy(self):
+        course = rhumb_course(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])
+        expected = [gpxgeo.get_course(a, b, c, e) for a, b, c, e in
+                    zip(self.lat[:-1], self.lon[:-1], self.lat[1:], self.lon[1:])]
+        np.testing.assert_allclose(course, expected, atol=1e-9)
+
+    def test_derive_speed_matches_speed_calc(self):
+        speed = derive_speed(self.time, self.lat, self.lon)
+        self.assertEqual(speed[0], 0.0)
+        for i in range(1, 5):
+            t0 = datetime.fromtimestamp(self.time[i - 1], tz=timezone.utc)
+            expected = ProcessRoadObjects.speed_calc(
+                geopy.Point(self.lat[i - 1], self.lon[i - 1]), geopy.Point(self.lat[i], self.lon[i]),
+                t0, t0 + timedelta(seconds=1))
+            self.assertAlmostEqual(speed[i], expected, places=6)
+
+    def test_speed_filter_and_zero_time_step(self):
+        speed = derive_speed([0.0, 1.0, 1.0], [0.0, 0.1, 0.1001], [0.0, 0.0, 0.0])
+        np.testing.assert_array_equal(speed, [0.0, 0.0, 0.0])
+
+    def test_track_columns(self):
+        track = TrackArray(self.time, self.lat, self.lon, np.arange(len(self.time), dtype=float))
+        self.assertEqual(track.cumulative_distance[0], 0.0)
+        self.assertAlmostEqual(track.cumulative_distance[1],
+                               geodesic((self.lat[0], self.lon[0]), (self.lat[1], self.lon[1])).ft,
+                               places=4)
+        self.assertAlmostEqual(track.point(3).acceleration(), 1.0 * track.point(0).MStoFTPS)
+        self.assertEqual(track.acceleration[-1], 0.0)
+
+
+class TestApproachLeg(unittest.TestCase):
+    def test_matches_scalar_classifier(self):
+        rng = np.random.default_rng(2)
+        headings = rng.uniform(0, 360, 200)
+        legs = np.sort(rng.uniform(0, 360, (200, 4)), axis=1)
+        leg, error = classify_approach_leg(headings, legs)
+        for k in range(200):
+            diffs = [min(abs(headings[k] - m), abs(360 - headings[k] + m), abs(360 - m + headings[k]))
+                     for m in legs[k]]
+            self.assertEqual(leg[k], np.argmin(diffs))
+            self.assertEqual(error[k], min(diffs))
+
+    def test_shared_bearings_and_ties(self):
+        leg, error = classify_approach_leg([355.0, 45.0], (0, 90, 180, 270))
+        self.assertEqual(leg.tolist(), [0, 0])
+        self.assertEqual(error.tolist(), [5.0, 45.0])
+        np.testing.assert_array_equal(heading_within([10.0, 300.0, 90.0], [350.0, 0.0, 40.0], 50), [True, False, False])
+
+
+if __name__ == "__main__":
+    unittest.main()
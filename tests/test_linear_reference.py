@@ -0,0 +1,89 @@
+import sys
+import pathlib
+import unittest
+
+import geopy
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.interpolation import times_at_distances
+from ssoss.linear_reference import generic_events, intersection_events, project_onto_track
+from ssoss.static_road_object import Intersection, GenericStaticObject
+from ssoss.track_array import TrackArray
+
+# degrees per meter near the equator
+LAT_DEG_PER_M = 1 / 110_574.0
+LON_DEG_PER_M = 1 / 111_320.0
+
+
+def straight_track(n=100, speed=10.0):
+    # northbound along lon 0 at constant speed, one point per second
+    lat = np.arange(n) * speed * LAT_DEG_PER_M
+    return TrackArray(np.arange(n, dtype=float), lat, np.zeros(n), np.full(n, speed))
+
+
+class TestTimesAtDistances(unittest.TestCase):
+    def test_interpolates_and_handles_stops(self):
+        cum = [0.0, 10.0, 10.0, 30.0]
+        t = [0.0, 1.0, 5.0, 6.0]
+        out = times_at_distances(cum, t, [0.0, 5.0, 10.0, 20.0, 31.0, -1.0])
+        np.testing.assert_allclose(out[:4], [0.0, 0.5, 1.0, 5.5])
+        self.assertTrue(np.isnan(out[4]) and np.isnan(out[5]))
+
+
+class TestLinearReference(unittest.TestCase):
+    def test_station_of_object_beside_track(self):
+        track = straight_track()
+        # 400 m up the road, 10 m to the east
+        stations = project_onto_track(track, [400 * LAT_DEG_PER_M], [10 * LON_DEG_PER_M], max_offset_ft=100)
+        self.assertEqual(len(stations), 1)
+        self.assertAlmostEqual(stations["station"][0], track.cumulative_distance[40], delta=1.0)
+        self.assertAlmostEqual(stations["offset"][0], 32.8, delta=0.5)
+        self.assertEqual(len(project_onto_track(track, [400 * LAT_DEG_PER_M], [0.01], max_offset_ft=100)), 0)
+
+    def test_intersection_event_time(self):
+        track = straight_track()
+        inter = Intersection(1, ("A", "B"), geopy.Point(600 * LAT_DEG_PER_M, 0.0),
+                             spd=(30, 30, 30, 30), bearing=(0, 90, 180, 270))
+        events, _ = intersection_events(track, [inter], max_offset_ft=100)
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events["leg"][0], 0)
+        # sight distance of 270 ft before a point 60 s into the drive at 10 m/s
+        expected = 60.0 - 270 * 0.3048 / 10.0
+        self.assertAlmostEqual(events["time"][0], expected, delta=0.05)
+
+    def test_out_and_back_passes_object_twice(self):
+        out = np.arange(60) * 10 * LAT_DEG_PER_M
+        lat = np.concatenate([out, out[::-1]])
+        lon = np.concatenate([np.zeros(60), np.full(60, 8 * LON_DEG_PER_M)])
+        track = TrackArray(np.arange(120, dtype=float), lat, lon, np.full(120, 10.0))
+        signs = [
+            GenericStaticObject(1, "A", geopy.Point(300 * LAT_DEG_PER_M, 4 * LON_DEG_PER_M), "NB", "Stop", 200.0),
+            GenericStaticObject(2, "A", geopy.Point(300 * LAT_DEG_PER_M, 4 * LON_DEG_PER_M), "SB", "Stop", 200.0),
+        ]
+        stations = project_onto_track(track, [300 * LAT_DEG_PER_M], [4 * LON_DEG_PER_M], max_offset_ft=100)
+        self.assertEqual(len(stations), 2)
+        events, _ = generic_events(track, signs, max_offset_ft=100, bearing_buffer_angle=50)
+        # each sign is only seen by the pass heading its way
+        self.assertEqual(events["id"].tolist(), [1, 2])
+        self.assertLess(events["time"][0], 30.0)
+        self.assertGreater(events["time"][1], 60.0)
+
+    def test_curved_approach_uses_along_track_distance(self):
+        # 300 m east then 300 m north; intersection just after the corner
+        east = np.arange(31) * 10 * LON_DEG_PER_M
+        north = np.arange(1, 31) * 10 * LAT_DEG_PER_M
+        lat = np.concatenate([np.zeros(31), north])
+        lon = np.concatenate([east, np.full(30, east[-1])])
+        track = TrackArray(np.arange(61, dtype=float), lat, lon, np.full(61, 10.0))
+        inter = Intersection(1, ("A", "B"), geopy.Point(50 * LAT_DEG_PER_M, east[-1]),
+                             spd=(35, 35, 35, 35), bearing=(0, 90, 180, 270))
+        events, _ = intersection_events(track, [inter], max_offset_ft=100)
+        # 325 ft of sight distance measured along the road, not straight-line
+        expected = 35.0 - 325 * 0.3048 / 10.0
+        self.assertAlmostEqual(events["time"][0], expected, delta=0.1)
+
+
+if __name__ == "__main__":
+    unittest.main()
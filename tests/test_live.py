@@ -0,0 +1,148 @@
+import sys
+import asyncio
+import contextlib
+import io
+import pathlib
+import tempfile
+import time
+import unittest
+
+import numpy as np
+from click.testing import CliRunner
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.cli import cli
+from ssoss.crossing_detector import detect_intersection_crossings
+from ssoss.fleet import load_fleet_inventory
+from ssoss.live import (Fix, LiveApproachDetector, live_events, parse_nmea, replay_lines, rmc_sentence,
+                        stream_lines, tcp_lines)
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.track_array import TrackArray
+from tests.factories import T0, write_gpx, write_intersections
+
+
+def write_nmea(path, lon_start, lon_step, n=260):
+    speed = abs(lon_step) * 88_000
+    lines = [rmc_sentence(T0 + i, 37.79001, lon_start + i * lon_step, speed) for i in range(n)]
+    path.write_text("\n".join(["$GPGGA,180000.00,3747.40060,N,12225.38000,W,1,08,1.0,10.0,M,,M,,*4C"] + lines) + "\n")
+
+
+async def collect(lines, detector):
+    return [e async for e in live_events(lines, detector)]
+
+
+class TestNMEA(unittest.TestCase):
+    def test_round_trip(self):
+        fix = parse_nmea(rmc_sentence(T0 + 12.25, -33.8568, 151.2153, speed=12.5, course=271.5))
+        self.assertAlmostEqual(fix.time, T0 + 12.25, places=6)
+        self.assertAlmostEqual(fix.lat, -33.8568, places=8)
+        self.assertAlmostEqual(fix.lon, 151.2153, places=8)
+        self.assertAlmostEqual(fix.speed, 12.5, places=3)
+        self.assertEqual(fix.course, 271.5)
+        self.assertTrue(np.isnan(parse_nmea(rmc_sentence(T0, 37.0, -122.0)).speed))
+
+    def test_rejects_other_sentences(self):
+        self.assertIsNone(parse_nmea("$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6B"))
+        self.assertIsNotNone(parse_nmea("$GPRMC,123519,A,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W*6A"))
+        self.assertIsNone(parse_nmea("$GPRMC,123519,V,4807.038,N,01131.000,E,022.4,084.4,230394,003.1,W"))
+        self.assertIsNone(parse_nmea("$GPGSV,2,1,08,01,40,083,46*75"))
+        self.assertIsNone(parse_nmea("garbage"))
+
+
+class TestLiveDetector(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmpdir.name)
+        self.inventory = self.dir / "signals.csv"
+        write_intersections(self.inventory)
+        self.gpx = self.dir / "east.gpx"
+        self.nmea = self.dir / "east.nmea"
+        write_gpx(self.gpx, -122.4230, 1.2e-4)
+        write_nmea(self.nmea, -122.4230, 1.2e-4)
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.registry = load_fleet_inventory(self.inventory)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_matches_batch_crossings(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            pro = ProcessRoadObjects(gpx_filestring=str(self.gpx), static_objects=self.registry, use_pickle=False)
+            batch = pro.detect_events("intersection")
+        detector = LiveApproachDetector(self.registry)
+        events = asyncio.run(collect(replay_lines(self.nmea, speed=0), detector))
+        self.assertEqual(detector.fixes, 260)
+        self.assertGreater(len(batch), 0)
+        self.assertEqual(sorted((int(e["id"]), int(e["leg"])) for e in events),
+                         sorted(zip(batch["id"].tolist(), batch["leg"].tolist())))
+        live = {(int(e["id"]), int(e["leg"])): e for e in events}
+        for e in batch:
+            match = live[(int(e["id"]), int(e["leg"]))]
+            self.assertAlmostEqual(float(match["crossing_time"]), float(e["crossing_time"]), delta=0.05)
+            # same fix and same candidate distance as the batch event table
+            self.assertEqual(int(match["point"]), int(e["point"]))
+            self.assertAlmostEqual(float(match["distance"]), float(e["distance"]), delta=0.1)
+        self.assertTrue(all(0 <= e["latency_ms"] < 1000 for e in events))
+        # only the objects in range of the last fix are remembered
+        self.assertLessEqual(len(detector._state), 2)
+
+    def test_jittery_track_matches_batch_rows(self):
+        # eastbound with GPS jitter that leaves and re-enters the sight distances
+        rng = np.random.default_rng(11)
+        n = 300
+        lon = -122.4230 + np.cumsum(rng.normal(1.0e-4, 1.2e-4, n))
+        lat = 37.79001 + rng.normal(0, 2e-5, n)
+        speed = np.abs(rng.normal(9.0, 2.0, n))
+        track = TrackArray(T0 + np.arange(n, dtype=float), lat, lon, speed)
+        batch = detect_intersection_crossings(
+            track, find_approach_candidates(track, self.registry.spatial_index, "intersection"), self.registry)
+        detector = LiveApproachDetector(self.registry)
+        events = np.concatenate([detector.update(Fix(track.time[i], lat[i], lon[i], speed[i], np.nan))
+                                 for i in range(n)])
+        self.assertGreater(len(batch), 0)
+        rows = lambda table: sorted(zip(table["id"].tolist(), table["leg"].tolist(), table["point"].tolist()))
+        self.assertEqual(rows(events), rows(batch))
+        order_live, order_batch = np.lexsort((events["id"], events["point"])), np.lexsort((batch["id"], batch["point"]))
+        np.testing.assert_allclose(events["time"][order_live], batch["time"][order_batch], atol=1e-6)
+        np.testing.assert_allclose(events["crossing_time"][order_live], batch["crossing_time"][order_batch], atol=1e-6)
+
+    def test_replay_is_paced(self):
+        start = time.perf_counter()
+        lines = asyncio.run(self._lines(replay_lines(self.nmea, speed=100)))
+        self.assertEqual(len(lines), 261)
+        self.assertGreater(time.perf_counter() - start, 2.0)
+
+    @staticmethod
+    async def _lines(source):
+        return [line async for line in source]
+
+    def test_tcp_feed(self):
+        payload = self.nmea.read_bytes()
+
+        async def run():
+            async def serve(reader, writer):
+                writer.write(payload)
+                await writer.drain()
+                writer.close()
+
+            server = await asyncio.start_server(serve, "127.0.0.1", 0)
+            port = server.sockets[0].getsockname()[1]
+            async with server:
+                return await collect(tcp_lines("127.0.0.1", port), LiveApproachDetector(self.registry))
+
+        events = asyncio.run(run())
+        expected = asyncio.run(collect(replay_lines(self.nmea, speed=0), LiveApproachDetector(self.registry)))
+        self.assertGreater(len(expected), 0)
+        self.assertEqual([int(e["id"]) for e in events], [int(e["id"]) for e in expected])
+
+    def test_live_command(self):
+        result = CliRunner().invoke(cli, ["live", str(self.inventory), "--replay", str(self.nmea), "--speed", "0"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn("260 fixes", result.output)
+        self.assertIn("Main+", result.output)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+import sys
+import pathlib
+import unittest
+
+import geopy
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.approach_candidates import find_approach_candidates
+from ssoss.crossing_detector import detect_generic_crossings, detect_intersection_crossings
+from ssoss.parallel import parallel_approach_candidates, parallel_crossings, shard_bounds
+from ssoss.static_road_object import Intersection, GenericStaticObject
+from tests.factories import make_index, square_loop_track
+
+
+class TestShardBounds(unittest.TestCase):
+    def test_cores_tile_track_and_halo_overlaps(self):
+        bounds = shard_bounds(103, 4, halo=2)
+        self.assertEqual(len(bounds), 4)
+        self.assertEqual(bounds[0][2], 0)
+        self.assertEqual(bounds[-1][3], 103)
+        for (_, _, _, core_hi), (lo, _, core_lo, _) in zip(bounds[:-1], bounds[1:]):
+            self.assertEqual(core_hi, core_lo)
+            self.assertEqual(lo, core_lo - 2)
+        self.assertEqual(shard_bounds(3, 8, halo=1), [(0, 2, 0, 1), (0, 3, 1, 2), (1, 3, 2, 3)])
+
+
+class TestParallelMatchesSerial(unittest.TestCase):
+    def setUp(self):
+        self.track = square_loop_track()
+        rng = np.random.default_rng(10)
+        lat = rng.uniform(self.track.lat.min(), self.track.lat.max(), 12)
+        lon = rng.uniform(self.track.lon.min(), self.track.lon.max(), 12)
+        self.intersections = [
+            Intersection(i + 1, ("A", "B"), geopy.Point(a, b), spd=(25, 30, 35, 25), bearing=(0, 90, 180, 270))
+            for i, (a, b) in enumerate(zip(lat, lon))
+        ]
+        self.generics = [
+            GenericStaticObject(i + 1, "A", geopy.Point(a, b), "NB", "Stop", 300.0)
+            for i, (a, b) in enumerate(zip(lat, lon))
+        ]
+
+    def test_intersections(self):
+        index = make_index(self.intersections, [i.get_sd("max") for i in self.intersections])
+        serial = find_approach_candidates(self.track, index, "intersection")
+        sharded = parallel_approach_candidates(self.track, index, "intersection", workers=3, min_shard_points=50)
+        np.testing.assert_array_equal(sharded, serial)
+
+        events = detect_intersection_crossings(self.track, serial, self.intersections)
+        self.assertGreater(len(events), 0)
+        np.testing.assert_array_equal(
+            parallel_crossings(self.track, serial, self.intersections, "intersection", workers=3,
+                               min_shard_points=50),
+            events)
+
+    def test_generic(self):
+        index = make_index(self.generics, [g.get_sd() + 150.0 for g in self.generics])
+        serial = find_approach_candidates(self.track, index, "generic_so")
+        np.testing.assert_array_equal(
+            parallel_approach_candidates(self.track, index, "generic_so", workers=3, min_shard_points=50),
+            serial)
+        events = detect_generic_crossings(self.track, serial, self.generics, 50)
+        np.testing.assert_array_equal(
+            parallel_crossings(self.track, serial, self.generics, "generic_so", workers=3,
+                               bearing_buffer_angle=50, min_shard_points=50),
+            events)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import sys
+import pathlib
+import unittest
+
+import geopy
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.projection import LocalENU
+from ssoss.static_road_object import Intersection
+from ssoss.track_array import TrackArray
+
+
+def make_track(n=200):
+    # north then east, about 10 m per second
+    lat = 37.77 + np.concatenate([np.arange(n // 2), np.full(n - n // 2, n // 2)]) * 9e-5
+    lon = -122.42 + np.concatenate([np.zeros(n // 2), np.arange(n - n // 2)]) * 1.1e-4
+    return TrackArray(np.arange(n, dtype=float), lat, lon, np.full(n, 10.0))
+
+
+class TestLocalENU(unittest.TestCase):
+    def test_distances_match_geodesic(self):
+        projection = LocalENU(37.77, -122.42)
+        rng = np.random.default_rng(4)
+        for _ in range(50):
+            # points up to ~10 km from the anchor, a few hundred feet apart
+            lat1, lon1 = 37.77 + rng.uniform(-0.09, 0.09), -122.42 + rng.uniform(-0.11, 0.11)
+            lat2, lon2 = lat1 + rng.uniform(-1e-3, 1e-3), lon1 + rng.uniform(-1e-3, 1e-3)
+            planar = projection.distance_ft(projection.forward_point((lat1, lon1)),
+                                            projection.forward_point((lat2, lon2)))
+            self.assertAlmostEqual(planar, geodesic((lat1, lon1), (lat2, lon2)).ft, delta=0.01)
+
+    def test_forward_axes_and_cache(self):
+        projection = LocalENU(0.0, 0.0)
+        east, north = projection.forward_point(geopy.Point(0.0, 0.001))
+        self.assertGreater(east, 111.0)
+        self.assertAlmostEqual(north, 0.0, places=6)
+        self.assertIn((0.0, 0.001), projection._cache)
+        self.assertAlmostEqual(float(projection.course(0, 0, 1, 1)), 45.0)
+
+    def test_distance_to_line(self):
+        self.assertAlmostEqual(LocalENU.distance_to_line_ft((0, 5), (-1, 0), (1, 0)), 5 * 3.280839895013123)
+        self.assertAlmostEqual(LocalENU.distance_to_line_ft((3, 4), (0, 0), (0, 0)), 5 * 3.280839895013123)
+
+
+class TestProjectedObjects(unittest.TestCase):
+    def setUp(self):
+        self.track = make_track()
+        self.plain = make_track()
+        self.projection = LocalENU.from_points(self.track.lat, self.track.lon)
+        self.track.project(self.projection)
+
+    def test_point_methods_match_geodesic(self):
+        target = geopy.Point(37.7745, -122.4195)
+        for i in (1, 50, 150):
+            p, q = self.track.point(i), self.plain.point(i)
+            self.assertAlmostEqual(p.distance_to(target), q.distance_to(target), delta=0.01)
+            self.assertAlmostEqual(p.get_dist_to_prev_point(), q.get_dist_to_prev_point(), delta=0.01)
+            self.assertAlmostEqual(p.get_bearing(), q.get_bearing(), delta=0.01)
+            line = (geopy.Point(37.774, -122.4197), geopy.Point(37.774, -122.4193))
+            self.assertAlmostEqual(p.distance_to_line(*line), q.distance_to_line(*line), delta=0.01)
+
+    def test_slice_keeps_projection(self):
+        sliced = self.track.slice(10, 20)
+        self.assertIs(sliced.projection, self.projection)
+        np.testing.assert_array_equal(sliced.east, self.track.east[10:20])
+
+    def test_intersection_stop_bar(self):
+        stop_bar = (geopy.Point(37.7735, -122.4201), geopy.Point(37.7735, -122.4199))
+        plain = Intersection(1, ("A", "B"), geopy.Point(37.774, -122.42), spd=(25, 25, 25, 25),
+                             bearing=(0, 90, 180, 270), stop_bar_nb=stop_bar)
+        projected = Intersection(1, ("A", "B"), geopy.Point(37.774, -122.42), spd=(25, 25, 25, 25),
+                                 bearing=(0, 90, 180, 270), stop_bar_nb=stop_bar)
+        projected.set_projection(self.projection)
+        self.assertAlmostEqual(projected.center_to_sb_distance(0), plain.center_to_sb_distance(0), delta=0.01)
+        self.assertEqual(projected.get_location_sb(0), plain.get_location_sb(0))
+        pt = geopy.Point(37.772, -122.42)
+        self.assertAlmostEqual(projected.distance_to_sb(pt, 0), plain.distance_to_sb(pt, 0), delta=0.01)
+        self.assertAlmostEqual(projected.distance_to_sb(pt, 1), plain.distance_to_sb(pt, 1), delta=0.01)
+
+
+if __name__ == "__main__":
+    unittest.main()
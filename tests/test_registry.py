@@ -0,0 +1,120 @@
+import sys
+import csv
+import pathlib
+import tempfile
+import unittest
+
+import geopy
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry, StaticObjectRegistry
+from ssoss.static_road_object import GenericStaticObject, Intersection
+
+STOP_BAR_NB = (geopy.Point(37.791939238323664, -122.40915035636318),
+               geopy.Point(37.79194559709975, -122.4091101232288))
+
+
+def make_intersection(id_num, stop_bar=False):
+    kwargs = {"stop_bar_nb": STOP_BAR_NB} if stop_bar else {}
+    i = Intersection(id_num, ("California", "Powell"), geopy.Point(37.79205307308094, -122.40918793416158),
+                     spd=(25, 30, 35, 40), bearing=(346.33, 90.09, 174.52, 271.11), **kwargs)
+    if stop_bar:
+        i.set_sb_pts_bools((True, False, False, False))
+    return i
+
+
+class TestIntersectionRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = IntersectionRegistry(
+            ids=[9001, 17, 42],
+            name=[("A", "B"), ("C", "D"), ("California", "Powell")],
+            lat=[1.0, 2.0, 37.79205307308094],
+            lon=[1.0, 2.0, -122.40918793416158],
+            spd=[(25, 25, 25, 25), (20, 20, 60, 60), (25, 30, 35, 40)],
+            bearing=[(0, 90, 180, 270)] * 2 + [(346.33, 90.09, 174.52, 271.11)],
+            stop_bar=[np.full((4, 2, 2), np.nan)] * 2
+                     + [[[(p.latitude, p.longitude) for p in STOP_BAR_NB]] + [np.full((2, 2), np.nan)] * 3],
+            sb_available=[[False] * 4] * 2 + [[True, False, False, False]],
+        )
+
+    def test_sparse_id_lookup(self):
+        self.assertEqual(self.registry.row(17), 1)
+        np.testing.assert_array_equal(self.registry.rows([42, 9001, 42]), [2, 0, 2])
+        self.assertIn(9001, self.registry)
+        with self.assertRaises(KeyError):
+            self.registry.rows([5])
+        with self.assertRaises(ValueError):
+            IntersectionRegistry([1, 1], [("A", "B")] * 2, [0, 0], [0, 0], [(25,) * 4] * 2, [(0,) * 4] * 2)
+
+    def test_objects_are_built_lazily_and_cached(self):
+        self.assertEqual(self.registry._views, {})
+        obj = self.registry.get(17)
+        self.assertEqual(list(self.registry._views), [1])
+        self.assertIs(self.registry.get(17), obj)
+        self.assertEqual(obj.get_id_num(), 17)
+        self.assertEqual([obj.get_sd(b) for b in range(4)], [175, 175, 715, 715])
+        np.testing.assert_array_equal(self.registry.sd[1], [175, 175, 715, 715])
+
+    def test_columns_match_materialized_objects(self):
+        reference = make_intersection(42, stop_bar=True)
+        obj = self.registry.get(42)
+        self.assertEqual(obj.get_location_sb(0), reference.get_location_sb(0))
+        self.assertAlmostEqual(obj.center_to_sb_distance(0), reference.center_to_sb_distance(0))
+        np.testing.assert_allclose(self.registry.sb_target[2], reference.sb_target)
+        np.testing.assert_allclose(self.registry.sb_offset_ft[2], reference.sb_offset_ft)
+        self.assertEqual(self.registry.search_radius_ft()[0], reference.get_sd("max"))
+
+    def test_from_objects_returns_the_same_objects(self):
+        objects = [make_intersection(5), make_intersection(3, stop_bar=True)]
+        registry = IntersectionRegistry.from_objects(objects)
+        self.assertIs(registry.get(3), objects[1])
+        self.assertTrue(registry.sb_available[1, 0])
+        np.testing.assert_array_equal(registry.bearing[0], objects[0].get_bearingT())
+
+
+class TestGenericObjectRegistry(unittest.TestCase):
+    def test_columns_and_objects(self):
+        registry = GenericObjectRegistry([70, 8], ["Main", "Oak"], [0.0, 1.0], [0.0, 1.0],
+                                         ["EB", 45.0], ["Stop", "Yield"], [300.0, 200.0])
+        np.testing.assert_array_equal(registry.bearing, [90.0, 45.0])
+        obj = registry.get(8)
+        self.assertIsInstance(obj, GenericStaticObject)
+        self.assertEqual((obj.get_name(), obj.get_bearing(), obj.get_sd()), ("Oak", 45.0, 200.0))
+        np.testing.assert_array_equal(registry.search_radius_ft(), [450.0, 350.0])
+
+    def test_subclass_must_materialize_objects(self):
+        class Incomplete(StaticObjectRegistry):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete([1, 2])
+
+
+class TestRegistryCSVLoading(unittest.TestCase):
+    def test_sparse_ids_and_stop_bars(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = pathlib.Path(tmpdir, "intersections.csv")
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                writer.writerow(["id"] + [f"c{k}" for k in range(28)])
+                nb = [STOP_BAR_NB[0].latitude, STOP_BAR_NB[0].longitude,
+                      STOP_BAR_NB[1].latitude, STOP_BAR_NB[1].longitude]
+                writer.writerow([5003, "California", "Powell", 37.79205307308094, -122.40918793416158,
+                                 25, 25, 25, 25, 346.33, 90.09, 174.52, 271.11] + nb + [""] * 12)
+                writer.writerow([12, "A", "B", 37.8, -122.4, 25, 25, 25, 25, 0, 90, 180, 270] + [""] * 16)
+            pro = ProcessRoadObjects()
+            registry = pro.read_intersection_csv(str(path))
+
+        self.assertEqual(registry.ids.tolist(), [5003, 12])
+        self.assertEqual(registry.sb_available.tolist(), [[True, False, False, False], [False] * 4])
+        self.assertEqual(pro.get_intersection_object_by_id(12).get_name(), "A+B")
+        reference = make_intersection(5003, stop_bar=True)
+        self.assertAlmostEqual(pro.get_intersection_object_by_id(5003).center_to_sb_distance(0),
+                               reference.center_to_sb_distance(0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,45 @@
+import sys
+import pathlib
+import unittest
+
+import numpy as np
+from geopy.distance import geodesic
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.spatial_index import StaticObjectIndex
+
+
+class TestStaticObjectIndex(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.lat = 37.7 + rng.uniform(0, 0.2, 400)
+        self.lon = -122.5 + rng.uniform(0, 0.2, 400)
+        self.radius = rng.uniform(300, 1100, 400)
+        self.index = StaticObjectIndex(self.lat, self.lon, self.radius)
+
+    def test_query_is_superset_of_brute_force(self):
+        rng = np.random.default_rng(8)
+        for qlat, qlon in zip(37.7 + rng.uniform(0, 0.2, 30), -122.5 + rng.uniform(0, 0.2, 30)):
+            near = set(self.index.query_point(qlat, qlon).tolist())
+            for j in range(len(self.lat)):
+                if geodesic((qlat, qlon), (self.lat[j], self.lon[j])).ft <= self.radius[j]:
+                    self.assertIn(j, near)
+            self.assertLess(len(near), len(self.lat))
+
+    def test_query_pairs_matches_single_queries(self):
+        qlat = np.array([37.75, 37.8, 10.0])
+        qlon = np.array([-122.45, -122.35, 10.0])
+        point_idx, obj_idx = self.index.query_pairs(qlat, qlon)
+        for k in range(len(qlat)):
+            np.testing.assert_array_equal(np.sort(obj_idx[point_idx == k]),
+                                          self.index.query_point(qlat[k], qlon[k]))
+        self.assertEqual(len(self.index.query_point(10.0, 10.0)), 0)
+
+    def test_empty_index(self):
+        index = StaticObjectIndex([], [], [])
+        self.assertEqual(len(index.query_point(37.7, -122.4)), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -124,3 +124,12 @@ def test_autosync_preserves_timezone_offset(run_cli, tmp_path):
     assert result["vid_sync"][1].endswith("-08:00")
 
 
+def test_parser_accepts_workers(run_cli, tmp_path):
+    so = tmp_path / "so.csv"
+    gpx = tmp_path / "track.gpx"
+    so.write_text("id\n")
+    gpx.write_text("<gpx></gpx>")
+
+    result = run_cli(["--static_object_file", str(so), "--gpx_file", str(gpx), "--workers", "4"])
+    assert result["workers"] == 4
+    assert run_cli(["--gpx_file", str(gpx)])["workers"] == 1
@@ -4,7 +4,7 @@ import unittest
 
 sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
 
-from ssoss.static_road_object import StaticRoadObject, Intersection
+from ssoss.static_road_object import StaticRoadObject, Intersection, stop_bar_arrays
 import geopy, geopy.distance
 
 
@@ -131,6 +131,36 @@ class TestIntersectionHelpers(unittest.TestCase):
         dist = self.test_intersection.center_to_sb_distance(0)
         self.assertIsInstance(dist, float)
 
+
+class TestStopBarPrecompute(unittest.TestCase):
+    """Stop bar geometry is computed once when the stop bar bools are set."""
+
+    def setUp(self):
+        ctr = TestIntersectionHelpers.intersection_ctr_pt
+        self.intersection = Intersection(
+            101, ("California", "Powell"), ctr,
+            spd=(25, 25, 25, 25), bearing=(346.33, 90.09, 174.52, 271.11),
+            stop_bar_nb=TestIntersectionHelpers.intersection_stop_bar_nb,
+        )
+        self.expected_d = min(geopy.distance.distance(ctr, p).ft
+                              for p in TestIntersectionHelpers.intersection_stop_bar_nb)
+        self.intersection.set_sb_pts_bools((True, False, False, False))
+
+    def test_precomputed_values(self):
+        self.assertAlmostEqual(self.intersection.center_to_sb_distance(0), self.expected_d)
+        nearest = self.intersection.get_location_sb(0)
+        self.assertEqual(tuple(self.intersection.sb_target[0]), (nearest.latitude, nearest.longitude))
+        self.assertEqual(self.intersection.sb_offset_ft[1], 0.0)
+        self.assertEqual(tuple(self.intersection.sb_target[1]),
+                         (self.intersection.ctr_pt.latitude, self.intersection.ctr_pt.longitude))
+
+    def test_stop_bar_arrays(self):
+        target, offset, available = stop_bar_arrays([self.intersection, self.intersection])
+        self.assertEqual(target.shape, (2, 4, 2))
+        self.assertAlmostEqual(offset[1, 0], self.expected_d)
+        self.assertEqual(available[0].tolist(), [True, False, False, False])
+
+
 class TestGetSdEdgeCases(unittest.TestCase):
     """Edge case checks for ``StaticRoadObject.get_sd``."""
 
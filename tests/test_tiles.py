@@ -0,0 +1,87 @@
+import sys
+import json
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+from click.testing import CliRunner
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.cli import cli
+from ssoss.ingest import read_static_objects
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.tiles import MANIFEST, TiledInventory, geohash, geohashes_in_bounds, write_tiled_inventory
+from tests.factories import write_intersections
+
+NB = [37.90482644, -122.0657089, 37.904873, -122.0655432]
+
+# two objects near Walnut Creek, one in San Francisco, one in Sacramento
+INTERSECTIONS = [
+    [1, "California", "Ygnacio", 37.904976, -122.065751, 35, 30, 35, 30, 341.04, 70.44, 161.04, 233] + NB + [""] * 12,
+    [2, "Main", "Newell", 37.8925, -122.0608, 25, 25, 25, 25, 0, 90, 180, 270] + [""] * 16,
+    [3, "Pine", "Taylor", 37.7907, -122.4123, 25, 25, 25, 30, 356.58, 87.12, 162.87, 263.94] + [""] * 16,
+    [4, "J St", "10th St", 38.5780, -121.4930, 30, 30, 30, 30, 0, 90, 180, 270] + [""] * 16,
+]
+
+
+class TestGeohash(unittest.TestCase):
+    def test_known_values(self):
+        self.assertEqual(geohash([57.64911], [10.40744], 11).tolist(), ["u4pruydqqvj"])
+        self.assertEqual(geohash([37.7907], [-122.4123], 5).tolist(), ["9q8yy"])
+
+    def test_bounds_cover_corners(self):
+        cells = set(geohashes_in_bounds(37.78, -122.42, 37.92, -122.05, 5).tolist())
+        corners = geohash([37.78, 37.78, 37.92, 37.92], [-122.42, -122.05, -122.42, -122.05], 5)
+        self.assertTrue(set(corners.tolist()) <= cells)
+
+
+class TestTiledInventory(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.dir = pathlib.Path(self.tmpdir.name)
+        self.source = self.dir / "signals.csv"
+        write_intersections(self.source, INTERSECTIONS)
+        self.tiles = self.dir / "tiles"
+        write_tiled_inventory(self.source, self.tiles, precision=5)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_round_trip(self):
+        inventory = TiledInventory(self.tiles)
+        self.assertEqual((inventory.kind, len(inventory), len(inventory.tiles)), ("intersection", 4, 3))
+        everything = inventory.read()
+        original = read_static_objects(self.source).registry
+        order = everything.registry.rows(original.ids)
+        np.testing.assert_allclose(everything.registry.stop_bar[order], original.stop_bar)
+        np.testing.assert_array_equal(everything.registry.sb_available[order], original.sb_available)
+        np.testing.assert_allclose(everything.registry.sb_offset_ft[order], original.sb_offset_ft)
+
+    def test_only_tiles_near_the_track_are_read(self):
+        inventory = TiledInventory(self.tiles / MANIFEST)
+        lat = np.linspace(37.895, 37.903, 20)
+        lon = np.linspace(-122.062, -122.064, 20)
+        result = inventory.read_for_track(lat, lon)
+        self.assertEqual(sorted(result.registry.ids.tolist()), [1, 2])
+        self.assertEqual(inventory.read_for_track([], []).registry.ids.tolist(), [])
+
+        pro = ProcessRoadObjects(generic_static_object_filestring=str(self.tiles))
+        self.assertEqual(len(pro.intersection_registry), 4)
+        pro.read_inventory_tiles(lat, lon)
+        self.assertEqual(sorted(pro.intersection_registry.ids.tolist()), [1, 2])
+        self.assertEqual(pro.so_digests["intersection"], inventory.digest(inventory.tiles_for_track(lat, lon)))
+
+    def test_build_tiles_command(self):
+        out = self.dir / "cli_tiles"
+        result = CliRunner().invoke(cli, ["build-tiles", str(self.source), "--output-dir", str(out),
+                                          "--precision", "4"])
+        self.assertEqual(result.exit_code, 0, result.output)
+        manifest = json.loads((out / MANIFEST).read_text())
+        self.assertEqual(manifest["precision"], 4)
+        self.assertEqual(sum(t["count"] for t in manifest["tiles"].values()), 4)
+
+
+if __name__ == "__main__":
+    unittest.main()
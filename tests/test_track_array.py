@@ -0,0 +1,75 @@
+import sys
+import pathlib
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.gpx_reader import GPXColumns
+from ssoss.motion_road_object import GPXPoint
+from ssoss.track_array import TrackArray, candidates_from_lists
+
+
+def make_track():
+    return TrackArray(
+        time=[0.0, 10.0, 20.0],
+        lat=[0.0, 0.0, 0.0],
+        lon=[0.0, 0.001, 0.002],
+        speed=[0.0, 1.0, 1.0],
+    )
+
+
+class TestTrackArray(unittest.TestCase):
+    def test_point_view_neighbours_by_index(self):
+        track = make_track()
+        p = track.point(1)
+        self.assertIsInstance(p, GPXPoint)
+        self.assertEqual(p.get_prev_gpx_point().get_timestamp(), 0.0)
+        self.assertEqual(p.get_next_gpx_point().get_timestamp(), 20.0)
+        self.assertIsNone(track.point(0).get_prev_gpx_point())
+        self.assertIsNone(track.point(-1).get_next_gpx_point())
+        self.assertAlmostEqual(p.get_bearing(), 90.0)
+
+    def test_point_datetime_in_track_timezone(self):
+        cols = GPXColumns(time=np.array([1681581600.0, 1681581601.0]), lat=np.array([37.79, 37.79]),
+                          lon=np.array([-122.42, -122.419]), speed=np.full(2, 10.0), ele=np.full(2, np.nan),
+                          timezone="America/Los_Angeles")
+        track = TrackArray.from_columns(cols)
+        dt = track.point(0).get_datetime()
+        self.assertEqual(dt.isoformat(), "2023-04-15T11:00:00-07:00")
+        self.assertEqual(dt.timestamp(), 1681581600.0)
+        self.assertEqual(track.slice(1, 2).point(0).get_datetime().utcoffset(), dt.utcoffset())
+        # points of a track without a timezone stay in UTC
+        self.assertEqual(make_track().point(1).get_datetime().isoformat(), "1970-01-01T00:00:10+00:00")
+
+    def test_views_have_no_instance_dict(self):
+        self.assertFalse(hasattr(make_track().point(0), "__dict__"))
+
+    def test_cumulative_distance_written_through_view(self):
+        track = make_track()
+        track.point(2).set_cumulative_distance(123.0)
+        self.assertEqual(track.cumulative_distance[2], 123.0)
+        self.assertEqual(track.point(2).get_cumulative_distance(), 123.0)
+
+    def test_candidate_table_round_trip(self):
+        track = make_track()
+        lists = [[], [(4, 1, 300.0, True), (2, 3, 350.0, True)], None]
+        track.set_candidates("intersection", candidates_from_lists(lists, "intersection"))
+        self.assertEqual(track.point(1).get_intersection_approach_list(), lists[1])
+        self.assertEqual(track.point(0).get_intersection_approach_list(), [])
+        np.testing.assert_array_equal(track.candidate_points("intersection"), [1])
+
+    def test_from_points(self):
+        pts = [
+            GPXPoint(0, "2025-01-01T00:00:00Z", (0.0, 0.0), 0),
+            GPXPoint(1, "2025-01-01T00:00:10Z", (0.0, 0.001), 2),
+        ]
+        track = TrackArray.from_points(pts)
+        self.assertEqual(len(track), 2)
+        self.assertEqual(track.time[1] - track.time[0], 10.0)
+        self.assertEqual(track.speed[1], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
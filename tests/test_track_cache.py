@@ -0,0 +1,122 @@
+import sys
+import contextlib
+import io
+import pathlib
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from ssoss.gpx_reader import GPXColumns
+from ssoss.process_road_objects import ProcessRoadObjects
+from ssoss.registry import GenericObjectRegistry, IntersectionRegistry
+from tests.factories import write_gpx
+from ssoss.track_cache import (
+    TrackCache, AnnotationCache, CANDIDATE_DTYPE, annotation_key, file_digest,
+)
+
+
+def make_columns(n=5):
+    return GPXColumns(
+        time=np.arange(n, dtype=float) + 1.7e9,
+        lat=np.linspace(37.0, 37.001, n),
+        lon=np.linspace(-122.0, -122.001, n),
+        speed=np.full(n, 4.0),
+        ele=np.full(n, np.nan),
+        extensions={"course": np.arange(n, dtype=float)},
+        version="1.1",
+        timezone="America/Los_Angeles",
+    )
+
+
+class TestTrackCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.dir = pathlib.Path(self.tmpdir.name)
+        self.gpx = self.dir / "drive.gpx"
+        self.gpx.write_text("<gpx>one</gpx>")
+        self.cache = TrackCache(self.dir / "cache", "drive")
+
+    def test_round_trip_is_memory_mapped(self):
+        digest = file_digest(self.gpx)
+        self.assertIsNone(self.cache.load(digest))
+        cols = make_columns()
+        self.cache.save(digest, cols)
+
+        loaded = self.cache.load(digest)
+        self.assertIsInstance(loaded.time, np.memmap)
+        np.testing.assert_array_equal(loaded.time, cols.time)
+        np.testing.assert_array_equal(loaded.extensions["course"], cols.extensions["course"])
+        self.assertEqual(loaded.version, "1.1")
+        self.assertEqual(loaded.timezone, "America/Los_Angeles")
+
+    def test_track_timezone_survives_the_cache(self):
+        write_gpx(self.gpx, -122.4230, 1.2e-4, n=5)
+        for _ in range(2):  # parsed, then loaded from the cache
+            with contextlib.redirect_stdout(io.StringIO()):
+                pro = ProcessRoadObjects(gpx_filestring=str(self.gpx))
+            self.assertEqual(pro.track.point(0).get_datetime().isoformat(), "2023-04-15T11:00:00-07:00")
+        self.assertIsNotNone(pro.cache_file)
+
+    def test_edited_gpx_invalidates_entry(self):
+        old_digest = file_digest(self.gpx)
+        self.cache.save(old_digest, make_columns())
+        self.gpx.write_text("<gpx>two</gpx>")
+        new_digest = file_digest(self.gpx)
+
+        self.assertNotEqual(old_digest, new_digest)
+        self.assertIsNone(self.cache.load(new_digest))
+        self.cache.save(new_digest, make_columns(3))
+        self.assertFalse(self.cache.entry_path(old_digest).exists())
+        self.assertEqual(len(self.cache.load(new_digest)), 3)
+
+
+class TestAnnotationCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.dir = pathlib.Path(self.tmpdir.name)
+
+    def test_key_depends_on_all_inputs(self):
+        base = annotation_key("gpx", "csv", {"buffer": 150})
+        self.assertEqual(base, annotation_key("gpx", "csv", {"buffer": 150}))
+        self.assertNotEqual(base, annotation_key("gpx2", "csv", {"buffer": 150}))
+        self.assertNotEqual(base, annotation_key("gpx", "csv2", {"buffer": 150}))
+        self.assertNotEqual(base, annotation_key("gpx", "csv", {"buffer": 100}))
+
+    def test_candidates_and_events_round_trip(self):
+        cache = AnnotationCache(self.dir, "drive", annotation_key("gpx", "csv", {}))
+        self.assertIsNone(cache.load_candidates("intersection"))
+        self.assertIsNone(cache.load_events("intersection"))
+
+        candidates = np.array([(3, 7, 1, 250.5, True)], dtype=CANDIDATE_DTYPE)
+        cache.save_candidates("intersection", candidates)
+        cache.save_events("intersection", [("7.1-Main+First-270-1.5", 1.5)])
+
+        loaded = cache.load_candidates("intersection")
+        self.assertEqual(loaded["id"][0], 7)
+        self.assertEqual(loaded["distance"][0], 250.5)
+        self.assertEqual(cache.load_events("intersection"), [("7.1-Main+First-270-1.5", 1.5)])
+
+    def test_each_kind_is_keyed_on_its_own_inventory(self):
+        pro = ProcessRoadObjects()
+        pro.set_static_objects(IntersectionRegistry([1], [("A", "B")], [0.0], [0.0], [(25,) * 4], [(0,) * 4]),
+                               "intersections-v1")
+        pro.set_static_objects(GenericObjectRegistry([2], ["Main"], [0.0], [0.0], [0.0], ["sign"], [200.0]),
+                               "generic-v1")
+        before = {k: c.key for k, c in pro.open_annotation_caches("drive", "gpx").items()}
+        self.assertEqual(set(before), {"intersection", "generic_so"})
+
+        # editing the intersections after the generic file was loaded only misses their cache
+        pro.set_static_objects(IntersectionRegistry([1], [("A", "B")], [0.0], [0.0], [(35,) * 4], [(0,) * 4]),
+                               "intersections-v2")
+        after = {k: c.key for k, c in pro.open_annotation_caches("drive", "gpx").items()}
+        self.assertNotEqual(before["intersection"], after["intersection"])
+        self.assertEqual(before["generic_so"], after["generic_so"])
+
+
+if __name__ == "__main__":
+    unittest.main()